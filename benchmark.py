@@ -0,0 +1,338 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 앱 모듈 (파일명이 한글이므로 importlib로 로드, import 시 화면은 그리지 않음)
+app = importlib.import_module("company_map_app_최종")
+
+# ===== 가짜 수요처 데이터 생성 =====
+# 시도별 중심 좌표와 시군구 (시군구 중심은 시도 중심 주변에 고정 난수로 배치)
+REGIONS = {
+    '서울특별시': ((37.5665, 126.9780), ['강남구', '서초구', '송파구', '영등포구', '마포구', '구로구', '금천구', '중구', '종로구', '성동구']),
+    '경기도': ((37.4138, 127.5183), ['수원시', '성남시', '용인시', '화성시', '평택시', '안산시', '시흥시', '김포시', '파주시', '이천시']),
+    '인천광역시': ((37.4563, 126.7052), ['남동구', '서구', '연수구', '부평구', '중구', '계양구']),
+    '부산광역시': ((35.1796, 129.0756), ['해운대구', '사상구', '강서구', '중구', '부산진구', '사하구']),
+    '대구광역시': ((35.8714, 128.6014), ['달서구', '북구', '동구', '수성구', '달성군']),
+    '광주광역시': ((35.1595, 126.8526), ['광산구', '북구', '서구', '남구']),
+    '대전광역시': ((36.3504, 127.3845), ['유성구', '대덕구', '서구', '중구']),
+    '울산광역시': ((35.5384, 129.3114), ['남구', '울주군', '북구', '동구']),
+    '세종특별자치시': ((36.4800, 127.2890), ['세종시']),
+    '강원특별자치도': ((37.8228, 128.1555), ['춘천시', '원주시', '강릉시', '동해시']),
+    '충청북도': ((36.6357, 127.4917), ['청주시', '충주시', '음성군', '진천군']),
+    '충청남도': ((36.5184, 126.8000), ['천안시', '아산시', '당진시', '서산시']),
+    '전북특별자치도': ((35.7175, 127.1530), ['전주시', '군산시', '익산시', '완주군']),
+    '전라남도': ((34.8679, 126.9910), ['여수시', '순천시', '광양시', '목포시']),
+    '경상북도': ((36.4919, 128.8889), ['포항시', '구미시', '경산시', '경주시']),
+    '경상남도': ((35.4606, 128.2132), ['창원시', '김해시', '양산시', '거제시', '진주시']),
+    '제주특별자치도': ((33.4996, 126.5312), ['제주시', '서귀포시'])
+}
+
+# 시도별 기업 분포 비중 (수도권 집중)
+REGION_WEIGHTS = {
+    '서울특별시': 0.22, '경기도': 0.26, '인천광역시': 0.06, '부산광역시': 0.06, '대구광역시': 0.04,
+    '광주광역시': 0.02, '대전광역시': 0.02, '울산광역시': 0.02, '세종특별자치시': 0.01, '강원특별자치도': 0.02,
+    '충청북도': 0.03, '충청남도': 0.04, '전북특별자치도': 0.02, '전라남도': 0.02, '경상북도': 0.05,
+    '경상남도': 0.06, '제주특별자치도': 0.05
+}
+
+# 범주형 컬럼 값과 비중
+COMPANY_SIZES = {'중소기업': 0.78, '중견기업': 0.1, '대기업': 0.04, '비영리단체': 0.02, '미분류': 0.06}
+CREDIT_RATINGS = {
+    'AAA': 0.01, 'AA+': 0.01, 'AA0': 0.02, 'AA-': 0.02, 'A+': 0.03, 'A0': 0.04, 'A-': 0.05,
+    'BBB+': 0.07, 'BBB0': 0.08, 'BBB-': 0.09, 'BB+': 0.09, 'BB0': 0.08, 'BB-': 0.08,
+    'B+': 0.08, 'B0': 0.07, 'B-': 0.06, 'CCC+': 0.03, 'CCC': 0.02, 'D': 0.01, 'NR': 0.06
+}
+CASH_FLOW_GRADES = {'CR-1': 0.1, 'CR-2': 0.25, 'CR-3': 0.3, 'CR-4': 0.2, 'CR-5': 0.1, 'NR': 0.05}
+INDUSTRIES = [
+    ('제조업', '제조', 'C', ['C25', 'C26', 'C28', 'C29', 'C20'], ['자동차부품', '반도체장비', '금속가공', '화학제품', '플라스틱 사출']),
+    ('도매 및 소매업', '도소매', 'G', ['G46', 'G47'], ['산업용 기계 도매', '전자부품 유통', '식자재 유통']),
+    ('운수 및 창고업', '서비스', 'H', ['H49', 'H52'], ['화물 운송', '물류센터 운영', '창고 보관']),
+    ('건설업', '건설', 'F', ['F41', 'F42'], ['건축 공사', '토목 공사', '설비 공사']),
+    ('사업시설 관리업', '서비스', 'N', ['N74', 'N76'], ['건물 관리', '지게차 임대', '장비 임대'])
+]
+NAME_PREFIXES = ['대한', '한국', '삼성', '동아', '세진', '우리', '제일', '신성', '태영', '영진', '한일', '대성']
+NAME_SUFFIXES = ['산업', '물류', '테크', '정밀', '상사', '유통', '전자', '화학', '건설', '기계']
+
+def weighted_choice(rng, weights, n_rows):
+    values = list(weights.keys())
+    p = np.array(list(weights.values()), dtype=np.float64)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=n_rows, p=p / p.sum())]
+
+# 원본 엑셀과 같은 컬럼 구성의 가짜 수요처 데이터
+# (좌표 누락, 국외 좌표, 소수점이 붙은 사업자등록번호 등 원본에 있는 오류도 일부 포함)
+def generate_company_data(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    
+    # 시도 → 시군구 → 좌표 (시군구 중심 주변 정규분포)
+    region_names = list(REGIONS.keys())
+    sido = weighted_choice(rng, REGION_WEIGHTS, n_rows)
+    sigungu = np.empty(n_rows, dtype=object)
+    lat = np.empty(n_rows)
+    lon = np.empty(n_rows)
+    layout_rng = np.random.default_rng(12345)
+    for name in region_names:
+        (center_lat, center_lon), districts = REGIONS[name]
+        rows = np.flatnonzero(sido == name)
+        offsets = layout_rng.normal(0, 0.12, size=(len(districts), 2))
+        picks = rng.integers(0, len(districts), size=len(rows))
+        sigungu[rows] = np.asarray(districts, dtype=object)[picks]
+        lat[rows] = center_lat + offsets[picks, 0] + rng.normal(0, 0.03, len(rows))
+        lon[rows] = center_lon + offsets[picks, 1] + rng.normal(0, 0.03, len(rows))
+    
+    # 업종 → 업태, 산업코드, 주요상품
+    industry = rng.integers(0, len(INDUSTRIES), size=n_rows)
+    detail = rng.integers(0, 5, size=n_rows)
+    product = rng.integers(0, 5, size=n_rows)
+    industry_name = np.asarray([INDUSTRIES[i][0] for i in industry], dtype=object)
+    business_type = np.asarray([INDUSTRIES[i][1] for i in industry], dtype=object)
+    code_major = np.asarray([INDUSTRIES[i][2] for i in industry], dtype=object)
+    code_detail = np.asarray([INDUSTRIES[i][3][d % len(INDUSTRIES[i][3])] for i, d in zip(industry, detail)], dtype=object)
+    products = np.asarray([INDUSTRIES[i][4][p % len(INDUSTRIES[i][4])] for i, p in zip(industry, product)], dtype=object)
+    
+    ids = np.arange(n_rows)
+    names = [
+        f"{NAME_PREFIXES[a]}{NAME_SUFFIXES[b]}{'' if i % 3 else ' 주식회사'}{i}"
+        for i, a, b in zip(ids, rng.integers(0, len(NAME_PREFIXES), n_rows), rng.integers(0, len(NAME_SUFFIXES), n_rows))
+    ]
+    lots = rng.integers(1, 999, size=n_rows)
+    jibun = [f"{s} {g} 산업동 {n}번지" for s, g, n in zip(sido, sigungu, lots)]
+    road = [f"{s} {g} 산업로 {n}" for s, g, n in zip(sido, sigungu, lots)]
+    phones = [f"0{2 + i % 60}-{1000 + i % 9000}-{i % 10000:04d}" for i in ids]
+    # 엑셀에서 숫자로 읽혀 소수점이 붙은 사업자등록번호 재현
+    business_numbers = [f"{1000000000 + i * 7}{'.0' if i % 4 == 0 else ''}" for i in ids]
+    
+    df = pd.DataFrame({
+        '한글업체명': names,
+        '시도': sido,
+        '시군구': sigungu,
+        '기업규모구분': weighted_choice(rng, COMPANY_SIZES, n_rows),
+        '업종명': industry_name,
+        '업태명': business_type,
+        '주요상품내역': products,
+        '산업코드 대분류': code_major,
+        '산업코드 세세분류': code_detail,
+        '신용등급': weighted_choice(rng, CREDIT_RATINGS, n_rows),
+        '현금흐름등급': weighted_choice(rng, CASH_FLOW_GRADES, n_rows),
+        '한글지번주소': jibun,
+        '전화번호': phones,
+        '사업자등록번호': business_numbers,
+        '한글주소': road,
+        '위도': lat,
+        '경도': lon
+    })
+    
+    # 좌표 누락 2%, 국외/오입력 좌표 0.5%
+    df.loc[rng.random(n_rows) < 0.02, '위도'] = np.nan
+    df.loc[rng.random(n_rows) < 0.005, '경도'] = 0.0
+    return df
+
+# ===== 측정 =====
+# 함수를 여러 번 실행해서 (마지막 결과, 소요 시간 목록) 반환
+def measure(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+def summarize(timings, **extra):
+    summary = {
+        'min_ms': round(min(timings) * 1000, 3),
+        'median_ms': round(float(np.median(timings)) * 1000, 3),
+        'runs': len(timings)
+    }
+    summary.update(extra)
+    return summary
+
+# 데이터 크기 하나에 대한 단계별 측정
+def run_size(n_rows, repeat, cold_load_max_rows, work_dir, seed):
+    phases = {}
+    raw = generate_company_data(n_rows, seed=seed)
+    
+    # process_data (원본을 수정하므로 매번 복사본 사용, 복사 시간은 제외)
+    copies = [raw.copy() for _ in range(repeat)]
+    df, timings = measure(lambda: app.process_data(copies.pop()), repeat)
+    phases['process_data'] = summarize(timings, rows_in=n_rows, rows_out=len(df))
+    
+    # 컬럼 타입 압축 (범주형/Arrow 문자열/float32)
+    df = app.make_arrow_compatible(df)
+    mb_before = df.memory_usage(deep=True, index=False).sum() / 1e6
+    compact_df, timings = measure(lambda: app.compact_frame(df), repeat)
+    phases['compact_frame'] = summarize(
+        timings, mb_before=round(mb_before, 2),
+        mb_after=round(compact_df.memory_usage(deep=True, index=False).sum() / 1e6, 2)
+    )
+    
+    # load_company_data: 엑셀 파싱 + 전처리 + 캐시 저장(cold), 컬럼형 캐시 읽기(warm)
+    # 엑셀 작성이 오래 걸리므로 큰 데이터는 엑셀 대신 같은 지문 구조로 캐시만 측정
+    source_path = os.path.join(work_dir, f"bench_{n_rows}.xlsx")
+    app.CACHE_DIR = os.path.join(work_dir, '.cache')
+    if n_rows <= cold_load_max_rows:
+        raw.to_excel(source_path, index=False)
+        def cold_load():
+            if os.path.exists(app.CACHE_DIR):
+                for name in os.listdir(app.CACHE_DIR):
+                    os.remove(os.path.join(app.CACHE_DIR, name))
+            return app.load_processed_frame(source_path)
+        _, timings = measure(cold_load, 1)
+        phases['load_company_data_cold'] = summarize(timings, source_bytes=os.path.getsize(source_path))
+    else:
+        with open(source_path, 'wb') as f:
+            f.write(f"synthetic {n_rows} {seed}".encode('utf-8'))  # 지문 계산용 자리표시 파일
+        fingerprint = app.source_fingerprint(source_path)
+        app.write_columnar_cache(compact_df, app.cache_file_path(source_path, fingerprint))
+        app.write_cache_manifest(source_path, fingerprint)
+        phases['load_company_data_cold'] = {'skipped': f"rows > {cold_load_max_rows}"}
+    df, timings = measure(lambda: app.load_processed_frame(source_path), repeat)
+    phases['load_company_data_warm'] = summarize(timings, rows=len(df))
+    
+    # 인덱스 생성 (데이터 버전당 1회)
+    facet_index, timings = measure(lambda: app.FacetIndex(df), 1)
+    phases['build_facet_index'] = summarize(timings)
+    catalog, timings = measure(lambda: app.FacetCatalog(facet_index), 1)
+    phases['build_facet_catalog'] = summarize(timings)
+    search_index, timings = measure(lambda: app.SearchIndex(df), 1)
+    phases['build_search_index'] = summarize(timings)
+    spatial_index, timings = measure(
+        lambda: app.SpatialGridIndex(df['latitude'].to_numpy(), df['longitude'].to_numpy()), 1
+    )
+    phases['build_spatial_index'] = summarize(timings)
+    
+    # 필터링: 시도 + 기업규모 (앱의 기본 사용 방식)
+    selections = {'시도': '서울특별시', '시군구': '전체', '기업규모구분': '중소기업', '신용등급': '전체'}
+    positions, timings = measure(lambda: facet_index.filter(selections), repeat)
+    phases['filter'] = summarize(timings, rows=len(positions))
+    
+    # 필터 선택지 기업 수 (다른 컬럼의 선택 조건 기준)
+    _, timings = measure(lambda: [catalog.counts(col, selections) for col in app.FILTER_COLUMNS], repeat)
+    phases['facet_counts'] = summarize(timings)
+    
+    # 통합검색: 선택도가 다른 검색어
+    for label, query, mode in [('search_selective', '정밀', 'literal'),
+                               ('search_broad', '물류', 'literal'),
+                               ('search_all_words', '지게차 임대', 'all_words')]:
+        hits, timings = measure(lambda: search_index.search(query, mode=mode), repeat)
+        phases[label] = summarize(timings, rows=len(hits), query=query)
+    
+    # 업체명 초성/유사 검색
+    name_index, timings = measure(lambda: app.CompanyNameIndex(df['한글업체명']), 1)
+    phases['build_name_index'] = summarize(timings)
+    for label, query in [('name_search_chosung', 'ㄷㅎㅁㄹ'), ('name_search_fuzzy', '대한물루')]:
+        hits, timings = measure(lambda: name_index.search(query), repeat)
+        phases[label] = summarize(timings, rows=len(hits), query=query)
+    
+    # 반경 검색
+    (near, _), timings = measure(lambda: spatial_index.query_radius(37.5665, 126.9780, 5.0), repeat)
+    phases['radius_search'] = summarize(timings, rows=len(near), radius_km=5.0)
+    
+    # SQL 백엔드: SQLite 파일 생성 (데이터 버전당 1회) + 필터/검색어를 쿼리 한 번으로
+    sql_backend, timings = measure(lambda: app.SqlQueryBackend(df), 1)
+    phases['build_sql_database'] = summarize(timings, db_bytes=os.path.getsize(sql_backend.path))
+    (sql_rows, _), timings = measure(lambda: sql_backend.query(selections, '물류'), repeat)
+    phases['sql_query'] = summarize(timings, rows=len(sql_rows), query='물류')
+    
+    # 담당 거점 배정 (전체 기업 × 시도 중심 거점) + 거점별 요약 (전체 데이터, 신용등급 분포)
+    depots = pd.DataFrame({
+        '거점명': [f"{sido} 거점" for sido in REGIONS],
+        'latitude': [center[0] for center, _ in REGIONS.values()],
+        'longitude': [center[1] for center, _ in REGIONS.values()]
+    })
+    assignment, timings = measure(lambda: app.DepotAssignment(df, depots), repeat)
+    phases['depot_assignment'] = summarize(timings, rows=len(df), depots=len(depots))
+    _, timings = measure(lambda: assignment.summary(np.arange(len(df)), catalog, '신용등급'), repeat)
+    phases['depot_summary'] = summarize(timings, rows=len(df))
+    
+    # 마커 생성 + HTML 직렬화 (필터링 결과 기준)
+    filtered_df = df.iloc[positions]
+    m, timings = measure(lambda: app.build_company_map(
+        filtered_df, '서울특별시', '전체', 'OpenStreetMap', '기본 마커',
+        use_clustering=True, cluster_radius=50, min_cluster_size=2, color_by='기업 규모'
+    ), repeat)
+    phases['build_markers'] = summarize(timings, rows=len(filtered_df))
+    map_html, timings = measure(lambda: app.render_map_html(m), repeat)
+    phases['render_html'] = summarize(timings, rows=len(filtered_df), html_bytes=len(map_html.encode('utf-8')))
+    
+    # 밀도 지도 (육각형 집계 + HTML 직렬화, HTML 크기는 행 수가 아닌 육각형 수에 비례)
+    density_map, timings = measure(lambda: app.build_density_map(filtered_df, '서울특별시', '전체', 'OpenStreetMap'), repeat)
+    phases['build_density'] = summarize(timings, rows=len(filtered_df))
+    density_html, timings = measure(lambda: app.render_map_html(density_map), repeat)
+    phases['render_density_html'] = summarize(timings, rows=len(filtered_df), html_bytes=len(density_html.encode('utf-8')))
+    
+    return phases
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# 이전 결과 파일과 비교 (단계별 중앙값 비율)
+def print_comparison(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n비교 기준: {baseline_path} ({baseline.get('git_revision')})")
+    for size, phases in results['sizes'].items():
+        for phase, summary in phases.items():
+            before = baseline.get('sizes', {}).get(size, {}).get(phase, {})
+            if 'median_ms' in summary and before.get('median_ms'):
+                ratio = summary['median_ms'] / before['median_ms']
+                flag = '  ← 느려짐' if ratio > 1.2 else ''
+                print(f"{size:>9} {phase:<26} {before['median_ms']:>10.2f} → {summary['median_ms']:>10.2f} ms  x{ratio:.2f}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 수요처 데이터로 로드/필터/검색/지도 생성 단계별 성능 측정")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help="데이터 행 수 목록")
+    parser.add_argument('--repeat', type=int, default=3, help="단계별 반복 횟수")
+    parser.add_argument('--cold-load-max-rows', type=int, default=100_000,
+                        help="이 행 수 이하일 때만 엑셀을 작성해서 최초 로드(엑셀 파싱)를 측정")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json', help="결과 JSON 파일 경로")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON 파일 경로")
+    args = parser.parse_args()
+    
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'packages': {name: importlib.import_module(name).__version__ for name in ['pandas', 'numpy', 'pyarrow', 'folium', 'streamlit']},
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'sizes': {}
+    }
+    
+    with tempfile.TemporaryDirectory(prefix='company_map_bench_') as work_dir:
+        for n_rows in args.sizes:
+            print(f"{n_rows:,}행 측정 중...", file=sys.stderr)
+            phases = run_size(n_rows, args.repeat, args.cold_load_max_rows, work_dir, args.seed)
+            results['sizes'][str(n_rows)] = phases
+            for phase, summary in phases.items():
+                print(f"{n_rows:>9} {phase:<26} {summary.get('median_ms', '-'):>10} ms", file=sys.stderr)
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}", file=sys.stderr)
+    
+    if args.compare:
+        print_comparison(results, args.compare)
+
+if __name__ == "__main__":
+    # streamlit 실행 환경 밖에서 캐시 데코레이터가 내는 경고만 숨김 (pandas/pyarrow 등의 경고는 그대로 표시)
+    warnings.filterwarnings('ignore', module='streamlit')
+    main()
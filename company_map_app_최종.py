@@ -1,85 +1,1439 @@
+import contextlib
+import contextvars
+import cProfile
+import hashlib
+import html
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 import folium
+from branca.element import Element
+from folium.elements import JSCSSMixin
+from folium.map import Layer
 from folium.plugins import MarkerCluster
+from jinja2 import Template
 import streamlit as st
-from streamlit_folium import folium_static
-
-# 페이지 설정
-st.set_page_config(
-    page_title="AJ네트웍스 로지스 수요처 맵",
-    layout="wide"
-)
+import streamlit.components.v1 as components
+from streamlit_folium import st_folium
 
 # 세션 상태 관리를 위한 변수 초기화
-if 'filtered_data' not in st.session_state:
-    st.session_state.filtered_data = None
-if 'search_clicked' not in st.session_state:
-    st.session_state.search_clicked = False
+def init_session_state():
+    if 'search_result' not in st.session_state:
+        st.session_state.search_result = None  # 검색 결과 행 위치 (데이터프레임은 저장하지 않음)
+    if 'search_clicked' not in st.session_state:
+        st.session_state.search_clicked = False
+    if 'filter_key' not in st.session_state:
+        st.session_state.filter_key = None
+    if 'proximity' not in st.session_state:
+        st.session_state.proximity = None  # 반경 검색 기준 (위도, 경도, 반경 km, 표시명)
+    if 'facet_selections' not in st.session_state:
+        st.session_state.facet_selections = {}  # 마지막으로 제출한 필터 선택 (선택지 기업 수 계산용)
+    if 'result_order' not in st.session_state:
+        st.session_state.result_order = None  # 결과 테이블 정렬 순서 (검색 조건/정렬 기준별)
 
 # 검색 버튼 클릭 시 호출될 함수
 def on_search_clicked():
     st.session_state.search_clicked = True
 
-# 제목
-st.title("AJ네트웍스 로지스 수요처 맵")
+# ===== 성능 측정 =====
+# 단계별 소요 시간 로그 (JSON 한 줄, 실행 1회당 1줄) - COMPANY_MAP_PERF_LOG=0이면 끔
+PERF_LOG_ENABLED = os.environ.get('COMPANY_MAP_PERF_LOG', '1') != '0'
+perf_logger = logging.getLogger('company_map.perf')
+if not perf_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    perf_logger.addHandler(_handler)
+    perf_logger.setLevel(logging.INFO)
+    perf_logger.propagate = False
 
-# 데이터 전처리
-def process_data(df):
-    # 위도/경도 컬럼 확인
-    if '위도' in df.columns and '경도' in df.columns:
-        # 컬럼 이름 통일
-        if 'latitude' not in df.columns:
-            df['latitude'] = df['위도']
-        if 'longitude' not in df.columns:
-            df['longitude'] = df['경도']
+# 프로파일 결과에 표시할 함수 수
+PROFILE_TOP_N = 40
+
+# 실행 1회의 단계별 측정 기록 (소요 시간, 입력/출력 행 수, HTML 크기 등)
+class PerfRecorder:
+    def __init__(self):
+        self.stages = []
+        self.started = time.perf_counter()
     
-    # 사업자등록번호 문자열로 변환 (소수점 문제 해결)
-    if '사업자등록번호' in df.columns:
-        df['사업자등록번호'] = df['사업자등록번호'].astype(str)
-        # 소수점 제거 및 숫자만 추출
-        df['사업자등록번호'] = df['사업자등록번호'].apply(lambda x: x.split('.')[0] if '.' in x else x)
-        
-    # 유효한 좌표만 필터링 (경고 메시지 제거)
-    df_with_coords = df[df['latitude'].notna() & df['longitude'].notna()].copy()
+    @contextlib.contextmanager
+    def stage(self, name, **info):
+        record = {'stage': name, **info}
+        start = time.perf_counter()
+        try:
+            yield record  # 단계 안에서 rows_out, html_bytes 등을 추가로 기록
+        finally:
+            record['ms'] = round((time.perf_counter() - start) * 1000, 2)
+            self.stages.append(record)
+    
+    def total_ms(self):
+        return round((time.perf_counter() - self.started) * 1000, 2)
+    
+    def log(self, event='rerun', **info):
+        if PERF_LOG_ENABLED:
+            perf_logger.info(json.dumps(
+                {'event': event, **info, 'total_ms': self.total_ms(), 'stages': self.stages},
+                ensure_ascii=False, default=str
+            ))
+
+# 현재 실행의 측정 기록 (세션별 스크립트 실행 스레드마다 따로 유지)
+current_perf = contextvars.ContextVar('current_perf', default=None)
+
+# 단계 측정 (측정 중이 아니면 아무것도 하지 않음 - 벤치마크/내보내기 등에서 그대로 사용 가능)
+@contextlib.contextmanager
+def perf_stage(name, **info):
+    recorder = current_perf.get()
+    if recorder is None:
+        yield {}
+        return
+    with recorder.stage(name, **info) as record:
+        yield record
+
+# 함수 1회 실행을 프로파일링해서 결과 텍스트를 세션에 저장 (pyinstrument가 있으면 사용, 없으면 cProfile)
+def profile_run(func):
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+    
+    if Profiler is not None:
+        profiler = Profiler()
+        profiler.start()
+        try:
+            func()
+        finally:
+            profiler.stop()
+            st.session_state.profile_report = profiler.output_text(unicode=True)
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            func()
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+            st.session_state.profile_report = out.getvalue()
+
+def request_profile_run():
+    st.session_state.profile_next_run = True
+
+# 사이드바 디버그 패널 (단계별 측정 결과 + 프로파일링)
+def show_perf_panel(recorder):
+    if not st.sidebar.checkbox("성능 정보 표시", key='show_perf_panel'):
+        return
+    with st.sidebar.expander("⏱ 성능 정보", expanded=True):
+        st.caption(f"이번 실행: {recorder.total_ms():,.0f} ms")
+        if recorder.stages:
+            st.dataframe(pd.DataFrame(recorder.stages).set_index('stage'), use_container_width=True)
+        # 버튼 콜백은 다음 실행 전에 호출되므로 버튼을 눌러 시작되는 실행이 프로파일링됨
+        st.button("다음 실행 프로파일링", on_click=request_profile_run)
+        if st.session_state.get('profile_report'):
+            st.code(st.session_state.profile_report, language=None)
+
+# 한국 지역 좌표 범위 (남, 서, 북, 동)
+KOREA_BOUNDS = (33.0, 124.0, 38.5, 132.0)
+
+# 컬럼 이름 통일 (원본 이름 → 앱에서 쓰는 이름, 이미 있는 컬럼은 덮어쓰지 않음)
+COLUMN_RENAMES = {'위도': 'latitude', '경도': 'longitude'}
+
+# 문자열 정리 단계 (이름 → Arrow 문자열 배열 변환, 행 단위 파이썬 함수 없이 일괄 처리)
+TEXT_CLEANING_STEPS = {
+    'strip': pc.utf8_trim_whitespace,
+    # 엑셀에서 숫자로 읽혀 붙은 소수점 제거 (1234567890.0 → 1234567890)
+    'drop_decimal': lambda values: pc.list_element(pc.split_pattern(values, pattern='.', max_splits=1), 0)
+}
+
+# 컬럼별 문자열 정리 규칙 (로드 시 한 번만 적용)
+TEXT_CLEANING_RULES = {
+    '사업자등록번호': ['strip', 'drop_decimal']
+}
+
+# 문자열 컬럼 여부 (파이썬 문자열 object 또는 Arrow 문자열)
+def is_text_column(series):
+    if isinstance(series.dtype, pd.ArrowDtype):
+        return pa.types.is_string(series.dtype.pyarrow_dtype) or pa.types.is_large_string(series.dtype.pyarrow_dtype)
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == 'string'
+
+# 컬럼 → Arrow 문자열 배열 (숫자 등이 섞여 있으면 문자열로 변환, 결측은 그대로)
+def to_arrow_text(series):
+    if not is_text_column(series):
+        series = series.where(series.isna(), series.astype(str))
+    return pa.array(series, type=pa.string(), from_pandas=True)
+
+# 데이터 전처리: 컬럼 이름 통일 → 문자열 정리 → 좌표 검증 (모두 컬럼 단위 일괄 처리)
+# 제외한 행 수는 attrs['dropped_rows']에 기록 (좌표 없음 / 한국 범위 밖)
+def process_data(df):
+    df = df.rename(columns={src: dst for src, dst in COLUMN_RENAMES.items() if dst not in df.columns}, copy=False)
     
-    # 한국 지역 내 좌표만 필터링 (위도 33~38.5, 경도 124~132) - 경고 메시지 제거
-    korea_coords = (df_with_coords['latitude'] >= 33) & (df_with_coords['latitude'] <= 38.5) & \
-                  (df_with_coords['longitude'] >= 124) & (df_with_coords['longitude'] <= 132)
+    # 문자열 정리
+    for col, steps in TEXT_CLEANING_RULES.items():
+        if col in df.columns:
+            values = to_arrow_text(df[col])
+            for step in steps:
+                values = TEXT_CLEANING_STEPS[step](values)
+            df[col] = pd.Series(pd.arrays.ArrowExtensionArray(values), index=df.index)
     
-    df_with_coords = df_with_coords[korea_coords].reset_index(drop=True)
+    # 좌표 검증: 숫자가 아닌 값은 결측으로 보고, 한국 지역(위도 33~38.5, 경도 124~132) 안의 좌표만 유지
+    lat = pd.to_numeric(df['latitude'], errors='coerce').to_numpy(dtype=np.float64)
+    lon = pd.to_numeric(df['longitude'], errors='coerce').to_numpy(dtype=np.float64)
+    has_coords = ~(np.isnan(lat) | np.isnan(lon))
+    in_korea = in_korea_bounds(lat, lon)
     
+    df['latitude'] = lat
+    df['longitude'] = lon
+    df_with_coords = df.take(np.flatnonzero(in_korea))
+    df_with_coords.index = pd.RangeIndex(len(df_with_coords))  # reset_index와 달리 데이터를 다시 복사하지 않음
+    df_with_coords.attrs['dropped_rows'] = {
+        'missing_coords': int(np.count_nonzero(~has_coords)),
+        'outside_korea': int(np.count_nonzero(has_coords & ~in_korea))
+    }
     return df_with_coords
 
-@st.cache_data(show_spinner=False)
-def load_company_data():
-    # 실제 데이터 파일 경로
-    file_path = "로지스_수요처데이터_240906_중복제거_수정.xlsx"  # 업데이트된 파일명
+# ===== 주소 → 좌표 보완 =====
+# 좌표가 없거나 한국 범위 밖인 기업은 전처리에서 제외되기 전에 주소로 좌표를 찾아서 채움
+# 지오코더 지정: COMPANY_MAP_GEOCODER="이름:인자" (예: address_table:주소좌표.csv), 지정하지 않으면 보완하지 않음
+GEOCODER_SPEC = os.environ.get('COMPANY_MAP_GEOCODER', '')
+
+# 좌표를 찾을 주소 컬럼 (앞쪽 컬럼 주소로 못 찾으면 다음 컬럼 주소 사용)
+GEOCODE_ADDRESS_COLUMNS = ['한글주소', '한글지번주소']
+
+# 지오코더에 한 번에 요청하는 주소 수 / 동시에 처리하는 요청 수
+GEOCODE_BATCH_SIZE = 100
+GEOCODE_CONCURRENCY = int(os.environ.get('COMPANY_MAP_GEOCODE_CONCURRENCY', '4'))
+
+# 주소 비교용 정규화 (연속 공백 통일)
+def normalize_address(address):
+    return ' '.join(str(address).split())
+
+# 한국 범위 안의 좌표 여부 (결측은 False)
+def in_korea_bounds(lat, lon):
+    south, west, north, east = KOREA_BOUNDS
+    return (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+
+# 오프라인 지오코더: 주소 → 좌표 대조표 파일 (CSV, 컬럼: 주소, 위도, 경도)
+# 지오코더는 signature(결과가 바뀌면 달라지는 문자열)와 geocode_batch(주소 목록 → (위도, 경도) 또는 None 목록)를 제공
+class AddressTableGeocoder:
+    def __init__(self, path):
+        stat = os.stat(path)
+        self.path = path
+        self.signature = f"address_table:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        self.coordinates = None
+        self.lock = threading.Lock()
+    
+    # 대조표는 처음 요청할 때 한 번만 읽음
+    def load(self):
+        with self.lock:
+            if self.coordinates is None:
+                table = pd.read_csv(self.path, dtype={'주소': str})
+                lat = pd.to_numeric(table['위도'], errors='coerce').to_numpy(dtype=np.float64)
+                lon = pd.to_numeric(table['경도'], errors='coerce').to_numpy(dtype=np.float64)
+                valid = np.flatnonzero(table['주소'].notna().to_numpy() & in_korea_bounds(lat, lon))
+                addresses = table['주소'].to_numpy(dtype=object)
+                self.coordinates = {normalize_address(addresses[i]): (float(lat[i]), float(lon[i])) for i in valid}
+        return self.coordinates
+    
+    def geocode_batch(self, addresses):
+        coordinates = self.load()
+        return [coordinates.get(address) for address in addresses]
+
+# 사용할 수 있는 지오코더 (이름 → 클래스, 생성자 인자는 지정 문자열의 ':' 뒤 부분)
+GEOCODERS = {'address_table': AddressTableGeocoder}
+
+# 지정 문자열 → 지오코더 (지정하지 않았으면 None)
+def make_geocoder(spec=None):
+    spec = GEOCODER_SPEC if spec is None else spec
+    if not spec:
+        return None
+    name, _, arg = spec.partition(':')
+    if name not in GEOCODERS:
+        raise ValueError(f"알 수 없는 지오코더: {name} (사용 가능: {', '.join(GEOCODERS)})")
+    return GEOCODERS[name](arg)
+
+# 주소 → 좌표 결과 캐시 (SQLite 파일, 지오코더별, 찾지 못한 주소도 저장해서 다시 요청하지 않음)
+class GeocodeCache:
+    # 한 번에 조회하는 주소 수 (SQL 매개변수 수 제한)
+    LOOKUP_CHUNK = 500
+    
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode (geocoder TEXT, address TEXT, latitude REAL, longitude REAL,"
+            " PRIMARY KEY (geocoder, address))"
+        )
+    
+    # 캐시에 있는 주소 → (위도, 경도) 또는 None
+    def get_many(self, geocoder, addresses):
+        found = {}
+        for start in range(0, len(addresses), self.LOOKUP_CHUNK):
+            chunk = addresses[start:start + self.LOOKUP_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT address, latitude, longitude FROM geocode WHERE geocoder = ? AND address IN ({', '.join(['?'] * len(chunk))})",
+                [geocoder, *chunk]
+            )
+            for address, lat, lon in rows:
+                found[address] = (lat, lon) if lat is not None else None
+        return found
+    
+    def put_many(self, geocoder, results):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)",
+                [(geocoder, address, *(coords or (None, None))) for address, coords in results.items()]
+            )
+    
+    def close(self):
+        self.conn.close()
+
+# 좌표가 없거나 한국 범위 밖인 행의 좌표를 주소로 보완 → (데이터프레임, 요약)
+# 캐시에 없는 주소만 GEOCODE_BATCH_SIZE개씩 나눠 최대 GEOCODE_CONCURRENCY개 동시에 요청하고, 배치마다 캐시에 저장
+# (실패한 배치는 캐시에 남기지 않으므로 다음 실행에서 다시 요청)
+def backfill_coordinates(df, geocoder, cache_path=None):
+    lat_col = 'latitude' if 'latitude' in df.columns else '위도'
+    lon_col = 'longitude' if 'longitude' in df.columns else '경도'
+    lat = pd.to_numeric(df[lat_col], errors='coerce').to_numpy(dtype=np.float64)
+    lon = pd.to_numeric(df[lon_col], errors='coerce').to_numpy(dtype=np.float64)
+    targets = np.flatnonzero(~in_korea_bounds(lat, lon))
+    summary = {'targets': len(targets), 'resolved': 0, 'requested': 0, 'failed_batches': 0}
+    address_columns = [col for col in GEOCODE_ADDRESS_COLUMNS if col in df.columns]
+    if geocoder is None or len(targets) == 0 or not address_columns:
+        return df, summary
+    
+    # 대상 행의 주소 (컬럼별, 없으면 None)
+    candidates = []
+    for col in address_columns:
+        values = df[col].take(targets).to_numpy(dtype=object, na_value=None)
+        candidates.append([normalize_address(v) if v is not None and str(v).strip() else None for v in values])
+    addresses = sorted({address for column in candidates for address in column if address})
     
+    cache = GeocodeCache(cache_path or os.path.join(CACHE_DIR, 'geocode_cache.sqlite'))
     try:
-        # 데이터 로드 (성공 메시지 제거)
-        df = pd.read_excel(file_path, dtype={'사업자등록번호': str})  # 사업자등록번호를 문자열로 로드
-        
-        # 데이터 처리
-        return process_data(df)
+        results = cache.get_many(geocoder.signature, addresses)
+        todo = [address for address in addresses if address not in results]
+        batches = [todo[i:i + GEOCODE_BATCH_SIZE] for i in range(0, len(todo), GEOCODE_BATCH_SIZE)]
+        summary['requested'] = len(todo)
+        with ThreadPoolExecutor(max_workers=max(1, GEOCODE_CONCURRENCY)) as executor:
+            futures = {executor.submit(geocoder.geocode_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    found = dict(zip(futures[future], future.result()))
+                except Exception:
+                    summary['failed_batches'] += 1
+                    continue
+                cache.put_many(geocoder.signature, found)
+                results.update(found)
+    finally:
+        cache.close()
+    
+    # 행마다 앞쪽 주소 컬럼부터 한국 범위 안의 좌표를 찾으면 사용
+    lat, lon = lat.copy(), lon.copy()
+    resolved = np.zeros(len(targets), dtype=bool)
+    for column in candidates:
+        for i, address in enumerate(column):
+            coords = results.get(address) if address and not resolved[i] else None
+            if coords is not None and in_korea_bounds(coords[0], coords[1]):
+                lat[targets[i]], lon[targets[i]] = coords
+                resolved[i] = True
+    summary['resolved'] = int(np.count_nonzero(resolved))
+    if summary['resolved']:
+        df = df.assign(**{lat_col: lat, lon_col: lon})
+    return df, summary
+
+# ===== 컬럼 타입 압축 =====
+# 범주형으로 저장할 분류 컬럼 (값 종류가 적음)
+CATEGORY_COLUMNS = ['시도', '시군구', '기업규모구분', '신용등급', '현금흐름등급', '업종명', '업태명', 
+                    '산업코드 대분류', '산업코드 세세분류']
+
+# 그 밖의 문자열 컬럼도 값 종류가 행 수의 이 비율 이하이면 범주형
+CATEGORY_MAX_UNIQUE_RATIO = 0.2
+
+# 좌표 컬럼 이름 통일 후 중복되는 원본 컬럼
+DUPLICATE_COLUMNS = ['위도', '경도']
+
+# 컬럼별 (타입, 메모리 바이트)
+def column_memory(df):
+    usage = df.memory_usage(deep=True, index=False)
+    return {col: [str(df[col].dtype), int(usage[col])] for col in df.columns}
+
+# 로드 시 컬럼 타입 정리
+# - 분류 컬럼/값 종류가 적은 문자열 → 범주형, 나머지 문자열 → Arrow 문자열
+# - 좌표 → float32 (약 1m 정밀도), 중복 좌표/이름 없는(엑셀 인덱스)/값이 전혀 없는 컬럼 제거
+def compact_frame(df):
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in DUPLICATE_COLUMNS or str(col).startswith('Unnamed:') or len(series) and series.isna().all():
+            continue
+        if col in ('latitude', 'longitude'):
+            series = series.astype(np.float32)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.cat.remove_unused_categories()
+        elif is_text_column(series):
+            if col in CATEGORY_COLUMNS or series.nunique() <= len(series) * CATEGORY_MAX_UNIQUE_RATIO:
+                series = series.astype(object).astype('category')
+            else:
+                series = series.astype(pd.ArrowDtype(pa.string()))
+        columns[col] = series
+    compacted = pd.DataFrame(columns)
+    compacted.attrs.update(df.attrs)
+    return compacted
+
+# 컬럼별 메모리 비교표 (압축 전 기록이 없으면 현재 값만 표시)
+def memory_report(df):
+    before = df.attrs.get('memory_before') or {}
+    rows = []
+    for col, (dtype, nbytes) in column_memory(df).items():
+        dtype_before, bytes_before = before.get(col, [None, None])
+        rows.append({'컬럼': col, '압축 전 타입': dtype_before, '압축 전 MB': bytes_before,
+                     '타입': dtype, 'MB': nbytes})
+    # 제거된 컬럼
+    for col, (dtype_before, bytes_before) in before.items():
+        if col not in df.columns:
+            rows.append({'컬럼': col, '압축 전 타입': dtype_before, '압축 전 MB': bytes_before,
+                         '타입': '(제거)', 'MB': 0})
+    report = pd.DataFrame(rows).set_index('컬럼')
+    report.loc['합계'] = [None, report['압축 전 MB'].sum(min_count=1), None, report['MB'].sum()]
+    for col in ['압축 전 MB', 'MB']:
+        report[col] = (report[col].astype(float) / 1e6).round(2)
+    return report
+
+# 원본 데이터 파일 경로
+DATA_FILE_PATH = "로지스_수요처데이터_240906_중복제거_수정.xlsx"  # 업데이트된 파일명
+
+# 전처리 결과를 저장하는 컬럼형(Feather) 캐시 디렉터리
+CACHE_DIR = ".cache"
+
+# 쓰다가 중단된 임시 파일 등을 정리할 때 이 시간(초)이 지나지 않은 파일은 남겨 둠 (다른 프로세스가 아직 쓰는 중일 수 있음)
+CACHE_GRACE_SECONDS = 10 * 60
+
+# 프로세스/호출마다 다른 임시 파일 경로 (여러 서버 프로세스가 같은 캐시 파일을 동시에 만들어도 서로의 임시 파일을 건드리지 않음)
+def temp_file_path(path):
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+# 파일이 마지막으로 바뀐 뒤 유예 시간이 지났는지 (그 사이 다른 프로세스가 삭제했으면 False)
+def older_than_grace(path, grace_seconds=CACHE_GRACE_SECONDS):
+    try:
+        return time.time() - os.path.getmtime(path) > grace_seconds
+    except OSError:
+        return False
+
+# 파일 내용 해시 계산 (1MB 단위로 읽기)
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# 원본 파일 지문 계산 (경로, 크기, 수정시각, 내용 해시)
+def source_fingerprint(file_path, manifest=None):
+    stat = os.stat(file_path)
+    fingerprint = {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+    # 경로/크기/수정시각이 매니페스트와 같으면 저장된 내용 해시 재사용 (파일을 다시 읽지 않음)
+    if manifest and all(manifest.get(k) == v for k, v in fingerprint.items()) and manifest.get('sha256'):
+        fingerprint['sha256'] = manifest['sha256']
+    else:
+        fingerprint['sha256'] = file_sha256(file_path)
+    return fingerprint
+
+# 캐시 매니페스트 경로 (원본 파일별 1개)
+def cache_manifest_path(file_path):
+    return os.path.join(CACHE_DIR, os.path.basename(file_path) + '.manifest.json')
+
+# 좌표 보완 결과를 구분하는 값 (지오코더를 쓰지 않으면 빈 문자열)
+def geocoder_signature():
+    geocoder = make_geocoder()
+    return geocoder.signature if geocoder is not None else ''
+
+# 데이터 버전 (원본 내용 해시 기준, 지오코더를 쓰면 지오코더도 포함) - 파생 인덱스/캐시의 키로 사용
+def dataset_version(fingerprint):
+    signature = geocoder_signature()
+    if not signature:
+        return fingerprint['sha256'][:16]
+    return hashlib.sha256(f"{fingerprint['sha256']}\0{signature}".encode('utf-8')).hexdigest()[:16]
+
+# 캐시 파일 경로 (원본 경로 + 내용 해시 기준, 지오코더를 쓰면 지오코더도 포함)
+def cache_file_path(file_path, fingerprint):
+    key_source = f"{fingerprint['path']}\0{fingerprint['sha256']}"
+    signature = geocoder_signature()
+    if signature:
+        key_source += f"\0{signature}"
+    key = hashlib.sha256(key_source.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{os.path.basename(file_path)}.{key}.feather")
+
+def read_cache_manifest(file_path):
+    try:
+        with open(cache_manifest_path(file_path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_cache_manifest(file_path, manifest):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    manifest_path = cache_manifest_path(file_path)
+    tmp_path = temp_file_path(manifest_path)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+# Arrow로 저장할 수 없는 혼합 타입 컬럼(숫자+문자 등)은 문자열로 통일
+def make_arrow_compatible(df):
+    for col in df.columns:
+        if df[col].dtype == 'object' and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+# 캐시 파일 메타데이터에 함께 저장하는 attrs 항목 (압축 전 컬럼별 메모리, 전처리에서 제외한 행 수, 주소로 좌표를 보완한 행 수)
+CACHE_ATTRS = ['memory_before', 'dropped_rows', 'geocoded_rows']
+CACHE_ATTRS_METADATA_KEY = b'company_map.attrs'
+
+# 전처리된 데이터를 압축 없는 Feather 파일로 저장 (메모리 매핑 가능하도록)
+def write_columnar_cache(df, cache_path):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = temp_file_path(cache_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    attrs = {key: df.attrs[key] for key in CACHE_ATTRS if key in df.attrs}
+    if attrs:
+        metadata = {**(table.schema.metadata or {}), CACHE_ATTRS_METADATA_KEY: json.dumps(attrs, ensure_ascii=False).encode('utf-8')}
+        table = table.replace_schema_metadata(metadata)
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, cache_path)  # 원자적 교체 (읽는 중인 프로세스 보호)
+
+# 캐시 파일을 메모리 매핑으로 읽기
+# 문자열 컬럼은 Arrow 문자열(pd.ArrowDtype)로 유지해서 메모리 맵 버퍼를 그대로 사용
+# → 같은 캐시 파일을 여는 여러 서버 프로세스가 OS 페이지 캐시를 공유 (프로세스마다 파이썬 문자열 객체를 만들지 않음)
+def arrow_string_dtype(arrow_type):
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+def read_columnar_cache(cache_path):
+    table = feather.read_table(cache_path, memory_map=True)
+    df = table.to_pandas(types_mapper=arrow_string_dtype, split_blocks=True)
+    attrs = (table.schema.metadata or {}).get(CACHE_ATTRS_METADATA_KEY)
+    if attrs:
+        df.attrs.update(json.loads(attrs))
+    return df
+
+# 같은 원본의 이전 버전 캐시 파일 + 쓰다가 중단된 임시 파일 삭제
+def remove_stale_caches(file_path, keep_path):
+    prefix = os.path.basename(file_path) + '.'
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if not name.startswith(prefix):
+            continue
+        if (name.endswith('.feather') and path != keep_path) or (name.endswith('.tmp') and older_than_grace(path)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# 원본 엑셀 읽기 + 전처리 + 컬럼 타입 압축 (압축 전 컬럼별 메모리는 attrs에 기록)
+def read_source_frame(file_path):
+    df = pd.read_excel(file_path, dtype={'사업자등록번호': str})  # 사업자등록번호를 문자열로 로드
+    df, geocoded = backfill_coordinates(df, make_geocoder())
+    df = make_arrow_compatible(process_data(df))
+    df.attrs['geocoded_rows'] = geocoded
+    memory_before = column_memory(df)
+    df = compact_frame(df)
+    df.attrs['memory_before'] = memory_before
+    if PERF_LOG_ENABLED:
+        perf_logger.info(json.dumps({
+            'event': 'read_source', 'rows': len(df), 'dropped_rows': df.attrs.get('dropped_rows'),
+            'geocoded_rows': geocoded,
+            'mb_before': round(sum(nbytes for _, nbytes in memory_before.values()) / 1e6, 2),
+            'mb_after': round(df.memory_usage(deep=True, index=False).sum() / 1e6, 2)
+        }, ensure_ascii=False))
+    return df
+
+# 전처리 결과를 컬럼형 캐시로 저장하고 매니페스트 갱신
+# 저장한 캐시를 메모리 맵으로 다시 열어서 반환 (실패하면 전달받은 데이터를 그대로 사용)
+def save_processed_frame(file_path, fingerprint, df):
+    cache_path = cache_file_path(file_path, fingerprint)
+    try:
+        write_columnar_cache(df, cache_path)
+        write_cache_manifest(file_path, fingerprint)
+        remove_stale_caches(file_path, cache_path)
+        return read_columnar_cache(cache_path)
+    except (OSError, pa.ArrowException):
+        return df
+
+# 원본 엑셀 → 전처리 결과 로드 (원본이 바뀌지 않았으면 컬럼형 캐시 사용)
+def load_processed_frame(file_path):
+    manifest = read_cache_manifest(file_path)
+    fingerprint = source_fingerprint(file_path, manifest)
+    cache_path = cache_file_path(file_path, fingerprint)
+    
+    df = None
+    if manifest and manifest.get('sha256') == fingerprint['sha256'] and os.path.exists(cache_path):
+        try:
+            df = read_columnar_cache(cache_path)
+            # 내용은 같고 수정시각만 바뀐 경우 매니페스트만 갱신
+            if manifest != fingerprint:
+                write_cache_manifest(file_path, fingerprint)
+        except (OSError, pa.ArrowException):
+            df = None  # 캐시가 손상된 경우 원본에서 다시 생성
+    
+    if df is None:
+        df = save_processed_frame(file_path, fingerprint, read_source_frame(file_path))
+    
+    df.attrs['dataset_version'] = dataset_version(fingerprint)
+    return df
+
+# 현재 데이터 버전 (데이터 + 인덱스), 로드 실패 시 None
+def load_company_data():
+    try:
+        # 데이터 로드 (성공 메시지 제거) - 컬럼형 캐시가 있으면 엑셀 파싱 생략
+        return get_dataset_store().current()
         
     except Exception as e:
         st.error(f"데이터 로드 중 오류 발생: {e}")
-        return pd.DataFrame()  # 빈 데이터프레임 반환
+        return None
+
+# ===== 통합검색 인덱스 =====
+# 통합검색 대상 컬럼 (산업코드 컬럼은 데이터에 있는 것을 모두 포함)
+SEARCH_FIELDS = ['한글업체명', '업종명', '업태명', '주요상품내역']
+
+# 검색 방식 (화면 표시명 → 내부 모드)
+SEARCH_MODES = {
+    '포함 검색': 'literal',       # 입력한 문자열 전체가 그대로 포함된 기업
+    '모든 단어 포함': 'all_words',  # 공백으로 나눈 단어가 모두 포함된 기업
+    '업체명 초성/유사': 'name'      # 한글업체명만, 초성("ㅅㅅㅈㅈ") 또는 오타가 있어도 비슷한 순으로
+}
+
+# n-gram 키: 문자 코드(21비트)를 이어 붙인 정수 (1글자 = c << 21, 2글자 = c1 << 21 | c2)
+NGRAM_CODE_BITS = 21
+
+# 한 번에 처리할 문자 셀 수 (문자열 길이 × 행 수) 상한
+NGRAM_CHUNK_CELLS = 4_000_000
+
+# 검색어/데이터 공통 정규화 (대소문자 무시)
+def normalize_search_text(text):
+    return ' '.join(str(text).lower().split())
+
+# 문자열 목록 → (문자열 번호, 문자 코드 행렬) 묶음 (빈칸은 0)
+# 길이가 비슷한 문자열끼리 묶어 패딩 낭비를 줄이고, 행렬 하나는 NGRAM_CHUNK_CELLS 셀 이하
+def iter_code_chunks(values):
+    lengths = np.fromiter((len(v) for v in values), dtype=np.int64, count=len(values))
+    order = np.argsort(lengths, kind='stable')
+    sorted_lengths = lengths[order]
+    
+    start = 0
+    while start < len(values):
+        end = min(len(values), start + max(1, NGRAM_CHUNK_CELLS // max(1, sorted_lengths[start])))
+        width = max(1, sorted_lengths[end - 1])
+        end = min(end, start + max(1, NGRAM_CHUNK_CELLS // width))
+        
+        ids = order[start:end]
+        chars = np.array([values[i] for i in ids], dtype=f'<U{width}')
+        yield ids, chars.view(np.uint32).reshape(len(ids), width).astype(np.int64)
+        start = end
+
+# 문자 코드 행렬 → 1글자/2글자 n-gram 키와 문자열 번호
+def ngram_keys_from_codes(ids, codes):
+    row_ids = np.broadcast_to(ids[:, None], codes.shape)
+    # 1글자
+    mask = codes != 0
+    keys, key_ids = [codes[mask] << NGRAM_CODE_BITS], [row_ids[mask]]
+    # 2글자
+    if codes.shape[1] > 1:
+        mask = (codes[:, :-1] != 0) & (codes[:, 1:] != 0)
+        keys.append((codes[:, :-1][mask] << NGRAM_CODE_BITS) | codes[:, 1:][mask])
+        key_ids.append(row_ids[:, :-1][mask])
+    return np.concatenate(keys), np.concatenate(key_ids)
+
+# 문자열 목록의 1글자/2글자 n-gram 키와 문자열 번호를 벡터 연산으로 추출
+def extract_ngram_keys(values):
+    chunks = [ngram_keys_from_codes(ids, codes) for ids, codes in iter_code_chunks(values)]
+    if not chunks:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate([keys for keys, _ in chunks]), np.concatenate([ids for _, ids in chunks])
+
+# 검색어의 n-gram 키 (2글자 이상은 2글자 키만 사용)
+def query_ngram_keys(text):
+    codes = [ord(c) for c in text]
+    if len(codes) == 1:
+        return [codes[0] << NGRAM_CODE_BITS]
+    return list({(a << NGRAM_CODE_BITS) | b for a, b in zip(codes, codes[1:])})
+
+# CSR 역색인에서 키 하나의 값 번호 목록
+def lookup_posting(keys, offsets, items, key):
+    i = np.searchsorted(keys, key)
+    if i == len(keys) or keys[i] != key:
+        return np.empty(0, dtype=np.int32)
+    return items[offsets[i]:offsets[i + 1]]
+
+# 정렬된 키 → 값 번호 목록 역색인 (CSR 형태)
+def build_postings(keys, ids):
+    id_bits = int(ids.max()).bit_length() if len(ids) else 0
+    if len(keys) and int(keys.max()).bit_length() + id_bits <= 63:
+        # 키와 값 번호를 정수 하나로 합쳐서 한 번에 정렬 + 중복 제거 (lexsort보다 훨씬 빠름)
+        combined = np.unique((keys << id_bits) | ids)
+        keys, ids = combined >> id_bits, combined & ((1 << id_bits) - 1)
+    else:
+        order = np.lexsort((ids, keys))
+        keys, ids = keys[order], ids[order]
+        # 같은 문자열 안에서 반복된 n-gram 제거
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+        keys, ids = keys[keep], ids[keep]
+    # 키가 정렬되어 있으므로 키가 바뀌는 위치가 구간 시작
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else np.empty(0, dtype=np.int64)
+    offsets = np.append(starts, len(keys))
+    return keys[starts], offsets, ids.astype(np.int32)
+
+# 코드 배열 → 값별 행 위치 목록 (CSR 형태)
+def build_value_rows(codes, n_values):
+    order = np.argsort(codes, kind='stable').astype(np.int32)
+    counts = np.bincount(codes[codes >= 0], minlength=n_values)
+    offsets = np.concatenate([[0], np.cumsum(counts)]) + np.count_nonzero(codes < 0)  # 결측(-1)은 맨 앞
+    return order, offsets
+
+# 여러 구간 [시작, 끝)의 항목을 한 번에 이어 붙여 꺼내기
+def gather_ranges(items, starts, ends):
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=items.dtype)
+    # 구간별 시작 위치를 반복한 뒤 구간 내 순번을 더함
+    shifts = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return items[shifts + np.arange(total)]
+
+# CSR 배열에서 여러 구간(값 번호 목록)을 한 번에 이어 붙여 꺼내기
+def gather_csr(items, offsets, selected):
+    return gather_ranges(items, offsets[selected], offsets[selected + 1])
+
+# 컬럼 하나에 대한 n-gram 역색인
+# 같은 값(업종명 등)은 한 번만 색인하고, 값 → 행 위치 목록으로 연결
+# previous: 이전 데이터 버전의 같은 컬럼 인덱스 (있으면 새로 생긴 값만 n-gram 추출)
+class FieldNgramIndex:
+    def __init__(self, series, previous=None):
+        codes, uniques = pd.factorize(series)
+        if previous is None:
+            self.raw_values = uniques
+            self.values = [normalize_search_text(v) for v in uniques]
+            self.row_order, self.row_offsets = build_value_rows(codes, len(self.values))
+            self.keys, self.offsets, self.value_ids = build_postings(*extract_ngram_keys(self.values))
+            return
+        
+        # 값 번호: 이전 버전에도 있던 값(이전 순서 유지) → 새로 생긴 값
+        old_ids = pd.Index(previous.raw_values).get_indexer(uniques)
+        kept = np.sort(old_ids[old_ids >= 0])
+        old_to_new = np.full(len(previous.values), -1, dtype=np.int64)
+        old_to_new[kept] = np.arange(len(kept))
+        added = np.flatnonzero(old_ids < 0)
+        unique_to_value = np.where(old_ids >= 0, old_to_new[np.maximum(old_ids, 0)], -1)
+        unique_to_value[added] = len(kept) + np.arange(len(added))
+        
+        self.raw_values = pd.Index(np.concatenate([np.asarray(previous.raw_values, dtype=object)[kept],
+                                                   np.asarray(uniques, dtype=object)[added]]))
+        new_values = [normalize_search_text(uniques[i]) for i in added]
+        self.values = [previous.values[i] for i in kept] + new_values
+        value_codes = np.where(codes >= 0, unique_to_value[np.maximum(codes, 0)], -1)
+        self.row_order, self.row_offsets = build_value_rows(value_codes, len(self.values))
+        
+        # 기존 역색인에서 사라진 값만 빼고 (번호 순서가 유지되므로 정렬 상태 그대로),
+        # 새 값의 n-gram을 같은 키의 뒤쪽에 끼워 넣음 (새 값 번호가 항상 더 큼)
+        old_keys = np.repeat(previous.keys, np.diff(previous.offsets))
+        old_value_ids = old_to_new[previous.value_ids]
+        keep = old_value_ids >= 0
+        old_keys, old_value_ids = old_keys[keep], old_value_ids[keep]
+        add_keys, add_offsets, add_ids = build_postings(*extract_ngram_keys(new_values))
+        add_keys = np.repeat(add_keys, np.diff(add_offsets))
+        insert_at = np.searchsorted(old_keys, add_keys, side='right')
+        all_keys = np.insert(old_keys, insert_at, add_keys)
+        self.value_ids = np.insert(old_value_ids, insert_at, add_ids + len(kept)).astype(np.int32)
+        starts = np.flatnonzero(np.concatenate([[True], all_keys[1:] != all_keys[:-1]])) if len(all_keys) else np.empty(0, dtype=np.int64)
+        self.keys = all_keys[starts]
+        self.offsets = np.append(starts, len(all_keys))
+    
+    def _posting(self, key):
+        return lookup_posting(self.keys, self.offsets, self.value_ids, key)
+    
+    # 검색어(정규화된 문자열)가 포함된 값 번호
+    def match_values(self, text):
+        postings = sorted((self._posting(k) for k in query_ngram_keys(text)), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        # n-gram이 모두 있어도 연속 문자열이 아닐 수 있으므로 실제 포함 여부 확인
+        if len(text) > 2:
+            candidates = [v for v in candidates if text in self.values[v]]
+        return candidates
+    
+    # 검색어가 포함된 행 위치
+    def match_rows(self, text):
+        return gather_csr(self.row_order, self.row_offsets, np.asarray(self.match_values(text), dtype=np.int64))
+
+# 통합검색 인덱스 (대상 컬럼별 n-gram 역색인)
+# previous: 이전 데이터 버전의 인덱스 (데이터 갱신 시 변경분만 반영)
+class SearchIndex:
+    def __init__(self, df, previous=None):
+        fields = SEARCH_FIELDS + [col for col in df.columns if str(col).startswith('산업코드')]
+        self.fields = {
+            field: FieldNgramIndex(df[field], previous.fields.get(field) if previous else None)
+            for field in fields if field in df.columns
+        }
+    
+    # 검색어 하나(정규화된 문자열)에 해당하는 행 위치 (지정한 컬럼 중 하나라도 포함)
+    def _match(self, text, fields):
+        hits = [self.fields[field].match_rows(text) for field in fields]
+        return np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int32)
+    
+    # 검색 실행 → 정렬된 행 위치 배열
+    def search(self, query, mode='literal', fields=None):
+        fields = [field for field in (fields or self.fields) if field in self.fields]
+        query = normalize_search_text(query)
+        if not query:
+            return np.empty(0, dtype=np.int32)
+        
+        if mode == 'all_words':
+            result = None
+            for word in query.split(' '):
+                hits = self._match(word, fields)
+                result = hits if result is None else np.intersect1d(result, hits, assume_unique=True)
+                if len(result) == 0:
+                    break
+            return result
+        return self._match(query, fields)
+
+# ===== 업체명 초성/유사 검색 =====
+# 한글 음절 → 초성/중성/종성 (호환용 자모 코드, 음절 코드 = 시작 + (초성 × 21 + 중성) × 28 + 종성)
+HANGUL_SYLLABLE_START, HANGUL_SYLLABLE_END = 0xAC00, 0xD7A3
+CHOSUNG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+JUNGSUNG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+JONGSUNG = 'ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ'
+CHOSUNG_CODES = np.array([ord(c) for c in CHOSUNG], dtype=np.int64)
+JUNGSUNG_CODES = np.array([ord(c) for c in JUNGSUNG], dtype=np.int64)
+JONGSUNG_CODES = np.array([0] + [ord(c) for c in JONGSUNG], dtype=np.int64)  # 0: 받침 없음
+
+# 업체명 비교 시 무시하는 부분 (법인 형태 표기, 공백)
+NAME_IGNORED_PATTERN = r'\(주\)|\(유\)|\(사\)|\(재\)|㈜|주식회사|유한회사|\s+'
+
+# 유사 검색 최소 점수 (검색어 자모 2-gram 중 업체명에 있는 비율)
+NAME_FUZZY_MIN_SCORE = 0.6
+
+# n-gram 키의 두 번째 글자 부분 (0이면 1글자 키)
+NGRAM_LOW_MASK = (1 << NGRAM_CODE_BITS) - 1
+
+# 업체명 목록 → 비교용 문자열 목록 (소문자, 법인 표기/공백 제거, Arrow 연산으로 일괄 처리)
+def name_search_keys(names):
+    values = pc.utf8_lower(to_arrow_text(pd.Series(names, dtype=object)))
+    values = pc.fill_null(pc.replace_substring_regex(values, pattern=NAME_IGNORED_PATTERN, replacement=''), '')
+    return values.to_numpy(zero_copy_only=False).tolist()
+
+# 문자 코드 행렬 → 초성/중성/종성 코드 행렬 (한글 음절이 아닌 문자는 초성 자리에 그대로, 나머지는 0)
+def split_jamo_codes(codes):
+    hangul = (codes >= HANGUL_SYLLABLE_START) & (codes <= HANGUL_SYLLABLE_END)
+    offset = np.where(hangul, codes - HANGUL_SYLLABLE_START, 0)
+    chosung = np.where(hangul, CHOSUNG_CODES[offset // 588], codes)
+    jungsung = np.where(hangul, JUNGSUNG_CODES[offset % 588 // 28], 0)
+    jongsung = np.where(hangul, JONGSUNG_CODES[offset % 28], 0)
+    return chosung, jungsung, jongsung
+
+# 초성/중성/종성 코드 행렬 → 자모 단위 2-gram 키와 문자열 번호 (받침 없는 빈자리는 건너뛰고 이어 붙임)
+def jamo_bigram_keys(ids, chosung, jungsung, jongsung):
+    jamo = np.stack([chosung, jungsung, jongsung], axis=2).reshape(len(ids), -1)
+    mask = jamo != 0
+    flat, row_ids = jamo[mask], np.broadcast_to(ids[:, None], jamo.shape)[mask]
+    same = row_ids[1:] == row_ids[:-1]
+    return (flat[:-1][same] << NGRAM_CODE_BITS) | flat[1:][same], row_ids[:-1][same]
+
+# 검색어(비교용 문자열) → (초성 문자열, 자모 2-gram 키)
+def name_query_keys(query):
+    chosung, jungsung, jongsung = split_jamo_codes(np.array([ord(c) for c in query], dtype=np.int64)[None, :])
+    keys, _ = jamo_bigram_keys(np.zeros(1, dtype=np.int64), chosung, jungsung, jongsung)
+    return ''.join(map(chr, chosung[0])), np.unique(keys)
+
+# 초성(자음)만 입력한 부분이 있는 검색어인지 (예: "ㅅㅅㅈㅈ", "삼ㅅ")
+def is_chosung_query(text):
+    return any(c in CHOSUNG for c in text)
+
+# 완성된 글자와 초성이 섞인 검색어 → 업체명(비교용 문자열)에서 찾을 정규식
+# 초성 자리는 그 초성으로 시작하는 음절(또는 초성 자체), 나머지 자리는 입력한 글자와 정확히 일치
+def chosung_query_pattern(query):
+    parts = []
+    for c in query:
+        if c in CHOSUNG:
+            first = HANGUL_SYLLABLE_START + CHOSUNG.index(c) * 588
+            parts.append(f'[{c}{chr(first)}-{chr(first + 587)}]')
+        else:
+            parts.append(re.escape(c))
+    return re.compile(''.join(parts))
+
+# 한글업체명 초성/유사 검색 인덱스 (로드 시 1회 생성, 같은 업체명은 한 번만 색인)
+# - 초성 검색: 업체명 초성 문자열의 1/2글자 n-gram 역색인으로 부분 문자열 검색 (앞부분 일치 → 짧은 이름 순)
+# - 유사 검색: 자모 단위 2-gram 역색인으로 검색어 2-gram이 많이 겹치는 업체명 순 (오타 1~2자 허용)
+class CompanyNameIndex:
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series)
+        self.raw_names = uniques
+        self.names = name_search_keys(uniques)
+        self.row_order, self.row_offsets = build_value_rows(codes, len(self.names))
+        self.name_lengths = np.fromiter((len(name) for name in self.names), dtype=np.int64, count=len(self.names))
+        
+        self.chosung = np.empty(len(self.names), dtype=object)
+        chosung_chunks, jamo_chunks = [], []
+        for ids, chars in iter_code_chunks(self.names):
+            chosung, jungsung, jongsung = split_jamo_codes(chars)
+            self.chosung[ids] = chosung.astype(np.uint32).view(f'<U{chars.shape[1]}').ravel()
+            chosung_chunks.append(ngram_keys_from_codes(ids, chosung))
+            jamo_chunks.append(jamo_bigram_keys(ids, chosung, jungsung, jongsung))
+        self.chosung_keys, self.chosung_offsets, self.chosung_ids = build_postings(*self._concat(chosung_chunks))
+        self.jamo_keys, self.jamo_offsets, self.jamo_ids = build_postings(*self._concat(jamo_chunks))
+        self.jamo_counts = np.bincount(self.jamo_ids, minlength=len(self.names))  # 업체명별 자모 2-gram 수
+    
+    @staticmethod
+    def _concat(chunks):
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate([keys for keys, _ in chunks]), np.concatenate([ids for _, ids in chunks])
+    
+    # 초성 검색 → 업체명 번호 (초성이 앞부분에서 일치할수록, 이름이 짧을수록 앞)
+    # pattern: 완성된 글자가 섞인 검색어의 정규식 (초성으로 후보를 좁힌 뒤 그 자리의 글자까지 확인)
+    def match_chosung(self, key, pattern=None):
+        postings = sorted((lookup_posting(self.chosung_keys, self.chosung_offsets, self.chosung_ids, k)
+                           for k in query_ngram_keys(key)), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        # n-gram이 모두 있어도 연속 문자열이 아닐 수 있으므로 실제 위치 확인
+        if pattern is None:
+            found_at = np.fromiter((self.chosung[i].find(key) for i in candidates), dtype=np.int64, count=len(candidates))
+        else:
+            matches = [pattern.search(self.names[i]) for i in candidates]
+            found_at = np.array([m.start() if m else -1 for m in matches], dtype=np.int64)
+        candidates, found_at = candidates[found_at >= 0], found_at[found_at >= 0]
+        return candidates[np.lexsort((self.name_lengths[candidates], found_at))]
+    
+    # 유사 검색 → 업체명 번호 (검색어 자모 2-gram이 많이 겹칠수록, 길이가 비슷할수록 앞)
+    def match_fuzzy(self, keys):
+        found = np.searchsorted(self.jamo_keys, keys)
+        found = found[(found < len(self.jamo_keys)) & (self.jamo_keys[np.minimum(found, len(self.jamo_keys) - 1)] == keys)]
+        name_ids, shared = np.unique(gather_csr(self.jamo_ids, self.jamo_offsets, found), return_counts=True)
+        coverage = shared / len(keys)
+        keep = coverage >= NAME_FUZZY_MIN_SCORE
+        name_ids, shared, coverage = name_ids[keep], shared[keep], coverage[keep]
+        dice = 2 * shared / (len(keys) + self.jamo_counts[name_ids])
+        return name_ids[np.lexsort((-dice, -coverage))]
+    
+    # 검색어 → 업체명 번호 (순위 순)
+    # 초성이 섞인 검색어와 자모 2-gram을 만들 수 없는 한 글자 검색어(영문/숫자 등)는 초성 문자열에서 부분 문자열 검색
+    # (초성과 완성된 글자가 섞인 검색어 "삼ㅅ" 등은 완성된 글자가 같은 자리에 있는 업체명만)
+    def search_names(self, query):
+        query = name_search_keys([query])[0]
+        if not query or len(self.names) == 0:
+            return np.empty(0, dtype=np.int64)
+        chosung, jamo_keys = name_query_keys(query)
+        if is_chosung_query(query) or len(jamo_keys) == 0:
+            return self.match_chosung(chosung, chosung_query_pattern(query) if chosung != query else None)
+        return self.match_fuzzy(jamo_keys)
+    
+    # 검색어 → 행 위치 (업체명 순위 순서, 같은 업체명의 행은 원래 순서)
+    def search(self, query):
+        return gather_csr(self.row_order, self.row_offsets, self.search_names(query).astype(np.int64))
+    
+    # 검색어와 비슷한 업체명 후보 (입력 도우미 표시용)
+    def suggest(self, query, limit=10):
+        return [self.raw_names[i] for i in self.search_names(query)[:limit]]
+
+# ===== 필터 인덱스 =====
+# 상단 필터에 사용하는 컬럼
+FILTER_COLUMNS = ['시도', '시군구', '기업규모구분', '신용등급']
+
+# 필터 컬럼별 범주 코드 + 값별 행 위치 목록
+# 필터 조합은 가장 작은 행 목록에서 시작해 나머지 컬럼의 코드를 비교하는 방식으로 교집합 계산
+class FacetIndex:
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.codes = {}
+        self.value_codes = {}
+        self.row_order = {}
+        self.row_offsets = {}
+        for col in FILTER_COLUMNS:
+            if col not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[col])
+            self.codes[col] = codes.astype(np.int32)
+            self.value_codes[col] = {value: i for i, value in enumerate(uniques)}
+            self.row_order[col], self.row_offsets[col] = build_value_rows(codes, len(uniques))
+    
+    # 컬럼 값 하나에 해당하는 행 위치 (정렬된 배열)
+    def rows(self, column, value):
+        code = self.value_codes[column].get(value)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        return self.row_order[column][self.row_offsets[column][code]:self.row_offsets[column][code + 1]]
+    
+    # 선택 조건(컬럼 → 값, '전체'/빈 값은 조건 없음)을 모두 만족하는 행 위치 (정렬된 배열)
+    def filter(self, selections):
+        conditions = [(col, value) for col, value in selections.items()
+                      if value not in (None, '', '전체') and col in self.codes]
+        if not conditions:
+            return np.arange(self.n_rows, dtype=np.int32)
+        
+        # 가장 적은 행을 가진 조건부터 시작
+        postings = sorted(((self.rows(col, value), col, value) for col, value in conditions), key=lambda p: len(p[0]))
+        result = postings[0][0]
+        for _, col, value in postings[1:]:
+            if len(result) == 0:
+                break
+            result = result[self.codes[col][result] == self.value_codes[col][value]]
+        return result
+
+# 공간 인덱스 격자 한 칸 크기 (도, 약 5km)
+SPATIAL_CELL_DEGREES = 0.05
+
+# 위도/경도 격자 공간 인덱스 (CSR 구조: 격자 칸 번호 → 행 위치 목록)
+# 격자 칸은 위도 줄 단위로 번호가 이어지므로, 사각형 영역은 위도 줄마다 연속된 한 구간으로 꺼낼 수 있음
+class SpatialGridIndex:
+    def __init__(self, lat, lon, bounds=KOREA_BOUNDS, cell_degrees=SPATIAL_CELL_DEGREES):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.south, self.west = bounds[0], bounds[1]
+        self.cell_degrees = cell_degrees
+        self.n_rows = int(np.ceil((bounds[2] - bounds[0]) / cell_degrees))
+        self.n_cols = int(np.ceil((bounds[3] - bounds[1]) / cell_degrees))
+        
+        cells = self.cell_row(self.lat) * self.n_cols + self.cell_col(self.lon)
+        self.order = np.argsort(cells, kind='stable')
+        self.offsets = np.zeros(self.n_rows * self.n_cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.n_rows * self.n_cols), out=self.offsets[1:])
+    
+    def cell_row(self, lat):
+        return np.clip(((np.asarray(lat) - self.south) / self.cell_degrees).astype(np.int64), 0, self.n_rows - 1)
+    
+    def cell_col(self, lon):
+        return np.clip(((np.asarray(lon) - self.west) / self.cell_degrees).astype(np.int64), 0, self.n_cols - 1)
+    
+    # 사각형 영역(남, 서, 북, 동) 안의 행 위치 (정렬됨)
+    def query_bbox(self, bounds):
+        south, west, north, east = bounds
+        if south > north or west > east:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(self.cell_row(south), self.cell_row(north) + 1)
+        starts = self.offsets[rows * self.n_cols + self.cell_col(west)]
+        ends = self.offsets[rows * self.n_cols + self.cell_col(east) + 1]
+        candidates = gather_ranges(self.order, starts, ends)
+        # 경계 칸은 일부만 겹치므로 실제 좌표로 한 번 더 확인
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return np.sort(candidates[inside])
+    
+    # 기준 지점에서 반경(km) 안의 행 위치와 거리 (가까운 순)
+    # 반경을 감싸는 사각형으로 후보를 줄인 뒤 후보만 실제 거리 계산
+    def query_radius(self, lat, lon, radius_km):
+        candidates = self.query_bbox(radius_bbox(lat, lon, radius_km))
+        distances = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+# 지구 평균 반지름 (km)
+EARTH_RADIUS_KM = 6371.0088
+
+# 기준 지점 → 여러 지점까지의 대원 거리 (km, 위도/경도 배열 전체를 한 번에 계산)
+def haversine_km(lat, lon, lats, lons):
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+# 기준 지점에서 반경(km)을 감싸는 사각형 (남, 서, 북, 동)
+def radius_bbox(lat, lon, radius_km):
+    dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon = np.degrees(radius_km / (EARTH_RADIUS_KM * max(np.cos(np.radians(lat)), 1e-6)))
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+# 반경 검색 기본/최대 반경 (km)
+RADIUS_DEFAULT_KM = 5.0
+RADIUS_MAX_KM = 50.0
+
+# 기준 위치 입력 → (위도, 경도, 표시명)
+# "위도, 경도" 형식이면 좌표 그대로, 아니면 기업명으로 찾아서 (업체명이 정확히 같은 기업 우선) 해당 기업 좌표 사용
+def resolve_center(df, search_index, text):
+    text = (text or '').strip()
+    numbers = re.fullmatch(r'\s*(-?\d+(?:\.\d+)?)\s*[, ]\s*(-?\d+(?:\.\d+)?)\s*', text)
+    if numbers:
+        lat, lon = float(numbers.group(1)), float(numbers.group(2))
+        return lat, lon, f"{lat:.5f}, {lon:.5f}"
+    if not text or '한글업체명' not in search_index.fields:
+        return None
+    hits = search_index.search(text, fields=['한글업체명'])
+    if len(hits) == 0:
+        return None
+    names = df['한글업체명'].take(hits).to_numpy(dtype=object, na_value=None)
+    exact = np.flatnonzero(names == text)
+    row = hits[exact[0]] if len(exact) else hits[0]
+    return round(float(df['latitude'].iat[row]), 6), round(float(df['longitude'].iat[row]), 6), df['한글업체명'].iat[row]
+
+# ===== 담당 거점 배정 =====
+# 거점 목록 파일 (CSV, 컬럼: 거점명, 위도, 경도) - 파일이 없으면 담당 거점 기능을 표시하지 않음
+DEPOT_FILE_PATH = os.environ.get('COMPANY_MAP_DEPOTS', '로지스_거점.csv')
+
+# 한 번에 거리를 비교할 기업 수 (기업 수 × 거점 수 행렬 크기 제한)
+DEPOT_CHUNK_ROWS = 200_000
+
+# 거점별 색상 (거점 목록 순서대로 고정, 거점이 더 많으면 반복) - 마커 색상 이름이면서 CSS 색상 이름
+DEPOT_COLORS = ['blue', 'red', 'green', 'purple', 'orange', 'darkblue', 'darkred', 'darkgreen',
+                'cadetblue', 'pink', 'lightblue', 'lightgreen', 'beige', 'black']
+
+# 위도/경도 → 단위 구 위의 3차원 좌표 (내적이 클수록 대원 거리가 가까움)
+def unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+# 거점 목록 파일 크기/수정시각 (파일을 고치면 달라짐, 파일이 없으면 None)
+def depot_file_signature(path=None):
+    path = path or DEPOT_FILE_PATH
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+# 거점 목록 파일 → (거점명, latitude, longitude) 데이터프레임
+# 거점명이 없거나 좌표가 한국 범위 밖인 행은 제외, 같은 거점명은 첫 행만 사용
+def read_depots(path):
+    table = pd.read_csv(path, dtype={'거점명': str})
+    missing = [col for col in ['거점명', '위도', '경도'] if col not in table.columns]
+    if missing:
+        raise ValueError(f"거점 파일에 {', '.join(missing)} 컬럼이 없습니다.")
+    lat = pd.to_numeric(table['위도'], errors='coerce').to_numpy(dtype=np.float64)
+    lon = pd.to_numeric(table['경도'], errors='coerce').to_numpy(dtype=np.float64)
+    names = table['거점명'].str.strip()
+    valid = (names.fillna('') != '').to_numpy() & in_korea_bounds(lat, lon)
+    depots = pd.DataFrame({'거점명': names, 'latitude': lat, 'longitude': lon})[valid]
+    return depots.drop_duplicates('거점명').reset_index(drop=True)
+
+# 전체 기업 → 가장 가까운 거점 (대원 거리 기준)
+# 거점 수는 많아야 수백 개이므로 트리 없이 기업 청크 × 거점의 내적 행렬(BLAS 행렬 곱)에서 최댓값을 골라 한 번에 계산
+class DepotAssignment:
+    def __init__(self, df, depots, signature=None):
+        self.depots = depots
+        self.signature = signature
+        self.names = depots['거점명'].tolist()
+        self.codes = np.full(len(df), -1, dtype=np.int32)  # 행 → 거점 번호 (거점이 없으면 -1)
+        self.distances = np.full(len(df), np.nan, dtype=np.float32)  # 행 → 담당 거점까지 거리 (km)
+        if len(depots) == 0:
+            return
+        
+        depot_lat = depots['latitude'].to_numpy()
+        depot_lon = depots['longitude'].to_numpy()
+        depot_vectors = unit_vectors(depot_lat, depot_lon).T
+        lat = df['latitude'].to_numpy(dtype=np.float64)
+        lon = df['longitude'].to_numpy(dtype=np.float64)
+        for start in range(0, len(df), DEPOT_CHUNK_ROWS):
+            chunk = slice(start, start + DEPOT_CHUNK_ROWS)
+            nearest = (unit_vectors(lat[chunk], lon[chunk]) @ depot_vectors).argmax(axis=1)
+            self.codes[chunk] = nearest
+            self.distances[chunk] = haversine_km(depot_lat[nearest], depot_lon[nearest], lat[chunk], lon[chunk])
+    
+    # 거점명 → 색상 (검색 결과와 관계없이 같은 거점은 항상 같은 색)
+    def colors(self):
+        return {name: DEPOT_COLORS[i % len(DEPOT_COLORS)] for i, name in enumerate(self.names)}
+    
+    # 행 위치 → 담당 거점명 (범주형, 범주 순서 = 거점 목록 순서)
+    def labels(self, positions):
+        return pd.Categorical.from_codes(self.codes[positions], categories=self.names)
+    
+    # 행 위치 → 거점별 기업 수, 평균/최대 거리, column 값별 기업 수 (값은 필터 선택지 순서, 기업이 없는 값은 제외)
+    def summary(self, positions, catalog, column):
+        codes = self.codes[positions]
+        distances = self.distances[positions]
+        n_depots = len(self.names)
+        counts = np.bincount(codes, minlength=n_depots)
+        max_distances = np.zeros(n_depots)
+        np.maximum.at(max_distances, codes, distances)
+        table = pd.DataFrame({
+            '기업 수': counts,
+            '평균 거리(km)': np.round(np.bincount(codes, weights=distances, minlength=n_depots) / np.maximum(counts, 1), 1),
+            '최대 거리(km)': np.round(max_distances, 1)
+        }, index=pd.Index(self.names, name='거점'))
+        if column is None:
+            return table
+        
+        value_codes = catalog.facet_index.codes[column][positions]
+        n_values = len(catalog.values[column])
+        known = value_codes >= 0
+        matrix = np.bincount(codes[known].astype(np.int64) * n_values + value_codes[known],
+                             minlength=n_depots * n_values).reshape(n_depots, n_values)
+        breakdown = pd.DataFrame(matrix, index=table.index, columns=catalog.values[column])[catalog.options[column]]
+        return pd.concat([table, breakdown.loc[:, breakdown.sum() > 0]], axis=1)
+
+# 데이터 버전 + 거점 파일별 배정 결과 (세션 간 공유, 거점 파일을 고치면 서명이 바뀌어 다시 계산)
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_depot_assignment(dataset_version, depot_signature, _df):
+    return DepotAssignment(_df, read_depots(DEPOT_FILE_PATH), depot_signature)
+
+# 현재 데이터 버전의 담당 거점 배정 (거점 파일이 없으면 None)
+def load_depot_assignment(snapshot):
+    signature = depot_file_signature()
+    if signature is None:
+        return None
+    with perf_stage('depot_assignment', rows_in=len(snapshot.df)):
+        assignment = get_depot_assignment(snapshot.version, signature, snapshot.df)
+    return assignment if assignment.names else None
+
+# ===== SQL 조회 백엔드 (선택) =====
+# 조회 방식: memory(기본, 위의 메모리 인덱스) / sqlite(로컬 SQLite 파일에 매개변수 쿼리)
+QUERY_BACKEND = os.environ.get('COMPANY_MAP_BACKEND', 'memory')
+
+# SQLite 파일에 한 번에 넣는 행 수
+SQL_INSERT_CHUNK_ROWS = 100_000
+
+# 데이터 버전별 SQLite 파일 경로
+def sql_database_path(dataset_version):
+    return os.path.join(CACHE_DIR, f"companies.{dataset_version}.sqlite")
+
+# SQL 식별자 (컬럼명은 코드에 정의된 값만 사용하고, 사용자 입력은 모두 매개변수로 전달)
+def sql_identifier(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+# 전처리된 데이터를 SQLite 파일로 저장
+# companies 테이블: row_id(데이터프레임 행 위치) + 필터 컬럼 + 좌표 + 통합검색 컬럼(정규화된 문자열)
+def write_sql_database(df, db_path, search_fields):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = temp_file_path(db_path)
+    filter_columns = [col for col in FILTER_COLUMNS if col in df.columns]
+    columns = filter_columns + ['latitude', 'longitude'] + search_fields
+    
+    values = {col: df[col].to_numpy(dtype=object, na_value=None) for col in filter_columns}
+    values['latitude'] = df['latitude'].to_numpy(dtype=np.float64)
+    values['longitude'] = df['longitude'].to_numpy(dtype=np.float64)
+    for field in search_fields:
+        # 같은 값은 한 번만 정규화 (결측은 코드 -1 → 마지막 None)
+        codes, uniques = pd.factorize(df[field])
+        normalized = np.array([normalize_search_text(v) for v in uniques] + [None], dtype=object)
+        values[field] = normalized[codes]
+    
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(f"CREATE TABLE companies (row_id INTEGER PRIMARY KEY, {', '.join(sql_identifier(col) for col in columns)})")
+        placeholders = ', '.join(['?'] * (len(columns) + 1))
+        for start in range(0, len(df), SQL_INSERT_CHUNK_ROWS):
+            end = min(len(df), start + SQL_INSERT_CHUNK_ROWS)
+            rows = zip(range(start, end), *(values[col][start:end] for col in columns))
+            conn.execute('BEGIN')
+            conn.executemany(f"INSERT INTO companies VALUES ({placeholders})", rows)
+            conn.execute('COMMIT')
+        for col in filter_columns:
+            conn.execute(f"CREATE INDEX {sql_identifier('idx_' + col)} ON companies ({sql_identifier(col)})")
+        conn.execute("CREATE INDEX idx_coordinates ON companies (latitude, longitude)")
+        conn.execute("ANALYZE")  # 조건별로 가장 적은 행을 고르는 인덱스를 선택하도록 통계 수집
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp_path)  # 이 프로세스가 만든 임시 파일만 삭제
+        raise
+    conn.close()
+    os.replace(tmp_path, db_path)
+
+# 이전 데이터 버전의 SQLite 파일 + 쓰다가 중단된 임시 파일 삭제
+# 다른 프로세스가 아직 이전 버전을 조회 중일 수 있으므로, 더 새로운 버전 파일이 생긴 뒤 유예 시간이 지난 파일만 삭제
+# (그 사이 다른 프로세스도 원본 변경을 확인해서 새 버전으로 바꿈)
+def remove_stale_sql_databases():
+    mtimes = {}
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith('companies.') and (name.endswith('.sqlite') or name.endswith('.tmp')):
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                pass  # 다른 프로세스가 먼저 삭제함
+    expired = time.time() - CACHE_GRACE_SECONDS
+    settled = max((mtime for path, mtime in mtimes.items() if path.endswith('.sqlite') and mtime < expired), default=None)
+    for path, mtime in mtimes.items():
+        stale = mtime < expired if path.endswith('.tmp') else settled is not None and mtime < settled
+        if stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# SQLite 조회 백엔드 (필터/통합검색/반경 조건 → 결과 행 위치)
+# 데이터 버전마다 파일 1개를 만들어 두고, 조회할 때마다 읽기 전용으로 열어서 사용 (세션/스레드 간 연결 공유 없음)
+class SqlQueryBackend:
+    def __init__(self, df):
+        self.path = sql_database_path(df.attrs.get('dataset_version'))
+        fields = SEARCH_FIELDS + [col for col in df.columns if str(col).startswith('산업코드')]
+        self.fields = [field for field in fields if field in df.columns]  # 통합검색 인덱스와 같은 검색 대상
+        self.filter_columns = [col for col in FILTER_COLUMNS if col in df.columns]
+        if not os.path.exists(self.path):
+            write_sql_database(df, self.path, self.fields)
+        remove_stale_sql_databases()
+    
+    def connect(self):
+        return sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(self.path))}?mode=ro", uri=True)
+    
+    # 조건 → WHERE 절 + 매개변수
+    def where_clause(self, selections, search_term='', search_mode='literal', search_fields=None, bbox=None):
+        clauses, params = [], []
+        for col, value in selections.items():
+            if value not in (None, '', '전체') and col in self.filter_columns:
+                clauses.append(f"{sql_identifier(col)} = ?")
+                params.append(value)
+        
+        # 통합검색: 검색어(모든 단어 포함이면 단어마다)가 대상 컬럼 중 하나에 포함
+        query = normalize_search_text(search_term or '')
+        if query:
+            fields = [field for field in (search_fields or self.fields) if field in self.fields]
+            for word in (query.split(' ') if search_mode == 'all_words' else [query]):
+                clauses.append('(' + (' OR '.join(f"instr({sql_identifier(field)}, ?) > 0" for field in fields) or '0') + ')')
+                params.extend([word] * len(fields))
+        
+        if bbox is not None:
+            south, west, north, east = bbox
+            clauses.append("latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?")
+            params.extend([south, north, west, east])
+        return ' AND '.join(clauses) or '1', params
+    
+    # 조건을 모두 만족하는 행 위치 (정렬됨) + 반경 조건이 있으면 (가까운 순 행 위치, 거리)
+    # radius: (위도, 경도, 반경 km)
+    def query(self, selections, search_term='', search_mode='literal', search_fields=None, radius=None):
+        bbox = radius_bbox(*radius) if radius is not None else None
+        where, params = self.where_clause(selections, search_term, search_mode, search_fields, bbox)
+        columns = 'row_id' if radius is None else 'row_id, latitude, longitude'
+        with contextlib.closing(self.connect()) as conn:
+            rows = conn.execute(f"SELECT {columns} FROM companies WHERE {where} ORDER BY row_id", params).fetchall()
+        if radius is None:
+            return np.array([row[0] for row in rows], dtype=np.int32), None
+        
+        # 사각형 후보 중 실제 반경 안의 기업만 가까운 순으로
+        data = np.array(rows, dtype=np.float64).reshape(-1, 3)
+        distances = haversine_km(radius[0], radius[1], data[:, 1], data[:, 2])
+        inside = np.flatnonzero(distances <= radius[2])
+        order = inside[np.argsort(distances[inside], kind='stable')]
+        return data[order, 0].astype(np.int32), distances[order]
+    
+    # 통합검색 인덱스와 같은 형태의 검색 (기준 위치 기업명 찾기 등)
+    def search(self, query, mode='literal', fields=None):
+        if not normalize_search_text(query):
+            return np.empty(0, dtype=np.int32)
+        return self.query({}, query, mode, fields)[0]
+
+# ===== 데이터 버전 관리 (원본 변경 시 실행 중 갱신) =====
+# 원본 파일 변경 확인 주기 (초)
+REFRESH_CHECK_SECONDS = 30
+
+# 데이터 버전 1개 (데이터 + 파생 인덱스)
+# 만든 뒤에는 바뀌지 않으므로 각 실행은 시작할 때 받은 버전을 끝까지 일관되게 사용
+class DatasetSnapshot:
+    def __init__(self, df, previous=None):
+        self.df = df
+        self.version = df.attrs.get('dataset_version')
+        self.facet_index = FacetIndex(df)
+        self.facet_catalog = FacetCatalog(self.facet_index)
+        # SQL 백엔드를 쓰면 통합검색도 SQL로 처리 (메모리 n-gram 인덱스를 만들지 않음)
+        self.sql_backend = SqlQueryBackend(df) if QUERY_BACKEND == 'sqlite' else None
+        self.search_index = self.sql_backend or SearchIndex(df, previous.search_index if previous else None)
+        self.name_index = CompanyNameIndex(df['한글업체명']) if '한글업체명' in df.columns else None
+        self.spatial_index = SpatialGridIndex(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+        self.memory_report = memory_report(df)
+
+# 프로세스 전체에서 공유하는 현재 데이터 버전
+# 원본 파일의 크기/수정시각이 바뀌면 백그라운드 스레드에서 새 버전을 처음부터 다시 만들고 한 번에 교체
+# (필터/공간/업체명 인덱스와 SQL DB는 새로 만들고, 통합검색 인덱스만 이전 버전에 있던 값의 n-gram을 재사용)
+class DatasetStore:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.snapshot = DatasetSnapshot(load_processed_frame(file_path))
+        self.last_check = time.monotonic()
+        self.refreshing = False
+        self.last_refresh = None  # 마지막 갱신 결과 (기업 수, 소요 시간 또는 오류)
+    
+    # 현재 버전 (확인 주기가 지났으면 원본 변경 여부도 확인 - 갱신 중에는 이전 버전 반환)
+    def current(self):
+        if time.monotonic() - self.last_check >= REFRESH_CHECK_SECONDS:
+            self.check_for_update()
+        return self.snapshot
+    
+    def check_for_update(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.last_check = time.monotonic()
+            manifest = read_cache_manifest(self.file_path) or {}
+            try:
+                stat = os.stat(self.file_path)
+            except OSError:
+                return  # 파일 교체 중이면 다음 확인 때 다시 시도
+            if manifest.get('size') == stat.st_size and manifest.get('mtime_ns') == stat.st_mtime_ns:
+                return
+            self.refreshing = True
+        threading.Thread(target=self.refresh, name='dataset-refresh', daemon=True).start()
+    
+    def refresh(self):
+        start = time.perf_counter()
+        try:
+            fingerprint = source_fingerprint(self.file_path)
+            previous = self.snapshot
+            if dataset_version(fingerprint) == previous.version:
+                write_cache_manifest(self.file_path, fingerprint)  # 내용은 같고 수정시각만 바뀜
+                return
+            
+            df = save_processed_frame(self.file_path, fingerprint, read_source_frame(self.file_path))
+            df.attrs['dataset_version'] = dataset_version(fingerprint)
+            snapshot = DatasetSnapshot(df, previous)
+            with self.lock:
+                self.snapshot = snapshot
+            self.last_refresh = {'rows': len(df), 'version': snapshot.version,
+                                 'seconds': round(time.perf_counter() - start, 1)}
+        except Exception as e:
+            self.last_refresh = {'error': str(e)}
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+# 데이터 저장소 (프로세스당 1개, 세션 간 공유)
+@st.cache_resource(show_spinner=False)
+def get_dataset_store():
+    return DatasetStore(DATA_FILE_PATH)
 
 # 신용등급 순서 정의
+CREDIT_RATING_ORDER = {
+    "AAA+": 0, "AAA": 1, "AA+": 2, "AA0": 3, "AA-": 4, 
+    "A+": 5, "A0": 6, "A-": 7,
+    "BBB+": 8, "BBB0": 9, "BBB-": 10, 
+    "BB+": 11, "BB0": 12, "BB-": 13,
+    "B+": 14, "B0": 15, "B-": 16, 
+    "CCC+": 17, "CCC0": 18, "CCC-": 19,
+    "CC+": 20, "C+": 21, "D": 22, "R": 23, "NR": 24
+}
+
+# 신용등급 → 순서 번호
 def credit_rating_order(rating):
-    # 신용등급 맵핑 (순서 정의)
-    credit_rating_mapping = {
-        "AAA+": 0, "AAA": 1, "AA+": 2, "AA0": 3, "AA-": 4, 
-        "A+": 5, "A0": 6, "A-": 7,
-        "BBB+": 8, "BBB0": 9, "BBB-": 10, 
-        "BB+": 11, "BB0": 12, "BB-": 13,
-        "B+": 14, "B0": 15, "B-": 16, 
-        "CCC+": 17, "CCC0": 18, "CCC-": 19,
-        "CC+": 20, "C+": 21, "D": 22, "R": 23, "NR": 24
-    }
-    return credit_rating_mapping.get(rating, 999)  # 없는 등급은 맨 뒤로
+    return CREDIT_RATING_ORDER.get(rating, 999)  # 없는 등급은 맨 뒤로
 
 # 기업규모 순서 정의
 def company_size_order(size):
@@ -92,16 +1446,1594 @@ def company_size_order(size):
     }
     return company_size_mapping.get(size, 999)  # 없는 분류는 맨 뒤로
 
+# ===== 필터 선택지 목록 =====
+# 선택지 정렬 기준 (없는 컬럼은 가나다순)
+FACET_SORT_KEYS = {
+    '기업규모구분': company_size_order,
+    '신용등급': credit_rating_order
+}
+
+# 데이터 버전별 필터 선택지 목록: 정렬된 값 목록, 시도 → 시군구 계층, 값별 기업 수
+# 현재 선택 조건에 따른 기업 수는 FacetIndex의 코드 배열을 bincount 해서 계산
+class FacetCatalog:
+    def __init__(self, facet_index):
+        self.facet_index = facet_index
+        self.values = {}   # 컬럼 → 코드 순서의 값 목록
+        self.options = {}  # 컬럼 → 정렬된 값 목록
+        self.totals = {}   # 컬럼 → 코드별 전체 기업 수
+        for col, value_codes in facet_index.value_codes.items():
+            codes = facet_index.codes[col]
+            self.values[col] = list(value_codes)
+            self.options[col] = sorted(self.values[col], key=FACET_SORT_KEYS.get(col))
+            self.totals[col] = np.bincount(codes[codes >= 0], minlength=len(self.values[col]))
+        
+        # 시도 → 시군구 (기업이 있는 조합만, 가나다순)
+        self.children = {}
+        if '시도' in facet_index.codes and '시군구' in facet_index.codes:
+            sido_codes, sigungu_codes = facet_index.codes['시도'], facet_index.codes['시군구']
+            n_sigungu = len(self.values['시군구'])
+            valid = (sido_codes >= 0) & (sigungu_codes >= 0)
+            pairs = np.flatnonzero(np.bincount(sido_codes[valid].astype(np.int64) * n_sigungu + sigungu_codes[valid]))
+            for sido, sigungu in zip(*np.divmod(pairs, n_sigungu)):
+                self.children.setdefault(self.values['시도'][sido], []).append(self.values['시군구'][sigungu])
+            for districts in self.children.values():
+                districts.sort()
+    
+    # 다른 컬럼의 선택 조건을 만족하는 기업 중 컬럼 값별 기업 수 → (값 → 수, 전체 수)
+    # 시도 기업 수는 시군구 선택을 무시 (시도를 바꾸면 시군구 선택도 초기화되므로)
+    def counts(self, column, selections):
+        others = {col: value for col, value in selections.items()
+                  if col != column and not (column == '시도' and col == '시군구')}
+        if all(value in (None, '', '전체') for value in others.values()):
+            counts = self.totals[column]
+            total = self.facet_index.n_rows
+        else:
+            positions = self.facet_index.filter(others)
+            codes = self.facet_index.codes[column][positions]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self.values[column]))
+            total = len(positions)
+        return dict(zip(self.values[column], counts.tolist())), total
+
+# ===== 지도 생성 =====
+# 지도 스타일 (타일 속성 추가) - Google 지도 스타일 추가
+TILE_OPTIONS = {
+    "Google 지도 (표준)": "https://mt1.google.com/vt/lyrs=m&x={x}&y={y}&z={z}",
+    "Google 위성 지도": "https://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}",
+    "Google 하이브리드": "https://mt1.google.com/vt/lyrs=y&x={x}&y={y}&z={z}",
+    "Google 지형도": "https://mt1.google.com/vt/lyrs=p&x={x}&y={y}&z={z}",
+    "OpenStreetMap": "OpenStreetMap",
+    "CartoDB Positron (밝은 테마)": "CartoDB positron",
+    "CartoDB Dark Matter (어두운 테마)": "CartoDB dark_matter"
+}
+
+# 기업 규모별 아이콘 (기본 마커)
+ICON_MAPPING = {
+    '대기업': 'building',
+    '중견기업': 'industry',
+    '중소기업': 'briefcase',
+    '비영리단체': 'users',
+    '미분류': 'home'
+}
+
+# 마커 색상 기준 → 색상 컬럼
+COLOR_FIELDS = {
+    '기업 규모': '기업규모구분',
+    '신용등급': '신용등급',
+    '현금흐름등급': '현금흐름등급',
+    '업종명': '업종명',
+    '담당 거점': '담당 거점'
+}
+
+# 기업 규모별 색상
+COMPANY_SIZE_COLORS = {
+    '대기업': 'red',
+    '중견기업': 'blue',
+    '중소기업': 'green',
+    '비영리단체': 'purple',  # 추가
+    '미분류': 'gray'         # 추가
+}
+
+# 신용등급 색상 그라데이션: 높은 등급(녹색)에서 낮은 등급(빨강)으로 (등급 순서 구간별로 고정)
+CREDIT_COLORS = ['darkgreen', 'green', 'lightgreen', 'blue', 'lightblue',
+                 'orange', 'salmon', 'red', 'darkred', 'black']
+
+# 현금흐름등급 색상 (등급 순서대로, 더 낮은 등급은 gray)
+CASH_FLOW_COLORS = ['darkgreen', 'green', 'orange', 'red', 'darkred']
+
+# 업종별 색상 (업종명으로 정하므로 검색 결과/데이터 버전과 관계없이 같은 업종은 같은 색, 10색 반복)
+INDUSTRY_COLORS = ['blue', 'red', 'green', 'purple', 'orange',
+                   'darkblue', 'darkgreen', 'darkred', 'cadetblue', 'darkpurple']
+
+# 색상 값이 없을 때(결측 또는 색상 기준 없음) 기본 색상
+DEFAULT_MARKER_COLOR = 'blue'
+
+# 레전드 항목 정렬 기준 (없는 컬럼은 값 목록 순서)
+LEGEND_SORT_KEYS = {
+    '기업규모구분': company_size_order,
+    '신용등급': credit_rating_order
+}
+
+# 레전드 제목
+LEGEND_TITLES = {
+    '기업규모구분': '기업 규모',
+    '신용등급': '신용등급',
+    '현금흐름등급': '현금흐름등급',
+    '업종명': '업종',
+    '담당 거점': '담당 거점'
+}
+
+# 컬럼 값별 행 수 (한 번의 벡터 연산) → (값 목록, 값별 행 수, 행별 값 번호 - 결측은 -1)
+# 범주형은 데이터 전체의 범주 목록 순서(검색 결과와 관계없이 같은 값은 같은 번호), 그 외는 정렬된 값 순서
+def column_value_counts(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values, codes = list(series.cat.categories), series.cat.codes.to_numpy()
+    else:
+        codes, uniques = pd.factorize(series, sort=True)
+        values = list(uniques)
+    counts = np.bincount(codes[codes >= 0], minlength=len(values))
+    return values, counts, codes
+
+# 값 → 색상 (값 자체 또는 값 목록에서의 위치로 정하므로 검색할 때마다 바뀌지 않음)
+def value_color(field, value, position):
+    if field == '기업규모구분':
+        return COMPANY_SIZE_COLORS.get(value, 'gray')
+    if field == '신용등급':
+        order = credit_rating_order(value)
+        return CREDIT_COLORS[order * len(CREDIT_COLORS) // len(CREDIT_RATING_ORDER)] if order < len(CREDIT_RATING_ORDER) else 'gray'
+    if field == '현금흐름등급':
+        return CASH_FLOW_COLORS[position] if position < len(CASH_FLOW_COLORS) else 'gray'
+    if field == '담당 거점':
+        return DEPOT_COLORS[position % len(DEPOT_COLORS)]  # 범주 순서 = 거점 파일 순서
+    return INDUSTRY_COLORS[zlib.crc32(str(value).encode('utf-8')) % len(INDUSTRY_COLORS)]
+
+# 검색 결과 1회 집계로 만든 마커 색상/아이콘 + 레전드 항목
+# 색상 컬럼과 기업규모구분(아이콘)을 각각 한 번씩만 집계해서 행별 팔레트 번호와 레전드(값별 기업 수)에 함께 사용
+# counted: 컬럼 → column_value_counts 결과 (같은 검색 결과를 집계하는 다른 단계와 공유, 없으면 새로 만듦)
+class MarkerPalette:
+    def __init__(self, filtered_df, color_by, icons=True, counted=None):
+        counted = {} if counted is None else counted
+        
+        def count(col):
+            if col not in counted:
+                counted[col] = column_value_counts(filtered_df[col])
+            return counted[col]
+        
+        # 색상: 전체 값 목록 기준 색상 → 행별 팔레트 번호 (결측은 기본 색상)
+        self.field = COLOR_FIELDS.get(color_by)
+        if self.field not in filtered_df.columns:
+            self.field = None
+        self.items = []  # 색상 레전드 [(값, 색상, 기업 수)] - 기업이 있는 값만 레전드 순서로
+        if self.field is None:
+            self.colors = [DEFAULT_MARKER_COLOR]
+            self.color_codes = np.zeros(len(filtered_df), dtype=np.int32)
+        else:
+            values, counts, codes = count(self.field)
+            value_colors = [value_color(self.field, value, i) for i, value in enumerate(values)]
+            self.colors = list(dict.fromkeys(value_colors + [DEFAULT_MARKER_COLOR]))
+            lookup = np.array([self.colors.index(color) for color in value_colors + [DEFAULT_MARKER_COLOR]], dtype=np.int32)
+            self.color_codes = lookup[codes]
+            present = np.flatnonzero(counts).tolist()
+            sort_key = LEGEND_SORT_KEYS.get(self.field)
+            if sort_key is not None:
+                present.sort(key=lambda i: sort_key(values[i]))
+            self.items = [(values[i], value_colors[i], int(counts[i])) for i in present]
+        
+        # 아이콘: 기업 규모에 따라 다른 아이콘 (기본 아이콘 building), 기본 마커일 때만 집계
+        self.icons = list(dict.fromkeys(['building'] + list(ICON_MAPPING.values())))
+        self.size_counts = {}  # 기업규모구분 → 기업 수 (아이콘 레전드용)
+        if icons and '기업규모구분' in filtered_df.columns:
+            values, counts, codes = count('기업규모구분')
+            lookup = np.array([self.icons.index(ICON_MAPPING.get(value, 'building')) for value in values] + [0], dtype=np.int32)
+            self.icon_codes = lookup[codes]
+            self.size_counts = {value: int(n) for value, n in zip(values, counts) if n}
+        else:
+            self.icon_codes = np.zeros(len(filtered_df), dtype=np.int32)
+    
+    # 값 → 색상 (기업이 있는 값만)
+    def color_map(self):
+        return {value: color for value, color, _ in self.items}
+
+# 팝업에 표시할 필드와 레이블 정의 (요청된 순서대로)
+POPUP_FIELDS = [
+    ('기업규모구분', '기업규모구분'),
+    ('업종명', '업종명'),
+    ('업태명', '업태명'),
+    ('주요상품내역', '주요상품내역'),
+    ('산업코드 대분류', '산업코드 대분류'),
+    ('산업코드 세세분류', '산업코드 세세분류'),
+    ('신용등급', '신용등급'),
+    ('현금흐름등급', '현금흐름등급'),
+    ('한글지번주소', '한글지번주소'),
+    ('전화번호', '전화번호'),
+    ('사업자등록번호', '사업자등록번호'),
+    ('한글주소', '한글주소'),
+    ('담당 거점', '담당 거점')  # 마커 색상 기준이 담당 거점일 때만 있는 컬럼
+]
+
+# 팝업 스타일 - 더 큰 팝업과 글씨 크기 증가 (첫 팝업을 열 때 문서에 한 번만 추가)
+POPUP_STYLE = """
+    .company-popup {
+        font-family: Arial;
+        width: 600px;
+        max-width: 100%;
+    }
+    .company-popup .info-table {
+        width: 100%;
+        border-collapse: collapse;
+        margin-bottom: 5px;
+    }
+    .company-popup .info-table th {
+        text-align: left;
+        padding: 6px 10px;
+        font-weight: bold;
+        color: #2E5984;
+        width: 140px;
+        vertical-align: top;
+        border-bottom: 1px solid #eee;
+        white-space: nowrap;
+        font-size: 14px;  /* 컬럼명 글씨 크기 추가 증가 */
+    }
+    .company-popup .info-table td {
+        padding: 6px 10px;
+        vertical-align: top;
+        border-bottom: 1px solid #eee;
+        word-break: break-word;
+        font-size: 14px;  /* 값 글씨 크기 추가 증가 */
+    }
+    .company-popup .company-name {
+        font-weight: bold;
+        font-size: 18px;  /* 기업명 글씨 크기 추가 증가 */
+        color: #2E5984;
+        margin: 0;
+        padding: 10px 0;
+        border-bottom: 2px solid #2E5984;
+        margin-bottom: 12px;
+    }
+"""
+
+# 팝업용 컬럼 값 (결측값은 None, 나머지는 문자열)
+def popup_column_values(filtered_df, field):
+    if field not in filtered_df.columns:
+        return [None] * len(filtered_df)
+    values = filtered_df[field]
+    text = values.astype(str)
+    return text.astype(object).where(values.notna(), None).tolist()
+
+# 팝업 레코드: 기업별 [기업명, 필드값...] (HTML은 브라우저에서 클릭 시 공통 템플릿으로 생성)
+def build_popup_records(filtered_df):
+    columns = [popup_column_values(filtered_df, '한글업체명')]
+    columns += [popup_column_values(filtered_df, field) for field, _ in POPUP_FIELDS]
+    return [list(record) for record in zip(*columns)]
+
+# 템플릿으로 다시 해석하지 않고 그대로 출력하는 스크립트
+# (folium은 렌더링된 스크립트를 Jinja 템플릿으로 한 번 더 컴파일하므로 대용량 데이터는 이 요소로 분리)
+class InlineScript(Element):
+    def __init__(self, script):
+        super().__init__()
+        self._name = "InlineScript"
+        self.script = script
+    
+    def render(self, **kwargs):
+        return self.script
+
+# 파이썬 객체 → <script> 안에 넣어도 안전한 JSON
+# (JSON 구조에는 '{{', '{%', '{#'가 나올 수 없으므로 문자열 값 안의 템플릿 구분자만 이스케이프됨)
+def to_script_json(data):
+    text = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return re.sub(r'\{(?=[{%#])', r'\\u007b', text)
+
+# 전체 마커를 하나의 압축 배열로 브라우저에 전달하고 JS에서 일괄 생성하는 레이어
+# 각 점: [위도, 경도, 색상 번호, 아이콘 번호, 행 번호] - 색상/아이콘 이름은 팔레트로 한 번만 전달
+# 팝업은 기업별 값 레코드만 전달하고, 클릭 시 공통 템플릿/스타일로 생성
+# inline_data=True이면 데이터를 레이어 스크립트에 직접 포함 (st_folium처럼 스크립트만 따로 전달하는 경우)
+class CompanyMarkerLayer(JSCSSMixin, Layer):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                {%- if this.inline_data %}
+                var data = {{ this.data_json }};
+                {%- else %}
+                var data = {{ this.get_name() }}_data;
+                {%- endif %}
+                var points = data.points, colors = data.colors, icons = data.icons;
+                var labels = data.labels, records = data.records;
+                function escapeHtml(value) {
+                    return String(value).replace(/[&<>"']/g, function(c) {
+                        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                    });
+                }
+                // 공통 팝업 템플릿: 기업명 + 값이 있는 필드만 표로 표시
+                function buildPopup(record) {
+                    if (!document.getElementById('company-popup-style')) {
+                        var style = document.createElement('style');
+                        style.id = 'company-popup-style';
+                        style.textContent = data.style;
+                        document.head.appendChild(style);
+                    }
+                    var html = '<div class="company-popup">';
+                    if (record[0] !== null) {
+                        html += '<div class="company-name">' + escapeHtml(record[0]) + '</div>';
+                    }
+                    html += '<table class="info-table">';
+                    for (var j = 0; j < labels.length; j++) {
+                        if (record[j + 1] !== null) {
+                            html += '<tr><th>' + escapeHtml(labels[j]) + '</th><td>' + escapeHtml(record[j + 1]) + '</td></tr>';
+                        }
+                    }
+                    return html + '</table></div>';
+                }
+                var markers = new Array(points.length);
+                {%- if this.marker_style == 'icon' %}
+                var iconCache = {};
+                {%- else %}
+                var renderer = L.canvas();
+                {%- endif %}
+                for (var i = 0; i < points.length; i++) {
+                    var p = points[i];
+                    var color = colors[p[2]];
+                    {%- if this.marker_style == 'icon' %}
+                    var iconKey = p[2] + ':' + p[3];
+                    if (!(iconKey in iconCache)) {
+                        iconCache[iconKey] = L.AwesomeMarkers.icon({
+                            icon: icons[p[3]], prefix: 'fa', markerColor: color, iconColor: 'white', extraClasses: 'fa-rotate-0'
+                        });
+                    }
+                    var marker = L.marker([p[0], p[1]], {icon: iconCache[iconKey]});
+                    {%- else %}
+                    var marker = L.circleMarker([p[0], p[1]], {
+                        renderer: renderer, radius: 6, color: color, fill: true, fillColor: color, fillOpacity: 0.7
+                    });
+                    {%- endif %}
+                    // 팝업은 클릭 시점에 생성
+                    marker.bindPopup((function(record){ return function(){ return buildPopup(record); }; })(records[i]), {maxWidth: 400});
+                    marker.bindTooltip(records[i][0] !== null ? escapeHtml(records[i][0]) : '기업명 없음');
+                    markers[i] = marker;
+                }
+                {%- if this.clustered %}
+                var layer = L.markerClusterGroup({{ this.options|tojson }});
+                layer.addLayers(markers);
+                {%- else %}
+                var layer = L.featureGroup(markers);
+                {%- endif %}
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}
+        """)
+    
+    default_js = MarkerCluster.default_js
+    default_css = MarkerCluster.default_css
+    
+    def __init__(self, points, colors, icons, records, marker_style='icon',
+                 clustered=True, options=None, name=None, inline_data=False):
+        super().__init__(name=name)
+        self._name = "CompanyMarkerLayer"
+        self.data = {
+            'points': points,
+            'colors': colors,
+            'icons': icons,
+            'labels': [label for _, label in POPUP_FIELDS],
+            'records': records,
+            'style': POPUP_STYLE
+        }
+        self.inline_data = inline_data
+        self.marker_style = marker_style
+        self.clustered = clustered
+        self.options = options or {}
+    
+    @property
+    def data_json(self):
+        return to_script_json(self.data)
+    
+    def render(self, **kwargs):
+        # 마커 데이터는 레이어 스크립트보다 먼저 원본 그대로 추가
+        if not self.inline_data:
+            self.get_root().script.add_child(
+                InlineScript(f"var {self.get_name()}_data = {self.data_json};"),
+                name=self.get_name() + "_data"
+            )
+        super().render(**kwargs)
+
+# 검색 결과 → 마커 레이어 (색상/아이콘 번호는 MarkerPalette에서 컬럼 단위로 일괄 계산)
+# rows: palette를 만든 검색 결과 중 이 레이어에 넣을 행 (filtered_df가 그 일부일 때)
+def build_marker_layer(filtered_df, palette, marker_style, use_clustering,
+                       cluster_radius, min_cluster_size, inline_data=False, rows=None):
+    color_codes = palette.color_codes if rows is None else palette.color_codes[rows]
+    icon_codes = palette.icon_codes if rows is None else palette.icon_codes[rows]
+    
+    # 좌표는 소수점 6자리(약 10cm)로 줄여서 전송
+    points = [list(p) for p in zip(
+        np.round(filtered_df['latitude'].to_numpy(dtype=float), 6).tolist(),
+        np.round(filtered_df['longitude'].to_numpy(dtype=float), 6).tolist(),
+        color_codes.tolist(),
+        icon_codes.tolist(),
+        filtered_df.index.tolist()
+    )]
+    
+    return CompanyMarkerLayer(
+        points, palette.colors, palette.icons, build_popup_records(filtered_df),
+        marker_style='icon' if marker_style == '기본 마커' else 'circle',
+        clustered=use_clustering,
+        options={
+            'maxClusterRadius': cluster_radius,
+            'disableClusteringAtZoom': 15,  # 줌 레벨 15 이상에서는 클러스터링 비활성화
+            'spiderfyOnMaxZoom': True,
+            'minClusterSize': min_cluster_size,
+            'chunkedLoading': True  # 대량 마커를 나눠서 추가 (브라우저 멈춤 방지)
+        },
+        name="기업 클러스터" if use_clustering else "기업 마커",
+        inline_data=inline_data
+    )
+
+# 지도 레전드 추가 (색상, 마커 아이콘) - 값별 기업 수는 MarkerPalette의 집계 결과 사용
+def add_map_legends(m, palette, marker_style):
+    # 색상 레전드 HTML 생성
+    if palette.field:
+        legend_title = LEGEND_TITLES.get(palette.field, '분류')
+    
+        # 레전드 HTML 생성 - 최대 15개 항목만 표시
+        legend_html = f"""
+        <div style="position: fixed; bottom: 50px; left: 50px; z-index: 1000; background-color: white; padding: 10px; border: 1px solid grey; border-radius: 5px; max-height: 300px; overflow-y: auto; max-width: 200px;">
+            <p style="text-align: center; margin-bottom: 5px;"><b>{legend_title}</b></p>
+        """
+    
+        # 검색 결과에 있는 값만 (정렬 기준이 있는 컬럼은 정의된 순서대로)
+        legend_items = palette.items
+    
+        # 항목이 너무 많은 경우 기업 수가 많은 항목만 (표시 순서는 유지)
+        max_legend_items = 15
+        if len(legend_items) > max_legend_items:
+            legend_html += f"<p style='font-size: 10px; color: gray;'>* 전체 {len(legend_items)}개 항목 중 기업 수 상위 {max_legend_items}개</p>"
+            top = set(np.argsort([-count for _, _, count in legend_items], kind='stable')[:max_legend_items].tolist())
+            legend_items = [item for i, item in enumerate(legend_items) if i in top]
+    
+        for key, color, count in legend_items:
+            legend_html += f"""
+            <div style="display: flex; align-items: center; margin-bottom: 3px;">
+                <span style="background-color: {color}; width: 15px; height: 15px; display: inline-block; margin-right: 5px; border-radius: 50%;"></span>
+                <span style="font-size: 12px;">{html.escape(str(key))} ({count:,})</span>
+            </div>
+            """
+    
+        legend_html += '</div>'
+    
+        # 색상 레전드를 지도에 추가
+        m.get_root().html.add_child(folium.Element(legend_html))
+    
+    # 아이콘 설명 레전드 추가 (새로 추가)
+    if marker_style == '기본 마커':
+        # 아이콘 설명 레전드 (우측 하단에 배치)
+        icon_legend_html = """
+        <div style="position: fixed; bottom: 50px; right: 50px; z-index: 1000; background-color: white; padding: 10px; border: 1px solid grey; border-radius: 5px; max-width: 250px;">
+            <p style="text-align: center; margin-bottom: 5px;"><b>마커 아이콘 설명</b></p>
+        """
+    
+        # 아이콘별 설명 추가
+        icon_descriptions = [
+            ('building', '대기업'),
+            ('industry', '중견기업'),
+            ('briefcase', '중소기업'),
+            ('users', '비영리단체'),
+            ('home', '미분류')
+        ]
+    
+        for icon_name, description in icon_descriptions:
+            # 필터링된 데이터에 해당 기업규모가 있는 경우에만 표시 (기업 수 함께 표시)
+            count = palette.size_counts.get(description, 0)
+            if description == '미분류' or count:
+                label = f"{description} ({count:,})" if count else description
+                icon_legend_html += f"""
+                <div style="display: flex; align-items: center; margin-bottom: 5px;">
+                    <i class="fa fa-{icon_name}" style="margin-right: 8px; width: 20px; text-align: center;"></i>
+                    <span style="font-size: 12px;">{label}</span>
+                </div>
+                """
+    
+        icon_legend_html += '</div>'
+    
+        # 아이콘 설명 레전드를 지도에 추가
+        m.get_root().html.add_child(folium.Element(icon_legend_html))
+    
+        # FontAwesome 추가 (아이콘 표시를 위해 필요)
+        m.get_root().header.add_child(folium.Element(
+            '<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4/css/all.min.css"/>'
+        ))
+
+# 반경 검색 원이 화면에 모두 들어오는 줌 레벨
+def radius_zoom(lat, radius_km):
+    meters_per_pixel = 156543.03 * np.cos(np.radians(lat))  # 줌 0 기준
+    zoom = np.log2(meters_per_pixel * MAP_HEIGHT / (radius_km * 1000 * 2.4))
+    return int(np.clip(np.floor(zoom), 5, 16))
+
+# 검색 결과 + 지도 스타일 → 타일만 있는 기본 지도 (중심 좌표/줌은 검색 조건에 따라 결정)
+# proximity: 반경 검색 기준 (위도, 경도, 반경 km, 표시명), 없으면 None
+def create_base_map(filtered_df, selected_region, selected_district, selected_style, proximity=None):
+    # 지도 중심 좌표 계산
+    if proximity is not None:  # 반경 검색: 기준 위치 중심
+        center_lat, center_lon = proximity[0], proximity[1]
+        zoom_start = radius_zoom(center_lat, proximity[2])
+    elif len(filtered_df) == 1:  # 결과가 하나일 때
+        center_lat = filtered_df['latitude'].iloc[0]
+        center_lon = filtered_df['longitude'].iloc[0]
+        zoom_start = 14
+    elif selected_region != '전체' and '시도' in filtered_df.columns:
+        center_lat = filtered_df['latitude'].mean()
+        center_lon = filtered_df['longitude'].mean()
+        zoom_start = 10 if selected_district == '전체' else 12
+    else:  # 전체 지도
+        # 한국 중앙 쯤으로 센터 설정
+        center_lat, center_lon = 36.0, 127.8
+        zoom_start = 7
+    
+    # 지도 객체 생성
+    m = folium.Map(
+        location=[center_lat, center_lon],
+        zoom_start=zoom_start,
+        tiles=None  # 타일 없이 시작
+    )
+    
+    # 선택한 타일 설정
+    selected_tile = TILE_OPTIONS[selected_style]
+    
+    # Google 지도 URL인 경우
+    if selected_style.startswith("Google"):
+        folium.TileLayer(
+            tiles=selected_tile,
+            attr='Google Maps',
+            name=selected_style,
+        ).add_to(m)
+    else:
+        # 기본 folium 타일
+        folium.TileLayer(
+            tiles=selected_tile,
+            name=selected_style,
+        ).add_to(m)
+    return m
+
+# 반경 검색 기준 위치와 반경 원 표시
+def add_radius_overlay(m, proximity):
+    lat, lon, radius_km, label = proximity
+    folium.Circle(
+        location=[lat, lon], radius=radius_km * 1000,
+        color='#3186cc', weight=2, fill=True, fill_opacity=0.05
+    ).add_to(m)
+    folium.Marker(
+        location=[lat, lon],
+        tooltip=f"기준 위치: {html.escape(str(label))} (반경 {radius_km:g}km)",
+        icon=folium.Icon(color='black', icon='crosshairs', prefix='fa')
+    ).add_to(m)
+
+# 거점 위치 마커 (거점 색상, 기업 마커와 구분되는 창고 아이콘)
+def add_depot_markers(m, depots):
+    layer = folium.FeatureGroup(name="거점")
+    colors = depots.colors()
+    for row in depots.depots.itertuples(index=False):
+        folium.Marker(
+            [row.latitude, row.longitude], tooltip=f"거점: {row.거점명}",
+            icon=folium.Icon(color=colors[row.거점명], icon='warehouse', prefix='fa')
+        ).add_to(layer)
+    layer.add_to(m)
+
+# 검색 결과 + 시각화 옵션 → folium 지도
+# depots: 담당 거점 배정 (마커 색상 기준이 담당 거점이면 거점 위치도 표시)
+def build_company_map(filtered_df, selected_region, selected_district, selected_style, marker_style,
+                      use_clustering, cluster_radius, min_cluster_size, color_by, proximity=None, depots=None):
+    m = create_base_map(filtered_df, selected_region, selected_district, selected_style, proximity)
+    if proximity is not None:
+        add_radius_overlay(m, proximity)
+    if depots is not None:
+        add_depot_markers(m, depots)
+    
+    # 마커 추가 (전체 검색 결과를 하나의 레이어로)
+    # 색상/아이콘 컬럼 집계 (마커와 레전드가 함께 사용)
+    with perf_stage('marker_palette', rows_in=len(filtered_df)):
+        palette = MarkerPalette(filtered_df, color_by, icons=marker_style == '기본 마커')
+    
+    with perf_stage('build_markers', rows_in=len(filtered_df)):
+        build_marker_layer(
+            filtered_df, palette, marker_style,
+            use_clustering, cluster_radius, min_cluster_size
+        ).add_to(m)
+    
+    with perf_stage('build_legends'):
+        add_map_legends(m, palette, marker_style)
+    
+    # 레이어 컨트롤 추가
+    folium.LayerControl().add_to(m)
+    return m
+
+# ===== 서버 클러스터링 (대용량 검색 결과) =====
+# 이 줌 레벨부터는 개별 기업 표시 (브라우저 클러스터링의 disableClusteringAtZoom과 동일)
+SERVER_CLUSTER_MAX_ZOOM = 15
+
+# 클러스터 툴팁에 분포를 표시할 컬럼과 정렬 기준
+CLUSTER_BREAKDOWN_COLUMNS = [
+    ('기업규모구분', company_size_order),
+    ('신용등급', credit_rating_order)
+]
+
+# 지도 표시 크기 (픽셀)
+MAP_WIDTH = 1600
+MAP_HEIGHT = 800
+
+# 위도/경도 → Web Mercator 정규 좌표 (0~1, 줌 0의 타일 한 장 기준)
+def mercator_xy(lat, lon):
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0
+    sin_lat = np.sin(np.radians(np.asarray(lat, dtype=np.float64)))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+    return x, y
+
+# 정규 좌표 → 위도/경도
+def mercator_latlon(x, y):
+    lon = np.asarray(x, dtype=np.float64) * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype=np.float64)))))
+    return lat, lon
+
+# 지도 중심/줌/크기 → 보이는 영역 (남, 서, 북, 동)
+def viewport_bounds(center_lat, center_lon, zoom, width=MAP_WIDTH, height=MAP_HEIGHT):
+    x, y = mercator_xy(center_lat, center_lon)
+    world_px = 256 * 2 ** zoom
+    south, west = mercator_latlon(x - width / 2 / world_px, y + height / 2 / world_px)
+    north, east = mercator_latlon(x + width / 2 / world_px, y - height / 2 / world_px)
+    return float(south), float(west), float(north), float(east)
+
+# 화면 영역을 가로/세로로 일정 비율만큼 넓히기 (가장자리 클러스터 누락 방지)
+def pad_bounds(bounds, ratio=0.2):
+    south, west, north, east = bounds
+    pad_lat, pad_lon = (north - south) * ratio, (east - west) * ratio
+    return south - pad_lat, west - pad_lon, north + pad_lat, east + pad_lon
+
+# 클러스터링 반경(픽셀) → 격자 한 칸의 크기 (256 / 2^bits 픽셀, 반경의 약 2배)
+def cluster_cell_bits(cluster_radius):
+    return int(np.clip(np.round(np.log2(256 / (2 * (cluster_radius or 50)))), 0, 5))
+
+# 같은 격자 칸에 속한 항목 집계 (개수, 좌표 합, 분포)
+def aggregate_cells(cx, cy, counts, lat_sums, lon_sums, breakdowns):
+    keys = (cx << 32) | cy
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    n = len(unique_keys)
+    aggregated = {
+        'cx': unique_keys >> 32,
+        'cy': unique_keys & 0xFFFFFFFF,
+        'count': np.bincount(inverse, weights=counts, minlength=n).astype(np.int64),
+        'lat_sum': np.bincount(inverse, weights=lat_sums, minlength=n),
+        'lon_sum': np.bincount(inverse, weights=lon_sums, minlength=n),
+        'breakdown': {}
+    }
+    for col, matrix in breakdowns.items():
+        aggregated['breakdown'][col] = np.stack(
+            [np.bincount(inverse, weights=matrix[:, k], minlength=n) for k in range(matrix.shape[1])], axis=1
+        ).astype(np.int64) if matrix.shape[1] else np.zeros((n, 0), dtype=np.int64)
+    return aggregated
+
+# 줌 레벨별 격자 클러스터 계층 (supercluster 방식)
+# 줌 z의 격자 칸은 줌 z+1 격자 칸 4개를 합친 것이므로, 가장 세밀한 단계에서 개별 기업을 한 번 집계한 뒤
+# 상위 단계는 바로 아래 단계의 클러스터만 다시 집계 (모든 단계를 NumPy 벡터 연산으로 계산)
+class ClusterHierarchy:
+    def __init__(self, filtered_df, cluster_radius, max_zoom=SERVER_CLUSTER_MAX_ZOOM):
+        self.row_ids = filtered_df.index.to_numpy()
+        self.row_sorter = np.argsort(self.row_ids, kind='stable')
+        self.lat = filtered_df['latitude'].to_numpy(dtype=np.float64)
+        self.lon = filtered_df['longitude'].to_numpy(dtype=np.float64)
+        self.max_zoom = max_zoom
+        self.cell_bits = cluster_cell_bits(cluster_radius)
+        
+        # 가장 세밀한 단계(max_zoom - 1)의 격자 좌표
+        scale = 1 << (max_zoom - 1 + self.cell_bits)
+        x, y = mercator_xy(self.lat, self.lon)
+        self.ix = np.clip((x * scale).astype(np.int64), 0, scale - 1)
+        self.iy = np.clip((y * scale).astype(np.int64), 0, scale - 1)
+        
+        # 분포 컬럼: 값 목록(정렬 기준 순서)과 기업별 값 번호
+        self.breakdown_labels = {}
+        breakdown_codes = {}
+        for col, order in CLUSTER_BREAKDOWN_COLUMNS:
+            if col not in filtered_df.columns:
+                continue
+            codes, uniques = pd.factorize(filtered_df[col])
+            ranking = np.argsort([order(value) for value in uniques], kind='stable')
+            remap = np.empty(len(uniques), dtype=np.int64)
+            remap[ranking] = np.arange(len(uniques))
+            self.breakdown_labels[col] = [uniques[i] for i in ranking]
+            breakdown_codes[col] = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+        
+        # 가장 세밀한 단계: 개별 기업 집계 (분포는 격자 번호 × 값 개수 + 값 번호로 한 번에 계산)
+        keys = (self.ix << 32) | self.iy
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        n = len(unique_keys)
+        level = {
+            'cx': unique_keys >> 32,
+            'cy': unique_keys & 0xFFFFFFFF,
+            'count': np.bincount(inverse, minlength=n).astype(np.int64),
+            'lat_sum': np.bincount(inverse, weights=self.lat, minlength=n),
+            'lon_sum': np.bincount(inverse, weights=self.lon, minlength=n),
+            'breakdown': {}
+        }
+        for col, codes in breakdown_codes.items():
+            k = len(self.breakdown_labels[col])
+            valid = codes >= 0
+            level['breakdown'][col] = np.bincount(
+                inverse[valid] * k + codes[valid], minlength=n * k
+            ).reshape(n, k)
+        
+        self.levels = {max_zoom - 1: level}
+        for zoom in range(max_zoom - 2, -1, -1):
+            child = self.levels[zoom + 1]
+            self.levels[zoom] = aggregate_cells(
+                child['cx'] >> 1, child['cy'] >> 1,
+                child['count'], child['lat_sum'], child['lon_sum'], child['breakdown']
+            )
+        for level in self.levels.values():
+            level['lat'] = level['lat_sum'] / level['count']
+            level['lon'] = level['lon_sum'] / level['count']
+    
+    # 데이터 전체 기준 행 위치 → 이 계층의 기업 번호 (검색 결과에 없는 행은 제외)
+    def local_positions(self, row_positions):
+        idx = np.searchsorted(self.row_ids, row_positions, sorter=self.row_sorter)
+        idx = np.minimum(idx, len(self.row_ids) - 1)
+        local = self.row_sorter[idx]
+        return np.sort(local[self.row_ids[local] == row_positions])
+    
+    # 영역 안의 기업 번호 (전체 비교)
+    def points_in_bounds(self, bounds):
+        south, west, north, east = bounds
+        return np.flatnonzero((self.lat >= south) & (self.lat <= north) & (self.lon >= west) & (self.lon <= east))
+    
+    # 보이는 영역(남, 서, 북, 동)과 줌 → (클러스터 목록, 개별 기업 번호)
+    # 최소 크기보다 작은 클러스터와 최대 줌 이상에서는 개별 기업으로 반환
+    # find_in_view: 영역 → 영역 안의 기업 번호 (공간 인덱스 사용 시 지정, 없으면 전체 비교)
+    #   개별 기업을 표시해야 할 때만 호출
+    def query(self, bounds, zoom, min_cluster_size=2, find_in_view=None):
+        south, west, north, east = bounds
+        zoom = int(np.clip(zoom, 0, self.max_zoom))
+        find_in_view = find_in_view or self.points_in_bounds
+        if zoom >= self.max_zoom:
+            return [], find_in_view(bounds)
+        
+        # 보이는 영역과 겹치는 격자 칸의 클러스터 (중심점이 영역 밖이어도 영역 안에 기업이 있으면 포함)
+        level = self.levels[zoom]
+        scale = 1 << (zoom + self.cell_bits)
+        x, y = mercator_xy([north, south], [west, east])
+        cx_min, cx_max = np.clip((x * scale).astype(np.int64), 0, scale - 1)
+        cy_min, cy_max = np.clip((y * scale).astype(np.int64), 0, scale - 1)
+        in_view = (level['cx'] >= cx_min) & (level['cx'] <= cx_max) & (level['cy'] >= cy_min) & (level['cy'] <= cy_max)
+        large = np.flatnonzero(in_view & (level['count'] >= min_cluster_size))
+        small = in_view & (level['count'] < min_cluster_size)
+        
+        leaves = np.empty(0, dtype=np.int64)
+        candidates = find_in_view(bounds) if small.any() else []
+        if len(candidates):
+            shift = self.max_zoom - 1 - zoom
+            point_keys = ((self.ix[candidates] >> shift) << 32) | (self.iy[candidates] >> shift)
+            small_keys = (level['cx'][small] << 32) | level['cy'][small]
+            leaves = candidates[np.isin(point_keys, small_keys)]
+        
+        clusters = [
+            {
+                'lat': float(level['lat'][i]),
+                'lon': float(level['lon'][i]),
+                'count': int(level['count'][i]),
+                'breakdown': {
+                    col: [(label, int(n)) for label, n in zip(self.breakdown_labels[col], level['breakdown'][col][i]) if n > 0]
+                    for col in self.breakdown_labels
+                }
+            }
+            for i in large
+        ]
+        return clusters, leaves
+
+# 검색 조건/클러스터링 반경별 클러스터 계층 (세션 간 공유, 최근 항목만 유지)
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_cluster_hierarchy(dataset_version, filter_key, cluster_radius, _filtered_df):
+    return ClusterHierarchy(_filtered_df, cluster_radius)
+
+# 클러스터 툴팁 HTML (기업 수 + 컬럼별 분포 상위 5개)
+def cluster_tooltip_html(cluster):
+    lines = [f"<b>{cluster['count']:,}개 기업</b>"]
+    for col, items in cluster['breakdown'].items():
+        if items:
+            shown = ' · '.join(f"{html.escape(str(label))} {n:,}" for label, n in items[:5])
+            more = f" 외 {len(items) - 5}개" if len(items) > 5 else ""
+            lines.append(f"{col}: {shown}{more}")
+    return '<br>'.join(lines)
+
+# 서버에서 계산한 클러스터(중심, 기업 수)를 그리는 레이어 - 클릭하면 확대해서 하위 클러스터 요청
+class ServerClusterLayer(Layer):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var clusters = {{ this.clusters_json }};
+                var layer = L.featureGroup();
+                for (var i = 0; i < clusters.length; i++) {
+                    var c = clusters[i];  // [위도, 경도, 기업 수, 툴팁]
+                    var size = c[2] < 100 ? 'small' : (c[2] < 1000 ? 'medium' : 'large');
+                    var marker = L.marker([c[0], c[1]], {
+                        icon: L.divIcon({
+                            html: '<div><span>' + c[2].toLocaleString() + '</span></div>',
+                            className: 'marker-cluster marker-cluster-' + size,
+                            iconSize: new L.Point(40, 40)
+                        })
+                    });
+                    marker.bindTooltip(c[3]);
+                    marker.on('click', function(e) {
+                        var map = e.target._map;
+                        map.setView(e.latlng, Math.min(map.getZoom() + 2, {{ this.max_zoom }}));
+                    });
+                    layer.addLayer(marker);
+                }
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}
+        """)
+    
+    def __init__(self, clusters, max_zoom=SERVER_CLUSTER_MAX_ZOOM, name=None):
+        super().__init__(name=name)
+        self._name = "ServerClusterLayer"
+        self.max_zoom = max_zoom
+        self.clusters_json = to_script_json([
+            [round(c['lat'], 6), round(c['lon'], 6), c['count'], cluster_tooltip_html(c)] for c in clusters
+        ])
+
+# 화면 영역 조회: 영역(남, 서, 북, 동)과 줌 → 클러스터 목록 + 개별 기업 번호
+# 영역 안의 기업은 공간 인덱스로 찾아서 검색 결과 크기와 관계없이 화면에 보이는 만큼만 처리
+def query_viewport(hierarchy, spatial_index, bounds, zoom, min_cluster_size=2):
+    clusters, leaves = hierarchy.query(
+        bounds, zoom, min_cluster_size or 2,
+        find_in_view=lambda b: hierarchy.local_positions(spatial_index.query_bbox(b))
+    )
+    return {'zoom': zoom, 'bounds': bounds, 'clusters': clusters, 'rows': leaves}
+
+# 현재 화면에 해당하는 클러스터 + 개별 기업 → st_folium에 동적으로 추가할 레이어 그룹
+def build_viewport_layers(filtered_df, hierarchy, spatial_index, bounds, zoom, min_cluster_size, color_by, marker_style):
+    viewport = query_viewport(hierarchy, spatial_index, bounds, zoom, min_cluster_size)
+    clusters, leaves = viewport['clusters'], viewport['rows']
+    
+    feature_group = folium.FeatureGroup(name="서버 클러스터")
+    ServerClusterLayer(clusters).add_to(feature_group)
+    if len(leaves):
+        leaf_df = filtered_df.iloc[leaves]
+        palette = MarkerPalette(filtered_df, color_by, icons=marker_style == '기본 마커')  # 색상은 전체 검색 결과 기준
+        build_marker_layer(
+            leaf_df, palette, marker_style,
+            use_clustering=False, cluster_radius=None, min_cluster_size=None, inline_data=True, rows=leaves
+        ).add_to(feature_group)
+    return feature_group, len(clusters), len(leaves)
+
+# ===== 밀도 지도 (검색 결과가 많을 때) =====
+# 검색 결과가 이 수를 넘으면 밀도 지도로 자동 전환 (0이면 자동 전환 안 함)
+DENSITY_AUTO_THRESHOLD = int(os.environ.get('COMPANY_MAP_DENSITY_THRESHOLD', '5000'))
+
+# 육각형 크기 (처음 화면의 줌 레벨에서 중심~꼭짓점 픽셀)
+DENSITY_HEX_PIXELS = 12
+
+# 밀도 지도 색상 구분 기준 (화면 표시명 → 마커 색상 기준, 없으면 기업 수로 색상 구분)
+DENSITY_SPLIT_OPTIONS = {
+    '기업 수': None,
+    '기업 규모': '기업 규모',
+    '신용등급': '신용등급'
+}
+
+# 기업 수 색상 단계 (적음 → 많음)
+DENSITY_COLORS = ['#ffffb2', '#fed976', '#feb24c', '#fd8d3c', '#f03b20', '#bd0026']
+
+# 정규 좌표 → 육각형 격자 축 좌표 (q, r) - 꼭짓점이 위를 향하는 육각형, size는 중심~꼭짓점 거리
+def hex_axial(x, y, size):
+    q = (np.sqrt(3) / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+    # 큐브 좌표 반올림: 반올림 오차가 가장 큰 축을 나머지 두 축으로 다시 계산
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+# 검색 결과 → 육각형별 기업 수 + 분포 (분포 컬럼 값별 기업 수 행렬)
+def hexbin_companies(filtered_df, size, breakdown_columns=CLUSTER_BREAKDOWN_COLUMNS, counted=None):
+    counted = {} if counted is None else counted
+    x, y = mercator_xy(filtered_df['latitude'].to_numpy(), filtered_df['longitude'].to_numpy())
+    q, r = hex_axial(x, y, size)
+    keys = (q - q.min()) * (r.max() - r.min() + 1) + (r - r.min()) if len(q) else q
+    unique_keys, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    
+    bins = {'q': q[first], 'r': r[first], 'counts': counts, 'breakdown': {}}
+    for col, sort_key in breakdown_columns:
+        if col not in filtered_df.columns:
+            continue
+        if col not in counted:
+            counted[col] = column_value_counts(filtered_df[col])
+        values, _, codes = counted[col]
+        valid = codes >= 0
+        matrix = np.bincount(inverse[valid] * len(values) + codes[valid],
+                             minlength=len(unique_keys) * len(values)).reshape(len(unique_keys), len(values))
+        bins['breakdown'][col] = (values, matrix, sort_key)
+    return bins
+
+# 육각형 하나의 분포 → [(값, 기업 수), ...] (기업 수가 있는 값만, 정렬 기준 순서)
+def hex_breakdown_items(values, row, sort_key):
+    items = [(value, int(n)) for value, n in zip(values, row) if n]
+    return sorted(items, key=lambda item: sort_key(item[0]))
+
+# 육각형 격자를 그리는 레이어 (육각형 좌표/색상/툴팁만 전송, 꼭짓점은 브라우저에서 계산)
+# 전송 크기는 기업 수가 아니라 육각형 수에 비례
+class DensityHexLayer(Layer):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var data = {{ this.data_json }};
+                var size = data.size, colors = data.colors, SQRT3 = Math.sqrt(3);
+                var renderer = L.canvas();
+                var layer = L.featureGroup();
+                // 정규 좌표(줌 0 기준 0~1) → 위도/경도
+                function toLatLng(x, y) {
+                    return L.CRS.EPSG3857.pointToLatLng(L.point(x * 256, y * 256), 0);
+                }
+                for (var i = 0; i < data.hexes.length; i++) {
+                    var h = data.hexes[i];  // [q, r, 색상 번호, 투명도, 툴팁]
+                    var cx = size * (SQRT3 * h[0] + SQRT3 / 2 * h[1]), cy = size * 1.5 * h[1];
+                    var corners = [];
+                    for (var k = 0; k < 6; k++) {
+                        var angle = Math.PI / 180 * (60 * k - 30);
+                        corners.push(toLatLng(cx + size * Math.cos(angle), cy + size * Math.sin(angle)));
+                    }
+                    L.polygon(corners, {
+                        renderer: renderer, weight: 0.5, color: colors[h[2]],
+                        fillColor: colors[h[2]], fillOpacity: h[3]
+                    }).bindTooltip(h[4]).addTo(layer);
+                }
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}
+        """)
+    
+    def __init__(self, size, hexes, colors, name=None):
+        super().__init__(name=name)
+        self._name = "DensityHexLayer"
+        self.data_json = to_script_json({'size': size, 'colors': colors, 'hexes': hexes})
+
+# 기업 수 색상 단계 레전드
+def add_density_legend(m, max_count):
+    steps = len(DENSITY_COLORS)
+    legend_html = """
+    <div style="position: fixed; bottom: 50px; left: 50px; z-index: 1000; background-color: white; padding: 10px; border: 1px solid grey; border-radius: 5px; max-width: 200px;">
+        <p style="text-align: center; margin-bottom: 5px;"><b>기업 수</b></p>
+    """
+    for level, color in enumerate(DENSITY_COLORS):
+        low = int(np.ceil(max_count ** (level / steps))) if level else 1
+        high = int(np.floor(max_count ** ((level + 1) / steps)))
+        if high < low:
+            continue
+        legend_html += f"""
+        <div style="display: flex; align-items: center; margin-bottom: 3px;">
+            <span style="background-color: {color}; width: 15px; height: 15px; display: inline-block; margin-right: 5px;"></span>
+            <span style="font-size: 12px;">{low:,}{'' if high == low else f' ~ {high:,}'}</span>
+        </div>
+        """
+    legend_html += '</div>'
+    m.get_root().html.add_child(folium.Element(legend_html))
+
+# 검색 결과 → 밀도 지도 (육각형별 기업 수, split_by 기준이 있으면 가장 많은 값의 색상으로 표시)
+def build_density_map(filtered_df, selected_region, selected_district, selected_style, split_by='기업 수', proximity=None):
+    m = create_base_map(filtered_df, selected_region, selected_district, selected_style, proximity)
+    if proximity is not None:
+        add_radius_overlay(m, proximity)
+    
+    # 색상 구분 컬럼(기업규모구분/신용등급)은 툴팁 분포 컬럼과 같으므로 분포 행렬을 그대로 사용
+    color_by = DENSITY_SPLIT_OPTIONS.get(split_by)
+    counted = {}  # 색상 구분 컬럼 집계를 육각형 분포 계산과 공유
+    palette = MarkerPalette(filtered_df, color_by, icons=False, counted=counted)
+    color_field, color_map = palette.field, palette.color_map()
+    
+    with perf_stage('build_density', rows_in=len(filtered_df)) as record:
+        size = DENSITY_HEX_PIXELS / (256 * 2 ** m.options.get('zoom', 7))
+        bins = hexbin_companies(filtered_df, size, counted=counted)
+        counts = bins['counts']
+        record['bins'] = len(counts)
+        
+        # 기업 수는 로그 단계로 (한 육각형에 몰린 지역이 있어도 나머지가 구분되도록)
+        max_count = int(counts.max()) if len(counts) else 1
+        scale = np.log(counts) / np.log(max_count) if max_count > 1 else np.ones(len(counts))
+        if color_field in bins['breakdown']:
+            values, matrix, _ = bins['breakdown'][color_field]
+            colors = list(dict.fromkeys(list(color_map.values()) + ['gray']))
+            value_colors = np.array([colors.index(color_map.get(v, 'gray')) for v in values] + [colors.index('gray')])
+            dominant = np.where(matrix.sum(axis=1) > 0, matrix.argmax(axis=1), len(values)) if len(values) else np.full(len(counts), 0)
+            color_codes = value_colors[dominant]
+            opacity = 0.3 + 0.5 * scale
+        else:
+            colors = DENSITY_COLORS
+            color_codes = np.minimum((scale * len(colors)).astype(int), len(colors) - 1)
+            opacity = np.full(len(counts), 0.7)
+        
+        hexes = []
+        for i in range(len(counts)):
+            breakdown = {col: hex_breakdown_items(values, matrix[i], sort_key)
+                         for col, (values, matrix, sort_key) in bins['breakdown'].items()}
+            hexes.append([int(bins['q'][i]), int(bins['r'][i]), int(color_codes[i]), round(float(opacity[i]), 2),
+                          cluster_tooltip_html({'count': int(counts[i]), 'breakdown': breakdown})])
+        DensityHexLayer(size, hexes, colors, name="기업 밀도").add_to(m)
+    
+    with perf_stage('build_legends'):
+        if color_field in bins['breakdown']:
+            add_map_legends(m, palette, '밀도 지도')
+        else:
+            add_density_legend(m, max_count)
+    
+    folium.LayerControl().add_to(m)
+    return m
+
+# 렌더링된 지도 HTML 캐시 최대 크기 (바이트)
+MAP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# 렌더링된 지도 HTML LRU 캐시 (세션 간 공유, 메모리 사용량 기준으로 제한)
+class RenderedMapCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # 키 → (HTML, 바이트 수), 오래 사용하지 않은 항목이 앞쪽
+        self.total_bytes = 0
+        self.dataset_version = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, map_html):
+        size = sys.getsizeof(map_html)
+        if size > self.max_bytes:
+            return  # 캐시 전체보다 큰 지도는 저장하지 않음
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (map_html, size)
+            self.total_bytes += size
+            # 한도를 넘으면 가장 오래 사용하지 않은 지도부터 제거
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+    
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+    
+    # 데이터 버전이 바뀌면 이전 버전으로 렌더링한 지도 모두 제거
+    def retain_version(self, dataset_version):
+        with self.lock:
+            if self.dataset_version != dataset_version:
+                self.entries.clear()
+                self.total_bytes = 0
+                self.dataset_version = dataset_version
+
+# 세션 간 공유되는 지도 캐시 (프로세스당 1개)
+@st.cache_resource(show_spinner=False)
+def get_map_cache():
+    return RenderedMapCache(MAP_CACHE_MAX_BYTES)
+
+# folium 지도 → 완성된 HTML 문서
+def render_map_html(m):
+    return m.get_root().render()
+
+# 지도 캐시 키 (검색 조건 + 지도 모양에 영향을 주는 시각화 옵션, 밀도 지도는 마커 옵션과 무관)
+def result_map_key(dataset_version, filter_key, map_options):
+    if map_options['use_density']:
+        return (dataset_version, filter_key, map_options['selected_style'], '밀도 지도', map_options['density_split'])
+    key = (dataset_version, filter_key) + tuple(map_options[key] for key in (
+        'selected_style', 'marker_style', 'use_clustering', 'cluster_radius', 'min_cluster_size', 'color_by'
+    ))
+    # 담당 거점 색상은 거점 파일이 바뀌면 달라짐
+    depots = map_options.get('depots')
+    return key + (depots.signature,) if depots is not None else key
+
+# 검색 결과 + 시각화 옵션 → 지도 HTML (밀도 지도 또는 마커 지도)
+def build_result_map_html(filtered_df, selected_region, selected_district, map_options, proximity=None):
+    if map_options['use_density']:
+        m = build_density_map(
+            filtered_df, selected_region, selected_district, map_options['selected_style'],
+            split_by=map_options['density_split'], proximity=proximity
+        )
+    else:
+        m = build_company_map(
+            filtered_df,
+            selected_region=selected_region,
+            selected_district=selected_district,
+            selected_style=map_options['selected_style'],
+            marker_style=map_options['marker_style'],
+            use_clustering=map_options['use_clustering'],
+            cluster_radius=map_options['cluster_radius'],
+            min_cluster_size=map_options['min_cluster_size'],
+            color_by=map_options['color_by'],
+            proximity=proximity,
+            depots=map_options.get('depots')
+        )
+    with perf_stage('render_html') as record:
+        map_html = render_map_html(m)
+        record['html_bytes'] = len(map_html.encode('utf-8'))
+    return map_html
+
+# 서버 클러스터 지도 표시
+# 기본 지도(타일)는 그대로 두고, 지도를 이동/확대하면 st_folium이 돌려준 화면 영역과 줌으로
+# 해당 영역의 클러스터/개별 기업만 다시 계산해 레이어 그룹으로 교체
+def show_server_cluster_map(filtered_df, spatial_index, dataset_version, filter_key, selected_region, selected_district,
+                            selected_style, marker_style, cluster_radius, min_cluster_size, color_by, proximity=None,
+                            depots=None):
+    m = create_base_map(filtered_df, selected_region, selected_district, selected_style, proximity)
+    if proximity is not None:
+        add_radius_overlay(m, proximity)
+    if depots is not None:
+        add_depot_markers(m, depots)
+    
+    # 검색 조건이나 지도 스타일이 바뀌면 초기 화면(지도 중심/줌)부터 다시 시작
+    view_key = (dataset_version, filter_key, selected_style)
+    view = st.session_state.get('server_cluster_view')
+    if view is None or view['key'] != view_key:
+        zoom = m.options['zoom']
+        view = {'key': view_key, 'zoom': zoom, 'bounds': viewport_bounds(m.location[0], m.location[1], zoom)}
+        st.session_state.server_cluster_view = view
+    
+    with st.spinner("클러스터를 계산하고 있습니다..."):
+        with perf_stage('cluster_hierarchy', rows_in=len(filtered_df)):
+            hierarchy = get_cluster_hierarchy(dataset_version, filter_key, cluster_radius, filtered_df)
+        with perf_stage('viewport_layers', zoom=view['zoom']) as record:
+            feature_group, n_clusters, n_leaves = build_viewport_layers(
+                filtered_df, hierarchy, spatial_index, pad_bounds(view['bounds']), view['zoom'],
+                min_cluster_size, color_by, marker_style
+            )
+            record.update(clusters=n_clusters, rows_out=n_leaves)
+    
+    with perf_stage('st_folium'):
+        result = st_folium(
+            m, key="server_cluster_map", width=MAP_WIDTH, height=MAP_HEIGHT,
+            returned_objects=['zoom', 'bounds'], feature_group_to_add=feature_group
+        )
+    st.caption(f"현재 화면: 클러스터 {n_clusters:,}개, 개별 기업 {n_leaves:,}개 (전체 {len(filtered_df):,}개)")
+    
+    # 화면 영역이 바뀌었으면 저장 후 다시 실행해서 새 영역의 클러스터 표시
+    bounds = (result or {}).get('bounds') or {}
+    south_west, north_east = bounds.get('_southWest') or {}, bounds.get('_northEast') or {}
+    if south_west.get('lat') is not None and north_east.get('lat') is not None and result.get('zoom') is not None:
+        new_bounds = (south_west['lat'], south_west['lng'], north_east['lat'], north_east['lng'])
+        # 화면이 그려지기 전 기본값(지도에 추가한 요소의 범위, 면적 0일 수 있음)은 무시
+        degenerate = new_bounds[0] >= new_bounds[2] or new_bounds[1] >= new_bounds[3]
+        if not degenerate and (new_bounds != view['bounds'] or result['zoom'] != view['zoom']):
+            st.session_state.server_cluster_view = {'key': view_key, 'zoom': result['zoom'], 'bounds': new_bounds}
+            st.rerun()
+
+# 검색 조건 → 결과 식별 키 (지도/정렬/내보내기 캐시 키에 사용)
+def search_filter_key(facet_selections, search_term, search_mode, search_fields, proximity):
+    return (
+        facet_selections['시도'], facet_selections['시군구'], facet_selections['기업규모구분'], facet_selections['신용등급'],
+        search_term, search_mode, tuple(search_fields),
+        proximity
+    )
+
+# 반경 검색은 시도/시군구 경계와 관계없이 기준 위치 주변에서 찾음 (기업규모/신용등급/통합검색 조건만 함께 적용)
+def radius_selections(selections):
+    return {**selections, '시도': '전체', '시군구': '전체'}
+
+# 필터 선택 + 통합검색어 + 반경 조건 → (행 위치, 반경 검색이면 행별 거리 아니면 None)
+# radius: (위도, 경도, 반경 km), 있으면 가까운 순 (시도/시군구 조건은 적용하지 않음)
+def query_positions(snapshot, selections, text_query='', search_mode='literal', search_fields=None, radius=None):
+    if radius is not None:
+        selections = radius_selections(selections)
+    
+    # SQL 백엔드: 필터/검색어/반경 조건을 매개변수 쿼리 한 번으로 처리하고 결과 행 위치만 받음
+    if snapshot.sql_backend is not None:
+        with perf_stage('sql_query', rows_in=len(snapshot.df)) as record:
+            positions, distances = snapshot.sql_backend.query(selections, text_query, search_mode, search_fields, radius=radius)
+            record['rows_out'] = len(positions)
+        return positions, distances
+    
+    with perf_stage('filter', rows_in=len(snapshot.df)) as record:
+        positions = snapshot.facet_index.filter(selections)
+        record['rows_out'] = len(positions)
+    
+    # 통합 검색어 적용 (n-gram 인덱스 조회, 입력값은 정규식이 아닌 문자열로 처리)
+    if text_query:
+        with perf_stage('search', rows_in=len(positions)) as record:
+            hits = snapshot.search_index.search(text_query, mode=search_mode, fields=search_fields)
+            positions = np.intersect1d(positions, hits, assume_unique=True)
+            record['rows_out'] = len(positions)
+    
+    # 반경 검색: 기준 위치 주변 기업 중 위 조건을 만족하는 기업만 가까운 순으로
+    if radius is None:
+        return positions, None
+    with perf_stage('radius_search', rows_in=len(positions)) as record:
+        near, distances = snapshot.spatial_index.query_radius(*radius)
+        keep = np.isin(near, positions, assume_unique=True)
+        record['rows_out'] = int(np.count_nonzero(keep))
+    return near[keep], distances[keep]
+
+# 세션에 저장된 검색 결과(행 위치) → 공유 데이터에서 해당 행만 꺼낸 데이터프레임
+def result_frame(df, search_result):
+    filtered_df = df.iloc[search_result['positions']]
+    if search_result['distances'] is not None:
+        filtered_df = filtered_df.assign(**{'거리(km)': np.round(search_result['distances'], 2)})
+    return filtered_df
+
+# 필터 선택 상자 (선택지 옆에 다른 선택 조건 기준 기업 수 표시, 예: "강남구 (1,234)")
+# 기업 수가 바뀌면 선택지 표시가 달라져 위젯이 새로 만들어지므로, 이전 선택값을 index로 넘겨 유지
+def facet_selectbox(label, catalog, column, options, selections, first_option='전체', first_label=None, key=None):
+    counts, total = catalog.counts(column, selections)
+    options = [first_option] + options
+    previous = selections.get(column, first_option)
+    index = options.index(previous) if previous in options else 0
+    
+    def format_option(value):
+        if value == first_option:
+            return first_label or f"{value} ({total:,})"
+        return f"{value} ({counts.get(value, 0):,})"
+    
+    return st.selectbox(label, options, index=index, format_func=format_option, key=key)
+
+# 사이드바 데이터 버전/갱신 상태 표시
+def show_dataset_status(snapshot, warmer):
+    store = get_dataset_store()
+    status = f"데이터: {len(snapshot.df):,}개 기업 (버전 {snapshot.version})"
+    dropped = snapshot.df.attrs.get('dropped_rows')
+    if dropped:
+        status += f" · 제외: 좌표 없음 {dropped['missing_coords']:,} / 한국 범위 밖 {dropped['outside_korea']:,}"
+    geocoded = snapshot.df.attrs.get('geocoded_rows')
+    if geocoded and geocoded['resolved']:
+        status += f" · 주소로 좌표 보완 {geocoded['resolved']:,}"
+    if warmer is not None and warmer.progress is not None:
+        status += f" · 자주 찾는 지역 지도 준비 중 ({warmer.progress[0]}/{warmer.progress[1]})"
+    if store.refreshing:
+        status += " · 새 원본 파일 반영 중..."
+    elif store.last_refresh and 'error' in store.last_refresh:
+        status += f" · 갱신 실패: {store.last_refresh['error']}"
+    elif store.last_refresh:
+        r = store.last_refresh
+        status += f" · 최근 갱신: {r['rows']:,}개 기업으로 다시 불러옴 ({r['seconds']}초)"
+    st.sidebar.caption(status)
+    
+    # 컬럼별 메모리 (로드 시 타입 압축 전/후)
+    with st.sidebar.expander("메모리 사용량"):
+        total = snapshot.memory_report.loc['합계']
+        if pd.notna(total['압축 전 MB']):
+            st.caption(f"{total['압축 전 MB']:,.1f} MB → {total['MB']:,.1f} MB")
+        st.dataframe(snapshot.memory_report, use_container_width=True)
+
+# 검색 결과 테이블/내보내기 파일에 표시할 컬럼들 (지정된 순서대로)
+RESULT_COLUMNS = ['거리(km)', '한글업체명', '기업규모구분', '업종명', '업태명', '주요상품내역', 
+                  '산업코드 대분류', '산업코드 세세분류', '신용등급', '현금흐름등급',
+                  '한글지번주소', '전화번호', '사업자등록번호', '한글주소']
+
+# ===== 검색 결과 테이블 / 내보내기 =====
+# 결과 테이블 한 페이지 행 수 선택지 (현재 페이지의 행만 브라우저로 전송)
+RESULT_PAGE_SIZES = [50, 100, 500, 1000]
+
+# 내보내기 파일을 쓸 때 한 번에 변환하는 행 수 (전체 결과를 한 번에 문자열/테이블로 만들지 않음)
+EXPORT_CHUNK_ROWS = 50_000
+
+# 내보내기 형식 → (확장자, MIME 타입)
+EXPORT_FORMATS = {'CSV': ('csv', 'text/csv'), 'Parquet': ('parquet', 'application/vnd.apache.parquet')}
+
+# 보관할 내보내기 파일 수 (오래된 파일부터 삭제)
+EXPORT_MAX_FILES = 20
+
+# 만들거나 화면에 표시한 뒤 이 시간(초)이 지나지 않은 파일은 삭제하지 않음 (다른 세션이 받으려는 파일일 수 있음)
+EXPORT_GRACE_SECONDS = 15 * 60
+
+# 브라우저로 받을 수 있는 최대 파일 크기 (MB)
+# Streamlit 1.32의 download_button은 파일 전체를 서버 메모리에 올린 뒤 보내므로 (스트리밍 아님)
+# 이보다 큰 결과는 다운로드 버튼 대신 한도 안내만 표시 (만든 파일의 서버 경로는 서버 로그에만 기록)
+EXPORT_DOWNLOAD_MAX_MB = int(os.environ.get('COMPANY_MAP_EXPORT_MAX_MB', '200'))
+
+# 내보내기 서버 로그 (파일 경로는 화면에 표시하지 않음)
+export_logger = logging.getLogger('company_map.export')
+
+# 결과 테이블 정렬 순서 (검색 결과 안에서의 행 위치, 값이 없는 행은 맨 뒤)
+def result_sort_order(filtered_df, column, ascending=True):
+    if column is None:
+        return np.arange(len(filtered_df))
+    values = filtered_df[column].reset_index(drop=True)  # 정렬할 컬럼 하나만 복사
+    return values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+
+# 검색 결과를 CSV/Parquet 파일로 저장 (정렬 순서대로 EXPORT_CHUNK_ROWS 행씩 나눠서 변환)
+def write_result_file(filtered_df, columns, path, file_format, order=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    order = np.arange(len(filtered_df)) if order is None else order
+    tmp_path = temp_file_path(path)  # 같은 파일을 여러 세션/프로세스가 동시에 만들 수 있음
+    if file_format == 'CSV':
+        with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:  # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+            for start in range(0, max(len(order), 1), chunk_rows):
+                chunk = filtered_df.iloc[order[start:start + chunk_rows]][columns]
+                chunk.to_csv(f, index=False, header=start == 0)
+    else:
+        writer = None
+        try:
+            for start in range(0, max(len(order), 1), chunk_rows):
+                chunk = filtered_df.iloc[order[start:start + chunk_rows]][columns]
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)  # 청크 하나가 row group 하나
+        finally:
+            if writer is not None:
+                writer.close()
+    os.replace(tmp_path, path)
+
+# 검색 조건 + 정렬 + 형식별 내보내기 파일 경로 (같은 조건이면 세션 간 재사용)
+def export_file_path(dataset_version, export_key, file_format):
+    digest = hashlib.sha256(repr(export_key).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, 'exports', f"result.{dataset_version}.{digest}.{EXPORT_FORMATS[file_format][0]}")
+
+# 다른 데이터 버전의 내보내기 파일 + 오래된 파일 삭제 (유예 시간이 지난 파일만)
+def remove_stale_exports(dataset_version):
+    export_dir = os.path.join(CACHE_DIR, 'exports')
+    mtimes = {}
+    for name in os.listdir(export_dir):
+        if name.endswith('.tmp'):
+            continue
+        path = os.path.join(export_dir, name)
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except OSError:
+            pass  # 다른 세션이 먼저 삭제함
+    expired = time.time() - EXPORT_GRACE_SECONDS
+    paths = sorted(mtimes, key=mtimes.get, reverse=True)
+    for index, path in enumerate(paths):
+        if mtimes[path] > expired:
+            continue
+        if index >= EXPORT_MAX_FILES or f".{dataset_version}." not in os.path.basename(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# 검색 결과 테이블 (서버에서 정렬 후 현재 페이지만 전송) + 전체 결과 내보내기
+def show_result_table(filtered_df, dataset_version, filter_key):
+    # 표시할 컬럼들 (지정된 순서대로, 실제 있는 컬럼만)
+    display_cols = [col for col in RESULT_COLUMNS if col in filtered_df.columns]
+    
+    sort_col, direction_col, size_col, page_col = st.columns([3, 2, 2, 2])
+    sort_column = sort_col.selectbox("정렬 기준", ['기본 순서'] + display_cols)
+    direction = direction_col.radio("정렬 방향", ['오름차순', '내림차순'], horizontal=True)
+    page_size = size_col.selectbox("페이지당 행 수", RESULT_PAGE_SIZES, index=1)
+    page_count = max(1, -(-len(filtered_df) // page_size))
+    page = page_col.number_input(f"페이지 (전체 {page_count:,})", min_value=1, max_value=page_count, value=1)
+    
+    # 정렬 순서는 검색 조건/정렬 기준이 바뀔 때만 다시 계산 (페이지 이동 시 재사용)
+    sort_key = (dataset_version, filter_key, sort_column, direction)
+    cached = st.session_state.result_order
+    if cached is None or cached['key'] != sort_key:
+        with perf_stage('sort_results', rows_in=len(filtered_df), column=sort_column):
+            order = result_sort_order(filtered_df, None if sort_column == '기본 순서' else sort_column,
+                                      ascending=direction == '오름차순')
+        st.session_state.result_order = cached = {'key': sort_key, 'order': order}
+    order = cached['order']
+    
+    # 사업자등록번호 등은 로드 시 이미 정리되어 있으므로 그대로 표시
+    start = (page - 1) * page_size
+    with perf_stage('result_table', rows_in=len(filtered_df)) as record:
+        page_df = filtered_df.iloc[order[start:start + page_size]][display_cols]
+        record['rows_out'] = len(page_df)
+        st.caption(f"{len(filtered_df):,}개 중 {start + 1:,}-{start + len(page_df):,}번째")
+        st.dataframe(page_df, use_container_width=True)
+    
+    # 전체 결과 내보내기 (현재 정렬 순서, 파일은 요청할 때 청크 단위로 생성)
+    format_col, button_col = st.columns([3, 6])
+    file_format = format_col.radio("내보내기 형식", list(EXPORT_FORMATS.keys()), horizontal=True)
+    path = export_file_path(dataset_version, sort_key, file_format)
+    extension, mime = EXPORT_FORMATS[file_format]
+    if not os.path.exists(path) and button_col.button(f"{file_format} 파일 만들기 ({len(filtered_df):,}행)"):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        remove_stale_exports(dataset_version)
+        with st.spinner("내보내기 파일을 만들고 있습니다..."):
+            with perf_stage('export_file', rows_in=len(filtered_df), format=file_format) as record:
+                write_result_file(filtered_df, display_cols, path, file_format, order=order)
+                record['bytes'] = os.path.getsize(path)
+        if record['bytes'] > EXPORT_DOWNLOAD_MAX_MB * 1024 * 1024:
+            export_logger.warning("내보내기 파일이 다운로드 한도(%s MB)를 넘음: %s (%s bytes)",
+                                  EXPORT_DOWNLOAD_MAX_MB, os.path.abspath(path), record['bytes'])
+    try:
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        if size_mb > EXPORT_DOWNLOAD_MAX_MB:
+            button_col.warning(f"파일이 {size_mb:,.0f} MB로 다운로드 한도({EXPORT_DOWNLOAD_MAX_MB:,} MB)를 넘습니다. "
+                               "검색 조건을 좁혀서 다시 내보내 주세요.")
+        else:
+            with open(path, 'rb') as f:
+                button_col.download_button(
+                    f"⬇ {file_format} 다운로드 ({size_mb:,.1f} MB)", f,
+                    file_name=f"검색결과.{extension}", mime=mime
+                )
+        os.utime(path)  # 화면에 표시한 파일은 유예 시간 동안 다른 세션의 정리 대상에서 제외
+    except FileNotFoundError:
+        pass  # 아직 만들지 않았거나 다른 세션이 정리한 파일 (다음 실행에서 다시 만들 수 있음)
+
+# ===== 시작 시 캐시 준비 =====
+# 미리 지도를 만들 시도 목록 (쉼표로 구분, 비어 있으면 검색 기록에서 자주 찾은 시도)
+WARMUP_REGIONS = [region.strip() for region in os.environ.get('COMPANY_MAP_WARMUP_REGIONS', '').split(',') if region.strip()]
+
+# 검색 기록에서 고를 시도 수 (0이고 시도 목록도 없으면 미리 준비하지 않음)
+WARMUP_TOP_REGIONS = int(os.environ.get('COMPANY_MAP_WARMUP_TOP', '5'))
+
+# 사이드바 지도 옵션 기본값 (미리 만든 지도가 시도만 선택하고 검색한 첫 화면과 같은 캐시 키가 되도록 위젯 기본값으로도 사용)
+DEFAULT_MAP_OPTIONS = {
+    'selected_style': list(TILE_OPTIONS.keys())[0], 'marker_style': '기본 마커', 'use_clustering': True,
+    'cluster_radius': 50, 'min_cluster_size': 2, 'color_by': '기업 규모', 'density_split': '기업 수'
+}
+
+# 시도별 검색 횟수 (캐시 폴더에 저장해서 재시작/재배포 후에도 유지)
+class QueryStats:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.counts = json.load(f)
+        except (OSError, ValueError):
+            self.counts = {}
+    
+    def record(self, region):
+        with self.lock:
+            self.counts[region] = self.counts.get(region, 0) + 1
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = temp_file_path(self.path)  # 여러 서버 프로세스가 같은 파일에 기록
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.counts, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass  # 기록 실패는 검색에 영향 없음 (메모리의 횟수는 유지)
+    
+    # 많이 검색한 시도부터 n개
+    def top(self, n):
+        with self.lock:
+            return sorted(self.counts, key=self.counts.get, reverse=True)[:n]
+
+# 세션 간 공유되는 검색 기록 (프로세스당 1개)
+@st.cache_resource(show_spinner=False)
+def get_query_stats():
+    return QueryStats(os.path.join(CACHE_DIR, 'query_stats.json'))
+
+# 미리 준비할 시도: 설정한 목록 → 검색 기록 상위 → (기록이 없으면) 기업 수가 많은 시도
+def warmup_regions(snapshot, stats, n=WARMUP_TOP_REGIONS):
+    catalog = snapshot.facet_catalog
+    regions = WARMUP_REGIONS or stats.top(n)
+    if not regions and '시도' in catalog.totals:
+        order = np.argsort(-catalog.totals['시도'], kind='stable')[:n]
+        regions = [catalog.values['시도'][code] for code in order]
+    known = set(catalog.options.get('시도', []))
+    return [region for region in regions if region in known]
+
+# 시도만 선택하고 검색한 첫 화면(필터 결과 + 기본 옵션 지도)을 계산해서 지도 캐시에 저장
+def warm_region(snapshot, map_cache, region):
+    facet_selections = {'시도': region, '시군구': '전체', '기업규모구분': '전체', '신용등급': '전체'}
+    positions, _ = query_positions(snapshot, facet_selections)
+    if len(positions) == 0:
+        return
+    
+    filter_key = search_filter_key(facet_selections, '', list(SEARCH_MODES.values())[0], [], None)
+    use_density = DENSITY_AUTO_THRESHOLD > 0 and len(positions) > DENSITY_AUTO_THRESHOLD
+    map_options = {**DEFAULT_MAP_OPTIONS, 'use_density': use_density}
+    map_key = result_map_key(snapshot.version, filter_key, map_options)
+    if map_key in map_cache:
+        return
+    filtered_df = snapshot.df.iloc[positions.astype(np.int32)]
+    map_cache.put(map_key, build_result_map_html(filtered_df, region, '전체', map_options))
+
+# 백그라운드 캐시 준비: 자주 찾는 시도의 결과와 지도를 미리 생성
+# 데이터 저장소/지도 캐시/검색 기록은 시작한 실행에서 받은 객체를 그대로 사용
+# (스레드에는 실행 문맥이 없으므로 st 캐시 함수를 호출하지 않음)
+# 준비 중에 들어온 요청은 평소대로 처리 (지도는 캐시에 없으면 직접 생성)
+# 원본 갱신으로 데이터 버전이 바뀌면 새 버전으로 다시 준비
+class CacheWarmer:
+    def __init__(self, store, map_cache, stats):
+        self.store = store
+        self.map_cache = map_cache
+        self.stats = stats
+        self.version = None
+        self.progress = None  # (준비한 시도 수, 전체 시도 수), 준비 중이 아니면 None
+        self.last_error = None
+        threading.Thread(target=self.run, name='cache-warmup', daemon=True).start()
+    
+    def run(self):
+        while True:
+            try:
+                if self.store.snapshot.version != self.version:
+                    self.warm()
+            except Exception as e:
+                self.last_error = str(e)
+            time.sleep(REFRESH_CHECK_SECONDS)
+    
+    def warm(self):
+        store, map_cache = self.store, self.map_cache
+        snapshot = store.snapshot
+        self.version = snapshot.version  # 실패해도 같은 버전은 다시 시도하지 않음
+        regions = warmup_regions(snapshot, self.stats)
+        map_cache.retain_version(snapshot.version)
+        recorder = PerfRecorder()
+        token = current_perf.set(recorder)
+        try:
+            for done, region in enumerate(regions):
+                self.progress = (done, len(regions))
+                if store.snapshot is not snapshot:
+                    break  # 준비 중에 새 버전으로 바뀌면 다음 확인 때 새 버전으로 다시 준비
+                with perf_stage('warm_region', region=region):
+                    warm_region(snapshot, map_cache, region)
+        finally:
+            self.progress = None
+            current_perf.reset(token)
+            recorder.log('warmup', version=snapshot.version, regions=regions)
+
+# 프로세스당 1개의 준비 스레드 (Streamlit에는 서버 시작 훅이 없으므로 데이터를 처음 불러온 실행에서 시작)
+@st.cache_resource(show_spinner=False)
+def get_cache_warmer():
+    if not WARMUP_REGIONS and WARMUP_TOP_REGIONS <= 0:
+        return None
+    return CacheWarmer(get_dataset_store(), get_map_cache(), get_query_stats())
+
+# 담당 거점별 기업 수/거리 + 기업규모 또는 신용등급 분포 표
+def show_depot_summary(assignment, catalog, positions, n_rows):
+    scope_col, column_col = st.columns(2)
+    scope = scope_col.radio("범위", ['검색 결과', '전체 데이터'], horizontal=True, key='depot_scope')
+    columns = [col for col in ['기업규모구분', '신용등급'] if col in catalog.values]
+    column = column_col.radio("구분 기준", columns, horizontal=True, key='depot_breakdown') if columns else None
+    if scope == '전체 데이터':
+        positions = np.arange(n_rows)
+    with perf_stage('depot_summary', rows_in=len(positions)):
+        table = assignment.summary(positions, catalog, column)
+    st.dataframe(table, use_container_width=True)
+
 # 메인 앱 코드
+# (모듈 import 시에는 화면을 그리지 않으므로 벤치마크 등에서 함수만 가져다 쓸 수 있음)
 def main():
+    # 페이지 설정
+    st.set_page_config(
+        page_title="AJ네트웍스 로지스 수요처 맵",
+        layout="wide"
+    )
+    init_session_state()
+    
+    # 제목
+    st.title("AJ네트웍스 로지스 수요처 맵")
+    
+    # 단계별 측정 (요청한 경우 이번 실행 전체를 프로파일링)
+    recorder = PerfRecorder()
+    token = current_perf.set(recorder)
+    try:
+        if st.session_state.pop('profile_next_run', False):
+            profile_run(run_app)
+        else:
+            run_app()
+    finally:
+        current_perf.reset(token)
+        recorder.log()
+    show_perf_panel(recorder)
+
+# 검색/필터 → 지도 → 결과 테이블
+def run_app():
     # 데이터 로드 (로딩 메시지 숨김)
-    with st.spinner("데이터를 불러오는 중..."):
-        df = load_company_data()
+    # 데이터와 필터/통합검색/공간 인덱스는 같은 버전으로 한 번에 받음 (실행 도중 데이터가 갱신되어도 섞이지 않음)
+    with st.spinner("데이터를 불러오는 중..."), perf_stage('load_data') as record:
+        snapshot = load_company_data()
+        record['rows_out'] = len(snapshot.df) if snapshot is not None else 0
     
-    if len(df) == 0:
+    if snapshot is None or len(snapshot.df) == 0:
         st.error("데이터를 로드할 수 없습니다. 파일 경로를 확인해주세요.")
         return
     
+    df = snapshot.df
+    catalog = snapshot.facet_catalog
+    search_index = snapshot.search_index
+    spatial_index = snapshot.spatial_index
+    # 첫 실행 때 백그라운드 준비 시작 (이후 실행에서는 이미 만든 준비 스레드를 그대로 사용)
+    warmer = get_cache_warmer()
+    show_dataset_status(snapshot, warmer)
+    previous = st.session_state.facet_selections  # 선택지 옆 기업 수는 마지막으로 제출한 선택 기준
+    
     # 안내 문구 제거함
     
     # ===== 상단 검색 및 필터링 옵션 =====
@@ -114,48 +3046,35 @@ def main():
         
         with cols[0]:
             # 시도 선택 (컬럼명 '시도' 사용)
-            if '시도' in df.columns and df['시도'].notna().sum() > 0:
-                regions = sorted(df['시도'].dropna().unique().tolist())  # '전체' 옵션 제거
-                # 기본값으로 빈 문자열 또는 None
-                selected_region = st.selectbox("시도", 
-                                               options=[""] + regions, 
-                                               key="sido",
-                                               format_func=lambda x: "시도를 선택하세요." if x == "" else x)
+            if catalog.options.get('시도'):
+                # 기본값으로 빈 문자열 또는 None ('전체' 옵션 없음)
+                selected_region = facet_selectbox("시도", catalog, '시도', catalog.options['시도'], previous,
+                                                  first_option="", first_label="시도를 선택하세요.", key="sido")
             else:
                 st.text("시도")
                 selected_region = ""
         
         with cols[1]:
-            # 시군구 선택 (컬럼명 '시군구' 사용)
-            if selected_region != '전체' and '시군구' in df.columns:
-                districts = ['전체'] + sorted(df[df['시도'] == selected_region]['시군구'].dropna().unique().tolist())
-                selected_district = st.selectbox("시군구", districts, key="sigungu")
+            # 시군구 선택 (선택한 시도의 시군구만)
+            if selected_region != '전체' and '시군구' in catalog.options:
+                selected_district = facet_selectbox("시군구", catalog, '시군구', catalog.children.get(selected_region, []),
+                                                    {**previous, '시도': selected_region}, key="sigungu")
             else:
                 selected_district = '전체'
                 st.selectbox("시군구", ['전체'], disabled=True)
         
         with cols[2]:
-            # 기업 규모 선택 - 정렬 순서 지정
-            if '기업규모구분' in df.columns and df['기업규모구분'].notna().sum() > 0:
-                # 기업규모 순서대로 정렬
-                company_sizes = ['전체'] + sorted(
-                    df['기업규모구분'].dropna().unique().tolist(),
-                    key=company_size_order
-                )
-                selected_size = st.selectbox("기업규모", company_sizes)
+            # 기업 규모 선택 (기업규모 순서대로 정렬)
+            if catalog.options.get('기업규모구분'):
+                selected_size = facet_selectbox("기업규모", catalog, '기업규모구분', catalog.options['기업규모구분'], previous)
             else:
                 st.text("기업규모")
                 selected_size = '전체'
         
         with cols[3]:
-            # 신용 등급 선택 - 정렬 순서 지정
-            if '신용등급' in df.columns and df['신용등급'].notna().sum() > 0:
-                # 신용등급 순서대로 정렬
-                credit_ratings = ['전체'] + sorted(
-                    df['신용등급'].dropna().unique().tolist(),
-                    key=credit_rating_order
-                )
-                selected_credit = st.selectbox("신용등급", credit_ratings)
+            # 신용 등급 선택 (신용등급 순서대로 정렬)
+            if catalog.options.get('신용등급'):
+                selected_credit = facet_selectbox("신용등급", catalog, '신용등급', catalog.options['신용등급'], previous)
             else:
                 st.text("신용등급")
                 selected_credit = '전체'
@@ -169,14 +3088,49 @@ def main():
             # 버튼과 다른 입력 필드의 높이를 맞추기 위한 레이블 추가
             st.markdown("<div style='margin-bottom: 32px;'></div>", unsafe_allow_html=True)  # 레이블 높이 보정용 공백
             search_submit = st.form_submit_button("검색", type="primary")
+        
+        # 통합검색 옵션 (검색 방식, 검색 대상 컬럼)
+        with st.expander("통합검색 옵션"):
+            option_cols = st.columns([1, 2])
+            with option_cols[0]:
+                search_mode = SEARCH_MODES[st.radio(
+                    "검색 방식", list(SEARCH_MODES.keys()), horizontal=True,
+                    help="업체명 초성/유사: 한글업체명에서 초성(예: ㅅㅅㅈㅈ)이나 오타가 있는 이름도 찾습니다 (검색 대상 선택은 무시)"
+                )]
+            with option_cols[1]:
+                search_fields = st.multiselect("검색 대상 (선택하지 않으면 전체)", list(search_index.fields))
+        
+        # 반경 검색 (기준 위치 주변 기업, 기업규모/신용등급/통합검색 조건과 함께 적용)
+        with st.expander("반경 검색"):
+            radius_cols = st.columns([1, 3, 2])
+            with radius_cols[0]:
+                use_radius = st.checkbox("반경 검색 사용", help="사용하면 시도를 선택하지 않아도 검색할 수 있습니다.")
+            with radius_cols[1]:
+                center_text = st.text_input("기준 위치", placeholder="기업명 또는 위도, 경도 (예: 37.5665, 126.9780)")
+            with radius_cols[2]:
+                radius_km = st.slider("반경 (km)", 0.5, RADIUS_MAX_KM, RADIUS_DEFAULT_KM, step=0.5)
             
     # 검색 버튼 클릭 시 필터링 실행
     if search_submit:
-        if not selected_region or selected_region == "":
+        if use_radius and not center_text.strip():
+            st.error("반경 검색의 기준 위치를 입력해주세요.")
+            st.stop()  # 실행 중단
+        elif not use_radius and (not selected_region or selected_region == ""):
             st.error("시도를 선택해주세요.")
             st.stop()  # 실행 중단
         else:
             st.session_state.search_clicked = True
+            st.session_state.search_submitted = True  # 선택지 갱신으로 다시 실행되어도 이번 제출을 기억
+    
+    # 필터 선택이 바뀌었으면 새 선택 기준의 기업 수로 선택지를 다시 그림
+    # (다음 제출 때 위젯 표시가 화면과 같아야 선택값이 유지됨)
+    facet_selections = {
+        '시도': selected_region, '시군구': selected_district, '기업규모구분': selected_size, '신용등급': selected_credit
+    }
+    if facet_selections != previous:
+        st.session_state.facet_selections = facet_selections
+        if previous:
+            st.rerun()
     
     st.markdown("<hr>", unsafe_allow_html=True)
     
@@ -185,428 +3139,184 @@ def main():
         # 로딩 상태 표시
         with st.spinner("데이터를 필터링하고 있습니다..."):
             # ===== 필터링 로직 적용 =====
-            filtered_df = df.copy()
+            # 시도/시군구, 기업규모, 신용등급 조건 (시군구는 시도를 선택한 경우에만, 반경 검색이면 시도/시군구 제외)
+            selections = {
+                '시도': selected_region,
+                '시군구': selected_district if selected_region != '전체' else '전체',
+                '기업규모구분': selected_size,
+                '신용등급': selected_credit
+            }
             
-            # 시도/시군구 필터링 (컬럼명 '시도', '시군구' 사용)
-            if selected_region != '전체' and '시도' in filtered_df.columns:
-                filtered_df = filtered_df[filtered_df['시도'] == selected_region]
-                
-                if selected_district != '전체' and '시군구' in filtered_df.columns:
-                    filtered_df = filtered_df[filtered_df['시군구'] == selected_district]
+            # 반경 검색 기준 위치 (기업명 또는 "위도, 경도")
+            center = None
+            if use_radius:
+                center = resolve_center(df, search_index, center_text)
+                if center is None:
+                    st.error(f"기준 위치 '{center_text}'을(를) 찾을 수 없습니다. 기업명 또는 위도, 경도를 입력해주세요.")
+                    st.stop()
             
-            # 기업규모 필터링
-            if selected_size != '전체' and '기업규모구분' in filtered_df.columns:
-                filtered_df = filtered_df[filtered_df['기업규모구분'] == selected_size]
+            # 업체명 초성/유사 검색은 업체명 인덱스에서 순위 순으로 찾고, 나머지 조건은 아래에서 적용
+            name_hits = None
+            if search_term and search_mode == 'name':
+                with perf_stage('name_search') as record:
+                    name_hits = snapshot.name_index.search(search_term) if snapshot.name_index else np.empty(0, dtype=np.int32)
+                    record['rows_out'] = len(name_hits)
+            text_query = search_term if name_hits is None else ''
             
-            # 신용등급 필터링
-            if selected_credit != '전체' and '신용등급' in filtered_df.columns:
-                filtered_df = filtered_df[filtered_df['신용등급'] == selected_credit]
-                
-            # 통합 검색어 적용
-            if search_term:
-                search_mask = pd.Series([False] * len(filtered_df))
-                # 다양한 열에서 검색어 찾기
-                text_columns = [col for col in filtered_df.columns if filtered_df[col].dtype == 'object']
-                for column in text_columns:
-                    search_mask = search_mask | filtered_df[column].astype(str).str.contains(search_term, case=False, na=False, regex=True)
-                filtered_df = filtered_df[search_mask]
+            positions, distances = query_positions(
+                snapshot, selections, text_query, search_mode, search_fields,
+                radius=(center[0], center[1], radius_km) if center is not None else None
+            )
             
-            # 세션 상태에 필터링 결과 저장
-            st.session_state.filtered_data = filtered_df
+            # 업체명 검색 결과와 다른 조건의 교집합 (반경 검색이면 가까운 순, 아니면 업체명 유사도 순)
+            if name_hits is not None:
+                if distances is None:
+                    positions = name_hits[np.isin(name_hits, positions, assume_unique=True)]
+                else:
+                    keep = np.isin(positions, name_hits, assume_unique=True)
+                    positions, distances = positions[keep], distances[keep]
+            proximity = (center[0], center[1], radius_km, center[2]) if center is not None else None
+            
+            # 세션 상태에는 결과 행 위치만 저장 (데이터는 모든 세션이 공유하는 한 벌만 유지)
+            st.session_state.search_result = {
+                'version': snapshot.version,
+                'positions': positions.astype(np.int32),
+                'distances': distances if proximity is not None else None
+            }
+            st.session_state.proximity = proximity
+            filter_key = search_filter_key(facet_selections if proximity is None else radius_selections(facet_selections),
+                                           search_term, search_mode, search_fields, proximity)
+            # 반경 검색이 아닌 시도 검색은 기록해 두고 다음 시작 때 자주 찾는 시도의 지도를 미리 생성
+            # (검색 버튼으로 새 조건을 제출했을 때만 - 같은 결과를 다시 그리는 실행은 기록하지 않음)
+            submitted = st.session_state.pop('search_submitted', False)
+            if submitted and proximity is None and selected_region and filter_key != st.session_state.filter_key:
+                get_query_stats().record(selected_region)
+            st.session_state.filter_key = filter_key
         
         # ===== 필터링 결과 표시 =====
-        filtered_df = st.session_state.filtered_data  # 세션 상태의 필터링 데이터 사용
+        filtered_df = result_frame(df, st.session_state.search_result)  # 세션 상태의 결과 행 위치 사용
         st.markdown(f"<h4>검색 결과: {len(filtered_df)}개의 기업 데이터</h4>", unsafe_allow_html=True)
+        if st.session_state.proximity is not None:
+            _, _, radius, label = st.session_state.proximity
+            st.caption(f"기준 위치 '{label}'에서 반경 {radius:g}km 이내, 가까운 순으로 정렬")
+        elif search_term and search_mode == 'name' and snapshot.name_index is not None:
+            suggestions = snapshot.name_index.suggest(search_term, limit=5)
+            st.caption("업체명이 비슷한 순으로 정렬" + (f" · 전체 데이터에서 비슷한 업체명: {', '.join(suggestions)}" if suggestions else ""))
         
-    elif st.session_state.filtered_data is not None:
-        # 이전 검색 결과가 있을 경우 표시
-        filtered_df = st.session_state.filtered_data
+    elif st.session_state.search_result is not None:
+        # 이전 검색 결과가 있을 경우 표시 (검색 후 데이터가 갱신되었으면 다시 검색)
+        if st.session_state.search_result['version'] != snapshot.version:
+            st.info("데이터가 갱신되었습니다. 검색 버튼을 다시 클릭해주세요.")
+            return
+        filtered_df = result_frame(df, st.session_state.search_result)
         st.markdown(f"<h4>검색 결과: {len(filtered_df)}개의 기업 데이터</h4>", unsafe_allow_html=True)
     else:
         st.info("검색 버튼을 클릭하여 데이터를 필터링하세요.")
         return
     
+    # 담당 거점 배정 (거점 파일이 있을 때만, 데이터 버전 + 거점 파일별로 한 번 계산)
+    try:
+        depot_assignment = load_depot_assignment(snapshot)
+    except (OSError, ValueError) as e:
+        depot_assignment = None
+        st.sidebar.warning(f"거점 파일을 읽을 수 없습니다: {e}")
+    
     # ===== 지도 옵션 (사이드바에 배치) =====
     st.sidebar.header("지도 시각화 옵션")
     
     # 지도 스타일 선택 (타일 속성 추가) - Google 지도 스타일 추가
-    tile_options = {
-        "Google 지도 (표준)": "https://mt1.google.com/vt/lyrs=m&x={x}&y={y}&z={z}",
-        "Google 위성 지도": "https://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}",
-        "Google 하이브리드": "https://mt1.google.com/vt/lyrs=y&x={x}&y={y}&z={z}",
-        "Google 지형도": "https://mt1.google.com/vt/lyrs=p&x={x}&y={y}&z={z}",
-        "OpenStreetMap": "OpenStreetMap",
-        "CartoDB Positron (밝은 테마)": "CartoDB positron",
-        "CartoDB Dark Matter (어두운 테마)": "CartoDB dark_matter"
-    }
+    selected_style = st.sidebar.selectbox("지도 스타일", list(TILE_OPTIONS.keys()), index=0)  # 기본값을 Google 지도로 설정
     
-    selected_style = st.sidebar.selectbox("지도 스타일", list(tile_options.keys()), index=0)  # 기본값을 Google 지도로 설정
-    
-    # 마커 스타일 선택
+    # 마커 스타일 선택 (밀도 지도: 육각형별 기업 수)
     marker_style = st.sidebar.radio(
         "마커 스타일",
-        ['기본 마커', '원형 마커']
+        ['기본 마커', '원형 마커', '밀도 지도'],
+        index=['기본 마커', '원형 마커', '밀도 지도'].index(DEFAULT_MAP_OPTIONS['marker_style'])
     )
     
-    # 클러스터링 옵션
-    use_clustering = st.sidebar.checkbox("클러스터링 사용", value=True)  # 기존대로 True 유지
-    if use_clustering:
-        cluster_radius = st.sidebar.slider("클러스터링 반경", 10, 100, 50)
-        min_cluster_size = st.sidebar.slider("최소 클러스터 크기", 2, 10, 2)
-    
-    # 마커 색상 기준 선택
-    color_options = ['기업 규모', '신용등급', '현금흐름등급', '업종명']
-    color_by = st.sidebar.radio("마커 색상 기준", color_options)
-    
-    # 색상 선택 기준에 따른 컬러맵 설정
-    if color_by == '기업 규모':
-        color_field = '기업규모구분'
-        # 기업 규모별 색상
-        company_colors = {
-            '대기업': 'red',
-            '중견기업': 'blue',
-            '중소기업': 'green',
-            '비영리단체': 'purple',  # 추가
-            '미분류': 'gray'         # 추가
-        }
-        # 데이터에 존재하는 값만 사용
-        color_map = {size: company_colors.get(size, 'gray') for size in filtered_df['기업규모구분'].dropna().unique()}
-    elif color_by == '신용등급':
-        color_field = '신용등급'
-        # 신용등급에 따른 색상 매핑 (AAA부터 D까지)
-        ratings = sorted(filtered_df['신용등급'].dropna().unique().tolist(), key=credit_rating_order)
-        # 색상 그라데이션: 높은 등급(녹색)에서 낮은 등급(빨강)으로
-        colors = ['darkgreen', 'green', 'lightgreen', 'blue', 'lightblue', 
-                 'orange', 'salmon', 'red', 'darkred', 'black']
-        color_map = {r: colors[i % len(colors)] for i, r in enumerate(ratings)}
-    elif color_by == '현금흐름등급':
-        color_field = '현금흐름등급'
-        # 현금흐름등급에 따른 색상
-        cf_ratings = sorted(filtered_df['현금흐름등급'].dropna().unique().tolist())
-        cf_colors = ['darkgreen', 'green', 'orange', 'red', 'darkred']
-        color_map = {}
-        for i, r in enumerate(cf_ratings):
-            if i < len(cf_colors):
-                color_map[r] = cf_colors[i]
-            else:
-                color_map[r] = 'gray'
-    elif color_by == '업종명':
-        color_field = '업종명'
-        # 업종별 색상 (최대 10개만 구분)
-        industries = filtered_df['업종명'].dropna().unique().tolist()
-        ind_colors = ['blue', 'red', 'green', 'purple', 'orange', 
-                     'darkblue', 'darkgreen', 'darkred', 'cadetblue', 'darkpurple']
-        color_map = {ind: ind_colors[i % len(ind_colors)] for i, ind in enumerate(industries)}
-    else:  # 기본값
-        color_field = None
-        color_map = {'default': 'blue'}
+    # 검색 결과가 많으면 밀도 지도로 자동 전환
+    density_threshold = st.sidebar.number_input(
+        "밀도 지도 자동 전환 기준 (기업 수)", min_value=0, value=DENSITY_AUTO_THRESHOLD, step=1000,
+        help="검색 결과가 이 수를 넘으면 마커 대신 밀도 지도로 표시합니다. 0이면 자동 전환하지 않습니다."
+    )
+    auto_density = marker_style != '밀도 지도' and density_threshold > 0 and len(filtered_df) > density_threshold
+    use_density = marker_style == '밀도 지도' or auto_density
+    
+    use_clustering, cluster_radius, min_cluster_size, cluster_mode = False, None, None, '브라우저'
+    color_by, density_split = None, None
+    if use_density:
+        if auto_density:
+            st.sidebar.caption(f"검색 결과가 {density_threshold:,}개를 넘어 밀도 지도로 표시합니다.")
+        density_split = st.sidebar.radio("밀도 색상 기준", list(DENSITY_SPLIT_OPTIONS.keys()),
+                                         index=list(DENSITY_SPLIT_OPTIONS.keys()).index(DEFAULT_MAP_OPTIONS['density_split']),
+                                         help="기업 규모/신용등급: 육각형 안에서 가장 많은 값의 색상으로 표시")
+    else:
+        # 클러스터링 옵션
+        use_clustering = st.sidebar.checkbox("클러스터링 사용", value=DEFAULT_MAP_OPTIONS['use_clustering'])  # 기존대로 True 유지
+        if use_clustering:
+            cluster_radius = st.sidebar.slider("클러스터링 반경", 10, 100, DEFAULT_MAP_OPTIONS['cluster_radius'])
+            min_cluster_size = st.sidebar.slider("최소 클러스터 크기", 2, 10, DEFAULT_MAP_OPTIONS['min_cluster_size'])
+            # 서버 클러스터링: 현재 화면의 클러스터만 계산해서 전송 (검색 결과가 매우 많을 때)
+            cluster_mode = st.sidebar.radio(
+                "클러스터링 방식", ['브라우저', '서버 (대용량)'],
+                help="서버 방식은 지도를 이동/확대할 때마다 현재 화면에 해당하는 클러스터만 받아옵니다."
+            )
+        
+        # 마커 색상 기준 선택
+        color_options = ['기업 규모', '신용등급', '현금흐름등급', '업종명'] + (['담당 거점'] if depot_assignment is not None else [])
+        color_by = st.sidebar.radio("마커 색상 기준", color_options, index=color_options.index(DEFAULT_MAP_OPTIONS['color_by']))
+    
+    # 담당 거점 색상: 검색 결과 행의 배정 결과만 꺼내서 컬럼으로 추가
+    depots = depot_assignment if color_by == '담당 거점' else None
+    if depots is not None:
+        filtered_df = filtered_df.assign(**{'담당 거점': depots.labels(st.session_state.search_result['positions'])})
+    map_options = {
+        'selected_style': selected_style, 'marker_style': marker_style, 'use_density': use_density,
+        'density_split': density_split, 'use_clustering': use_clustering, 'cluster_radius': cluster_radius,
+        'min_cluster_size': min_cluster_size, 'color_by': color_by, 'depots': depots
+    }
     
     # ===== 지도 생성 =====
     if not filtered_df.empty:
-        # 로딩 표시
-        with st.spinner("지도를 생성하고 있습니다..."):
-            # 지도 중심 좌표 계산
-            if len(filtered_df) == 1:  # 결과가 하나일 때
-                center_lat = filtered_df['latitude'].iloc[0]
-                center_lon = filtered_df['longitude'].iloc[0]
-                zoom_start = 14
-            elif selected_region != '전체' and '시도' in filtered_df.columns:
-                center_lat = filtered_df['latitude'].mean()
-                center_lon = filtered_df['longitude'].mean()
-                zoom_start = 10 if selected_district == '전체' else 12
-            else:  # 전체 지도
-                # 한국 중앙 쯤으로 센터 설정
-                center_lat, center_lon = 36.0, 127.8
-                zoom_start = 7
-            
-            # 지도 객체 생성
-            m = folium.Map(
-                location=[center_lat, center_lon],
-                zoom_start=zoom_start,
-                tiles=None  # 타일 없이 시작
+        dataset_version = df.attrs.get('dataset_version')
+        
+        if use_clustering and cluster_mode == '서버 (대용량)':
+            show_server_cluster_map(
+                filtered_df, spatial_index, dataset_version, st.session_state.filter_key,
+                selected_region, selected_district, selected_style,
+                marker_style, cluster_radius, min_cluster_size, color_by,
+                proximity=st.session_state.proximity, depots=depots
             )
+        else:
+            # 같은 검색 조건 + 시각화 옵션으로 렌더링한 지도가 있으면 재사용
+            map_cache = get_map_cache()
+            map_cache.retain_version(dataset_version)
+            map_key = result_map_key(dataset_version, st.session_state.filter_key, map_options)
+            with perf_stage('map_cache_lookup') as record:
+                map_html = map_cache.get(map_key)
+                record['hit'] = map_html is not None
             
-            # 선택한 타일 설정
-            selected_tile = tile_options[selected_style]
-            
-            # Google 지도 URL인 경우
-            if selected_style.startswith("Google"):
-                folium.TileLayer(
-                    tiles=selected_tile,
-                    attr='Google Maps',
-                    name=selected_style,
-                ).add_to(m)
-            else:
-                # 기본 folium 타일
-                folium.TileLayer(
-                    tiles=selected_tile,
-                    name=selected_style,
-                ).add_to(m)
-            
-            # 클러스터링 옵션에 따라 마커 클러스터 설정
-            if use_clustering:
-                marker_cluster = MarkerCluster(
-                    name="기업 클러스터",
-                    options={
-                        'maxClusterRadius': cluster_radius,
-                        'disableClusteringAtZoom': 15,  # 줌 레벨 15 이상에서는 클러스터링 비활성화
-                        'spiderfyOnMaxZoom': True,
-                        'minClusterSize': min_cluster_size
-                    }
-                ).add_to(m)
-            
-            # 아이콘 매핑 정의 (추가)
-            icon_mapping = {}
-            if marker_style == '기본 마커':
-                icon_mapping = {
-                    '대기업': 'building',
-                    '중견기업': 'industry',
-                    '중소기업': 'briefcase',
-                    '비영리단체': 'users',
-                    '미분류': 'home'
-                }
-            
-            # 마커 추가
-            for idx, row in filtered_df.iterrows():
-                # 색상 선택
-                if color_field and color_field in row and pd.notna(row[color_field]):
-                    color = color_map.get(row[color_field], 'gray')
-                else:
-                    color = color_map.get('default', 'blue')
-                
-                # 개선된 팝업 스타일 - 더 큰 팝업과 글씨 크기 증가
-                popup_content = """
-                <div style="font-family: Arial; width: 600px; max-width: 100%;">
-                    <style>
-                        .info-table {
-                            width: 100%;
-                            border-collapse: collapse;
-                            margin-bottom: 5px;
-                        }
-                        .info-table th {
-                            text-align: left;
-                            padding: 6px 10px;
-                            font-weight: bold;
-                            color: #2E5984;
-                            width: 140px;
-                            vertical-align: top;
-                            border-bottom: 1px solid #eee;
-                            white-space: nowrap;
-                            font-size: 14px;  /* 컬럼명 글씨 크기 추가 증가 */
-                        }
-                        .info-table td {
-                            padding: 6px 10px;
-                            vertical-align: top;
-                            border-bottom: 1px solid #eee;
-                            word-break: break-word;
-                            font-size: 14px;  /* 값 글씨 크기 추가 증가 */
-                        }
-                        .company-name {
-                            font-weight: bold;
-                            font-size: 18px;  /* 기업명 글씨 크기 추가 증가 */
-                            color: #2E5984;
-                            margin: 0;
-                            padding: 10px 0;
-                            border-bottom: 2px solid #2E5984;
-                            margin-bottom: 12px;
-                        }
-                    </style>
-                """
-                
-                # 기업명을 제목으로 표시
-                if '한글업체명' in row and pd.notna(row['한글업체명']):
-                    popup_content += f'<div class="company-name">{row["한글업체명"]}</div>'
-                
-                popup_content += '<table class="info-table">'
-                
-                # 표시할 필드와 레이블 정의 (요청된 순서대로)
-                fields_to_display = [
-                    ('기업규모구분', '기업규모구분'),
-                    ('업종명', '업종명'),
-                    ('업태명', '업태명'),
-                    ('주요상품내역', '주요상품내역'),
-                    ('산업코드 대분류', '산업코드 대분류'),
-                    ('산업코드 세세분류', '산업코드 세세분류'),
-                    ('신용등급', '신용등급'),
-                    ('현금흐름등급', '현금흐름등급'),
-                    ('한글지번주소', '한글지번주소'),
-                    ('전화번호', '전화번호'),
-                    ('사업자등록번호', '사업자등록번호'),
-                    ('한글주소', '한글주소')
-                ]
-                
-                for field, label in fields_to_display:
-                    if field in row and pd.notna(row[field]):
-                        # 사업자등록번호는 정수형태로 표시 (소수점 제거)
-                        if field == '사업자등록번호' and '.' in str(row[field]):
-                            value = str(row[field]).split('.')[0]
-                        else:
-                            value = row[field]
-                        
-                        popup_content += f"""
-                        <tr>
-                            <th>{label}</th>
-                            <td>{value}</td>
-                        </tr>
-                        """
-                
-                popup_content += """
-                    </table>
-                </div>
-                """
-                
-                # 팝업 생성 - 최대 너비 더 크게 조정
-                popup = folium.Popup(popup_content, max_width=400)
-                
-                # 마커 생성
-                if marker_style == '기본 마커':
-                    # 기본 아이콘 설정
-                    icon_type = 'building'  # 기본 아이콘
-                    
-                    # 기업 규모에 따라 다른 아이콘
-                    if '기업규모구분' in row and pd.notna(row['기업규모구분']):
-                        icon_type = icon_mapping.get(row['기업규모구분'], 'building')
-                        
-                    marker = folium.Marker(
-                        location=[row['latitude'], row['longitude']],
-                        popup=popup,
-                        tooltip=row.get('한글업체명', '기업명 없음'),
-                        icon=folium.Icon(color=color, icon=icon_type, prefix='fa')
+            if map_html is None:
+                # 로딩 표시
+                with st.spinner("지도를 생성하고 있습니다..."):
+                    map_html = build_result_map_html(
+                        filtered_df, selected_region, selected_district, map_options,
+                        proximity=st.session_state.proximity
                     )
-                else:  # 원형 마커
-                    marker = folium.CircleMarker(
-                        location=[row['latitude'], row['longitude']],
-                        radius=6,
-                        popup=popup,
-                        tooltip=row.get('한글업체명', '기업명 없음'),
-                        color=color,
-                        fill=True,
-                        fill_opacity=0.7,
-                        fill_color=color
-                    )
-                
-                # 클러스터링 설정에 따라 마커 추가
-                if use_clustering:
-                    marker.add_to(marker_cluster)
-                else:
-                    marker.add_to(m)
-            
-            # 색상 레전드 HTML 생성
-            if color_field:
-                legend_title = {
-                    '기업규모구분': '기업 규모',
-                    '신용등급': '신용등급',
-                    '현금흐름등급': '현금흐름등급',
-                    '업종명': '업종'
-                }.get(color_field, '분류')
-                
-                # 레전드 HTML 생성 - 최대 15개 항목만 표시
-                legend_html = f"""
-                <div style="position: fixed; bottom: 50px; left: 50px; z-index: 1000; background-color: white; padding: 10px; border: 1px solid grey; border-radius: 5px; max-height: 300px; overflow-y: auto; max-width: 200px;">
-                    <p style="text-align: center; margin-bottom: 5px;"><b>{legend_title}</b></p>
-                """
-                
-                # 필터링된 데이터에 있는 값만 레전드에 표시
-                legend_items = []
-                
-                if color_field == '신용등급':
-                    # 신용등급은 정의된 순서대로 정렬
-                    unique_values = filtered_df[color_field].dropna().unique()
-                    sorted_values = sorted(unique_values, key=credit_rating_order)
-                    for key in sorted_values:
-                        if key != 'default':
-                            legend_items.append((key, color_map.get(key, 'gray')))
-                elif color_field == '기업규모구분':
-                    # 기업규모는 정의된 순서대로 정렬
-                    unique_values = filtered_df[color_field].dropna().unique()
-                    sorted_values = sorted(unique_values, key=company_size_order)
-                    for key in sorted_values:
-                        if key != 'default':
-                            legend_items.append((key, color_map.get(key, 'gray')))
-                else:
-                    # 그 외에는 기존 방식대로
-                    for key, color in color_map.items():
-                        if key != 'default' and color_field in filtered_df.columns and (filtered_df[color_field] == key).any():
-                            legend_items.append((key, color))
-                
-                # 항목이 너무 많은 경우 줄임
-                max_legend_items = 15
-                if len(legend_items) > max_legend_items:
-                    legend_html += f"<p style='font-size: 10px; color: gray;'>* 표시된 {max_legend_items}개 항목 중 일부</p>"
-                    
-                for key, color in legend_items[:max_legend_items]:
-                    legend_html += f"""
-                    <div style="display: flex; align-items: center; margin-bottom: 3px;">
-                        <span style="background-color: {color}; width: 15px; height: 15px; display: inline-block; margin-right: 5px; border-radius: 50%;"></span>
-                        <span style="font-size: 12px;">{key}</span>
-                    </div>
-                    """
-                
-                legend_html += '</div>'
-                
-                # 색상 레전드를 지도에 추가
-                m.get_root().html.add_child(folium.Element(legend_html))
+                    map_cache.put(map_key, map_html)
             
-            # 아이콘 설명 레전드 추가 (새로 추가)
-            if marker_style == '기본 마커':
-                # 아이콘 설명 레전드 (우측 하단에 배치)
-                icon_legend_html = """
-                <div style="position: fixed; bottom: 50px; right: 50px; z-index: 1000; background-color: white; padding: 10px; border: 1px solid grey; border-radius: 5px; max-width: 250px;">
-                    <p style="text-align: center; margin-bottom: 5px;"><b>마커 아이콘 설명</b></p>
-                """
-                
-                # 아이콘별 설명 추가
-                icon_descriptions = [
-                    ('building', '대기업'),
-                    ('industry', '중견기업'),
-                    ('briefcase', '중소기업'),
-                    ('users', '비영리단체'),
-                    ('home', '미분류')
-                ]
-                
-                for icon_name, description in icon_descriptions:
-                    # 필터링된 데이터에 해당 기업규모가 있는 경우에만 표시
-                    if description == '미분류' or ('기업규모구분' in filtered_df.columns and (filtered_df['기업규모구분'] == description).any()):
-                        icon_legend_html += f"""
-                        <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                            <i class="fa fa-{icon_name}" style="margin-right: 8px; width: 20px; text-align: center;"></i>
-                            <span style="font-size: 12px;">{description}</span>
-                        </div>
-                        """
-                
-                icon_legend_html += '</div>'
-                
-                # 아이콘 설명 레전드를 지도에 추가
-                m.get_root().html.add_child(folium.Element(icon_legend_html))
-                
-                # FontAwesome 추가 (아이콘 표시를 위해 필요)
-                m.get_root().header.add_child(folium.Element(
-                    '<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4/css/all.min.css"/>'
-                ))
-            
-            # 레이어 컨트롤 추가
-            folium.LayerControl().add_to(m)
-        
-        # Streamlit에서 folium 지도 표시 (더 큰 사이즈로 지정)
-        folium_static(m, width=1600, height=800)
+            # Streamlit에서 folium 지도 표시 (더 큰 사이즈로 지정)
+            with perf_stage('send_map', html_chars=len(map_html)):
+                components.html(map_html, width=MAP_WIDTH, height=MAP_HEIGHT + 10)
         
         # 데이터 테이블 표시 (조회)
         with st.expander("검색 결과 데이터 조회"):
-            # 표시할 컬럼들 (지정된 순서대로)
-            display_cols = ['한글업체명', '기업규모구분', '업종명', '업태명', '주요상품내역', 
-                           '산업코드 대분류', '산업코드 세세분류', '신용등급', '현금흐름등급',
-                           '한글지번주소', '전화번호', '사업자등록번호', '한글주소']
-            
-            # 실제 있는 컬럼만 필터링
-            display_cols = [col for col in display_cols if col in filtered_df.columns]
-            
-            # 테이블 표시 전에 사업자등록번호 형식 정리 (소수점 제거)
-            display_df = filtered_df[display_cols].copy()
-            if '사업자등록번호' in display_df.columns:
-                display_df['사업자등록번호'] = display_df['사업자등록번호'].astype(str)
-                display_df['사업자등록번호'] = display_df['사업자등록번호'].apply(lambda x: x.split('.')[0] if '.' in x else x)
-            
-            st.dataframe(display_df, use_container_width=True)
+            show_result_table(filtered_df, dataset_version, st.session_state.filter_key)
+        
+        # 담당 거점별 요약 (검색 결과 또는 전체 데이터)
+        if depot_assignment is not None:
+            with st.expander("담당 거점별 요약"):
+                show_depot_summary(depot_assignment, catalog, st.session_state.search_result['positions'], len(df))
     
     else:
         st.warning("검색 조건에 맞는 기업이 없습니다. 검색어나 필터를 조정해주세요.")
@@ -619,6 +3329,7 @@ def main():
         2. **검색 버튼 클릭**: 설정한 필터를 적용하여 데이터를 검색합니다
         3. **지도 확인**: 검색 결과가 지도에 마커로 표시됩니다
         4. **마커 클릭**: 클릭하면 기업의 상세 정보를 확인할 수 있습니다
+        5. **반경 검색**: 기업명이나 위도, 경도를 기준으로 반경 안의 기업을 가까운 순으로 찾습니다
         
         ### 참고사항
         - 가까운 위치의 기업은 클러스터로 그룹화됩니다
@@ -0,0 +1,203 @@
+import argparse
+import importlib
+import os
+import re
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+# 앱 모듈 (파일명이 한글이므로 importlib로 로드, import 시 화면은 그리지 않음)
+app = importlib.import_module("company_map_app_최종")
+
+# 내보내기 파일에 넣을 컬럼 (지역 + 검색 결과 테이블 컬럼 + 좌표)
+EXPORT_COLUMNS = ['시도', '시군구'] + [col for col in app.RESULT_COLUMNS if col != '거리(km)'] + ['latitude', 'longitude']
+
+# 파일/폴더 이름에 쓸 수 없는 문자 치환
+def safe_name(name):
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', str(name)).strip('_') or '_'
+
+# ===== 작업 프로세스 =====
+# 작업 프로세스별 데이터 (초기화 시 1회 로드, 이후 작업에서 재사용)
+worker_state = {}
+
+# 작업 프로세스 초기화: 컬럼형 캐시에서 데이터 로드 (부모 프로세스가 캐시를 미리 만들어 둠)
+# base_positions: 필터 조건/검색어를 만족하는 행 위치 (조건이 없으면 None)
+# depots: 담당 거점 배정 결과 (마커 색상 기준이 담당 거점일 때만, 부모 프로세스에서 한 번 계산)
+def init_worker(source_path, cache_dir, base_positions, depots):
+    warnings.filterwarnings('ignore', module='streamlit')  # 작업 프로세스도 streamlit 경고만 숨김
+    app.CACHE_DIR = cache_dir
+    df = app.load_processed_frame(source_path)
+    worker_state['df'] = df
+    worker_state['facet_index'] = app.FacetIndex(df)
+    worker_state['base_positions'] = base_positions
+    worker_state['depots'] = depots
+
+# 지역 하나의 지도 HTML + CSV/Parquet 파일 생성
+def export_region(sido, sigungu, options):
+    start = time.perf_counter()
+    df = worker_state['df']
+    positions = worker_state['facet_index'].filter({'시도': sido, '시군구': sigungu or '전체'})
+    if worker_state['base_positions'] is not None:
+        positions = np.intersect1d(positions, worker_state['base_positions'], assume_unique=True)
+    summary = {'시도': sido, '시군구': sigungu or '', 'rows': len(positions)}
+    if len(positions) == 0:
+        return summary
+    
+    region_df = df.iloc[positions]
+    depots = worker_state['depots']
+    if depots is not None:
+        region_df = region_df.assign(**{'담당 거점': depots.labels(positions)})
+    region_dir = os.path.join(options['out_dir'], safe_name(sido))
+    os.makedirs(region_dir, exist_ok=True)
+    base_name = os.path.join(region_dir, safe_name(sigungu or sido))
+    
+    if 'html' in options['formats']:
+        if options['marker_style'] == '밀도 지도':
+            m = app.build_density_map(region_df, sido, sigungu or '전체', options['tiles'], split_by=options['density_split'])
+        else:
+            m = app.build_company_map(
+                region_df, sido, sigungu or '전체', options['tiles'], options['marker_style'],
+                use_clustering=options['use_clustering'], cluster_radius=options['cluster_radius'],
+                min_cluster_size=options['min_cluster_size'], color_by=options['color_by'], depots=depots
+            )
+        # 정적 지도는 지역 전체가 보이도록 맞춤 (좌표는 float32이므로 JSON으로 쓸 수 있게 float로 변환)
+        m.fit_bounds([
+            [float(region_df['latitude'].min()), float(region_df['longitude'].min())],
+            [float(region_df['latitude'].max()), float(region_df['longitude'].max())]
+        ])
+        map_html = app.render_map_html(m)
+        with open(base_name + '.html', 'w', encoding='utf-8') as f:
+            f.write(map_html)
+        summary['html_bytes'] = len(map_html.encode('utf-8'))
+    
+    # 기업 목록은 청크 단위로 변환해서 저장 (지역 전체를 한 번에 문자열/테이블로 만들지 않음)
+    columns = [col for col in EXPORT_COLUMNS if col in region_df.columns]
+    if 'csv' in options['formats']:
+        app.write_result_file(region_df, columns, base_name + '.csv', 'CSV')
+    if 'parquet' in options['formats']:
+        app.write_result_file(region_df, columns, base_name + '.parquet', 'Parquet')
+    
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    return summary
+
+# ===== 실행 =====
+# 필터 조건 "컬럼=값" 목록 → 선택 조건 딕셔너리
+def parse_filters(specs):
+    selections = {}
+    for spec in specs or []:
+        column, sep, value = spec.partition('=')
+        if not sep or column.strip() not in app.FILTER_COLUMNS:
+            raise SystemExit(f"잘못된 필터 조건: {spec} (형식: 컬럼=값, 컬럼: {', '.join(app.FILTER_COLUMNS)})")
+        selections[column.strip()] = value.strip()
+    return selections
+
+# 내보낼 지역 목록 (행 수가 많은 지역부터 - 큰 작업을 먼저 시작해서 마지막에 작업이 몰리지 않도록)
+def list_regions(df, positions, level):
+    columns = ['시도'] if level == 'sido' else ['시도', '시군구']
+    counts = df.iloc[positions].groupby(columns, observed=True).size().sort_values(ascending=False)
+    regions = []
+    for key, count in counts.items():
+        key = key if isinstance(key, tuple) else (key,)
+        regions.append((key[0], key[1] if len(key) > 1 else None, int(count)))
+    return regions
+
+def main():
+    parser = argparse.ArgumentParser(description="시도/시군구별 수요처 지도(HTML)와 기업 목록(CSV/Parquet)을 일괄 생성")
+    parser.add_argument('--source', default=app.DATA_FILE_PATH, help="원본 엑셀 파일 경로")
+    parser.add_argument('--out', default='exports', help="출력 폴더")
+    parser.add_argument('--level', choices=['sido', 'sigungu'], default='sigungu', help="지역 단위")
+    parser.add_argument('--filter', action='append', metavar='컬럼=값',
+                        help="필터 조건 (여러 번 지정 가능, 예: --filter 시도=경기도 --filter 기업규모구분=중소기업)")
+    parser.add_argument('--search', help="통합검색어")
+    parser.add_argument('--search-mode', choices=list(app.SEARCH_MODES.values()), default='literal')
+    parser.add_argument('--formats', nargs='+', choices=['html', 'csv', 'parquet'], default=['html', 'csv', 'parquet'])
+    parser.add_argument('--tiles', choices=list(app.TILE_OPTIONS.keys()), default=list(app.TILE_OPTIONS.keys())[0])
+    parser.add_argument('--marker-style', choices=['기본 마커', '원형 마커', '밀도 지도'], default='기본 마커')
+    parser.add_argument('--density-split', choices=list(app.DENSITY_SPLIT_OPTIONS.keys()), default='기업 수',
+                        help="밀도 지도 색상 기준")
+    parser.add_argument('--color-by', choices=['기업 규모', '신용등급', '현금흐름등급', '업종명', '담당 거점'], default='기업 규모')
+    parser.add_argument('--depots', default=app.DEPOT_FILE_PATH, help="거점 목록 파일 (CSV, 컬럼: 거점명, 위도, 경도)")
+    parser.add_argument('--no-clustering', action='store_true', help="마커 클러스터링 사용 안 함")
+    parser.add_argument('--cluster-radius', type=int, default=50)
+    parser.add_argument('--min-cluster-size', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="작업 프로세스 수")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    cache_dir = os.path.abspath(app.CACHE_DIR)
+    app.CACHE_DIR = cache_dir
+    
+    # 부모 프로세스에서 1회 로드 (컬럼형 캐시 생성) 후 조건에 맞는 행 계산
+    df = app.load_processed_frame(args.source)
+    selections = parse_filters(args.filter)
+    positions = app.FacetIndex(df).filter(selections)
+    if args.search:
+        if args.search_mode == 'name':
+            hits = np.sort(app.CompanyNameIndex(df['한글업체명']).search(args.search))
+        else:
+            hits = app.SearchIndex(df).search(args.search, mode=args.search_mode)
+        positions = np.intersect1d(positions, hits, assume_unique=True)
+    base_positions = positions if selections or args.search else None
+    
+    # 담당 거점: 전체 기업을 한 번에 배정하고 거점별 요약(기업 수, 거리, 기업규모/신용등급 분포) 저장
+    depots = None
+    if args.color_by == '담당 거점':
+        depots = app.DepotAssignment(df, app.read_depots(args.depots))
+        if not depots.names:
+            raise SystemExit(f"거점 파일에 사용할 수 있는 거점이 없습니다: {args.depots}")
+        catalog = app.FacetCatalog(app.FacetIndex(df))
+        tables = [depots.summary(positions, catalog, col) for col in ['기업규모구분', '신용등급'] if col in catalog.values]
+        summary = pd.concat([tables[0]] + [table.iloc[:, 3:] for table in tables[1:]], axis=1) if tables else depots.summary(positions, catalog, None)
+        os.makedirs(os.path.abspath(args.out), exist_ok=True)
+        summary.to_csv(os.path.join(os.path.abspath(args.out), '거점별_요약.csv'), encoding='utf-8-sig')
+    
+    regions = list_regions(df, positions, args.level)
+    print(f"{len(df):,}개 기업 중 {len(positions):,}개, {len(regions)}개 지역 내보내기 (작업 프로세스 {args.workers}개)", file=sys.stderr)
+    del df
+    
+    options = {
+        'out_dir': os.path.abspath(args.out),
+        'formats': set(args.formats),
+        'tiles': args.tiles,
+        'marker_style': args.marker_style,
+        'color_by': args.color_by,
+        'density_split': args.density_split,
+        'use_clustering': not args.no_clustering,
+        'cluster_radius': None if args.no_clustering else args.cluster_radius,
+        'min_cluster_size': None if args.no_clustering else args.min_cluster_size
+    }
+    os.makedirs(options['out_dir'], exist_ok=True)
+    
+    summaries = []
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(os.path.abspath(args.source), cache_dir, base_positions, depots)) as executor:
+        futures = {executor.submit(export_region, sido, sigungu, options): (sido, sigungu)
+                   for sido, sigungu, _ in regions}
+        for done, future in enumerate(as_completed(futures), 1):
+            sido, sigungu = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(futures)}] {sido} {sigungu or ''} 실패: {e}", file=sys.stderr)
+                continue
+            summaries.append(summary)
+            print(f"[{done}/{len(futures)}] {sido} {sigungu or ''}: {summary['rows']:,}개", file=sys.stderr)
+    
+    # 지역별 결과 요약
+    summary_df = pd.DataFrame(summaries)
+    if len(summary_df):
+        summary_df = summary_df.sort_values(['시도', '시군구'])
+    summary_df.to_csv(os.path.join(options['out_dir'], 'summary.csv'), index=False, encoding='utf-8-sig')
+    print(f"완료: {len(summaries)}개 지역, 실패 {failures}개, {time.perf_counter() - started:.1f}초 → {options['out_dir']}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    # streamlit 실행 환경 밖에서 캐시 데코레이터가 내는 경고만 숨김 (pandas/pyarrow 등의 경고는 그대로 표시)
+    warnings.filterwarnings('ignore', module='streamlit')
+    sys.exit(main())
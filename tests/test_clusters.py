@@ -0,0 +1,65 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 앱 모듈 (파일명이 한글이므로 importlib로 로드, import 시 화면은 그리지 않음)
+app = importlib.import_module("company_map_app_최종")
+
+
+# 서울 주변에 몰린 기업 + 전국에 흩어진 기업 (검색 결과처럼 행 번호가 띄엄띄엄인 인덱스)
+def make_frame(n_rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    dense = n_rows // 2
+    lat = np.concatenate([37.55 + rng.normal(0, 0.05, dense), rng.uniform(34.5, 38.0, n_rows - dense)])
+    lon = np.concatenate([126.98 + rng.normal(0, 0.05, dense), rng.uniform(126.2, 129.4, n_rows - dense)])
+    return pd.DataFrame({
+        'latitude': lat,
+        'longitude': lon,
+        '기업규모구분': rng.choice(['대기업', '중견기업', '중소기업'], n_rows),
+    }, index=np.sort(rng.choice(n_rows * 3, n_rows, replace=False)))
+
+
+@pytest.fixture(scope='module')
+def hierarchy():
+    return app.ClusterHierarchy(make_frame(), cluster_radius=50)
+
+
+# 클러스터 중심/개별 기업 → 해당 줌의 격자 칸 번호 (중심은 항상 자기 격자 칸 안에 있음)
+def cell_keys(hierarchy, lat, lon, zoom):
+    scale = 1 << (zoom + hierarchy.cell_bits)
+    x, y = app.mercator_xy(lat, lon)
+    return (np.clip((x * scale).astype(np.int64), 0, scale - 1) << 32) | np.clip((y * scale).astype(np.int64), 0, scale - 1)
+
+
+VIEWS = [
+    (37.50, 126.90, 37.60, 127.05),   # 밀집 지역 한가운데
+    (37.55, 126.98, 37.70, 127.20),   # 밀집 지역 모서리에 걸친 영역
+    (35.00, 128.00, 35.30, 128.40),   # 흩어진 기업만 있는 영역
+    (33.00, 124.00, 39.00, 131.00),   # 전체
+]
+
+
+# 영역 안의 모든 기업은 표시한 클러스터 또는 개별 기업 중 하나에 포함 (영역 가장자리 포함)
+@pytest.mark.parametrize('zoom', [5, 7, 9, 11, 13])
+@pytest.mark.parametrize('bounds', VIEWS)
+def test_every_point_in_view_is_shown(hierarchy, bounds, zoom):
+    clusters, leaves = hierarchy.query(bounds, zoom, min_cluster_size=3)
+    in_view = hierarchy.points_in_bounds(bounds)
+    shown = set(cell_keys(hierarchy, [c['lat'] for c in clusters], [c['lon'] for c in clusters], zoom))
+    covered = np.isin(cell_keys(hierarchy, hierarchy.lat[in_view], hierarchy.lon[in_view], zoom), list(shown))
+    assert set(in_view[~covered]) <= set(leaves)
+    assert set(leaves) <= set(in_view)
+    assert all(c['count'] >= 3 for c in clusters)
+
+
+def test_max_zoom_returns_points_in_view(hierarchy):
+    bounds = VIEWS[0]
+    clusters, leaves = hierarchy.query(bounds, hierarchy.max_zoom)
+    assert clusters == []
+    np.testing.assert_array_equal(np.sort(leaves), hierarchy.points_in_bounds(bounds))
@@ -0,0 +1,109 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 앱 모듈 (파일명이 한글이므로 importlib로 로드, import 시 화면은 그리지 않음)
+app = importlib.import_module("company_map_app_최종")
+
+# 거점 목록 (전국에 흩어진 거점 + 서로 가까운 수도권 거점)
+DEPOTS = pd.DataFrame({
+    '거점명': ['서울', '인천', '수원', '대전', '대구', '부산', '광주', '강릉', '제주'],
+    'latitude': [37.5665, 37.4563, 37.2636, 36.3504, 35.8714, 35.1796, 35.1595, 37.7519, 33.4996],
+    'longitude': [126.9780, 126.7052, 127.0286, 127.3845, 128.6014, 129.0756, 126.8526, 128.8761, 126.5312],
+})
+
+
+# 한국 범위 안에 흩어진 기업 + 수도권에 몰린 기업
+def make_frame(n_rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    dense = n_rows // 3
+    lat = np.concatenate([37.45 + rng.normal(0, 0.1, dense), rng.uniform(33.0, 38.5, n_rows - dense)])
+    lon = np.concatenate([126.9 + rng.normal(0, 0.1, dense), rng.uniform(124.0, 132.0, n_rows - dense)])
+    return pd.DataFrame({'latitude': lat, 'longitude': lon})
+
+
+# 비교 기준: 모든 기업 × 모든 거점의 haversine 거리 행렬
+def brute_force_distances(df, depots):
+    lat1 = np.radians(df['latitude'].to_numpy())[:, None]
+    lon1 = np.radians(df['longitude'].to_numpy())[:, None]
+    lat2 = np.radians(depots['latitude'].to_numpy())[None, :]
+    lon2 = np.radians(depots['longitude'].to_numpy())[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * app.EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return make_frame()
+
+
+# 청크 크기와 관계없이 가장 가까운 거점 = haversine 거리 최솟값 (거리 차이가 1m 미만인 기업은 어느 쪽이든 허용)
+@pytest.mark.parametrize('chunk_rows', [app.DEPOT_CHUNK_ROWS, 1000, 7])
+def test_assignment_matches_argmin_haversine(frame, monkeypatch, chunk_rows):
+    monkeypatch.setattr(app, 'DEPOT_CHUNK_ROWS', chunk_rows)
+    assignment = app.DepotAssignment(frame, DEPOTS)
+    matrix = brute_force_distances(frame, DEPOTS)
+    nearest = matrix.min(axis=1)
+
+    ordered = np.sort(matrix, axis=1)
+    clear = ordered[:, 1] - ordered[:, 0] > 1e-3
+    np.testing.assert_array_equal(assignment.codes[clear], matrix.argmin(axis=1)[clear])
+    np.testing.assert_allclose(matrix[np.arange(len(frame)), assignment.codes], nearest, atol=1e-3)
+    np.testing.assert_allclose(assignment.distances, nearest, rtol=1e-5, atol=1e-3)
+
+
+def test_labels_follow_depot_order(frame):
+    assignment = app.DepotAssignment(frame, DEPOTS)
+    positions = np.arange(0, len(frame), 3)
+    labels = assignment.labels(positions)
+    assert list(labels.categories) == DEPOTS['거점명'].tolist()
+    matrix = brute_force_distances(frame.iloc[positions], DEPOTS)
+    ordered = np.sort(matrix, axis=1)
+    clear = ordered[:, 1] - ordered[:, 0] > 1e-3
+    expected = DEPOTS['거점명'].to_numpy()[matrix.argmin(axis=1)]
+    np.testing.assert_array_equal(np.asarray(labels)[clear], expected[clear])
+
+
+# 거점별 기업 수/평균 거리/최대 거리 = 배정 결과를 groupby로 집계한 값 (기업이 없는 거점은 0)
+def test_summary_matches_groupby(frame):
+    assignment = app.DepotAssignment(frame, DEPOTS)
+    positions = np.flatnonzero(frame['latitude'].to_numpy() > 36.0)
+    table = assignment.summary(positions, None, None)
+    grouped = pd.DataFrame({'거점': assignment.labels(positions), 'd': assignment.distances[positions]}) \
+        .groupby('거점', observed=False)['d']
+    np.testing.assert_array_equal(table['기업 수'], grouped.size().to_numpy())
+    np.testing.assert_allclose(table['평균 거리(km)'], np.round(grouped.mean().fillna(0).to_numpy(), 1), atol=0.051)
+    np.testing.assert_allclose(table['최대 거리(km)'], np.round(grouped.max().fillna(0).to_numpy(), 1), atol=0.051)
+    assert table.loc['제주', '기업 수'] == 0
+
+
+def test_without_depots(frame):
+    assignment = app.DepotAssignment(frame, DEPOTS.iloc[:0])
+    assert (assignment.codes == -1).all()
+    assert np.isnan(assignment.distances).all()
+
+
+# 거점명이 없거나 좌표가 한국 범위 밖/숫자가 아닌 행은 제외, 같은 거점명은 첫 행만 사용
+def test_read_depots_skips_invalid_rows(tmp_path):
+    path = tmp_path / '거점.csv'
+    pd.DataFrame({
+        '거점명': [' 서울 ', '', None, '부산', '해외', '서울', '대전'],
+        '위도': [37.5665, 36.0, 36.0, 35.1796, 51.5, 37.0, '없음'],
+        '경도': [126.9780, 127.0, 127.0, 129.0756, -0.12, 127.0, 127.3845],
+    }).to_csv(path, index=False)
+    depots = app.read_depots(str(path))
+    assert depots['거점명'].tolist() == ['서울', '부산']
+    assert depots['latitude'].tolist() == [37.5665, 35.1796]
+
+
+def test_read_depots_requires_columns(tmp_path):
+    path = tmp_path / '거점.csv'
+    pd.DataFrame({'거점명': ['서울'], '위도': [37.5]}).to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        app.read_depots(str(path))
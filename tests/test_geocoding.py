@@ -0,0 +1,131 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 앱 모듈 (파일명이 한글이므로 importlib로 로드, import 시 화면은 그리지 않음)
+app = importlib.import_module("company_map_app_최종")
+
+# 주소 → 좌표 대조표 (마지막 주소는 한국 범위 밖 좌표라 대조표를 읽을 때 제외됨)
+ADDRESS_TABLE = pd.DataFrame({
+    '주소': ['서울특별시 중구 세종대로 110', '부산광역시 연제구 중앙대로 1001', '대전광역시 서구 둔산로 100',
+             '경기도 수원시 팔달구 효원로 1', '해외 주소 1'],
+    '위도': [37.5663, 35.1799, 36.3504, 37.2636, 51.5],
+    '경도': [126.9779, 129.0750, 127.3845, 127.0286, -0.12],
+})
+
+
+# 원본 엑셀처럼 위도/경도 컬럼 이름을 쓰는 기업 목록
+# 0: 좌표 있음 / 1: 좌표 없음, 도로명 주소로 찾음 / 2: 한국 범위 밖 좌표, 주소 공백이 달라도 찾음
+# 3: 좌표 없음, 도로명 주소는 없고 지번 주소로 찾음 / 4: 좌표 없음, 어느 주소로도 못 찾음
+# 5: 한국 범위 밖 좌표, 주소 없음 / 6: 좌표 없음, 대조표에서 제외된 주소
+def make_frame():
+    return pd.DataFrame({
+        '한글업체명': ['가', '나', '다', '라', '마', '바', '사'],
+        '사업자등록번호': ['1', '2', '3', '4', '5', '6', '7'],
+        '위도': [37.5, np.nan, 0.0, None, np.nan, 99.0, np.nan],
+        '경도': [127.0, np.nan, 0.0, None, np.nan, 200.0, np.nan],
+        '한글주소': [None, '서울특별시 중구 세종대로 110', '부산광역시  연제구 중앙대로 1001 ', '없는 도로명 주소',
+                 '없는 주소', None, '해외 주소 1'],
+        '한글지번주소': [None, None, None, '경기도 수원시 팔달구 효원로 1', '없는 지번 주소', None, None],
+    })
+
+
+# 요청한 주소 배치를 기록하는 지오코더
+class RecordingGeocoder(app.AddressTableGeocoder):
+    def __init__(self, path):
+        super().__init__(path)
+        self.batches = []
+
+    def geocode_batch(self, addresses):
+        self.batches.append(list(addresses))
+        return super().geocode_batch(addresses)
+
+
+# 요청할 때마다 실패하는 지오코더 (서비스 장애 상황)
+class FailingGeocoder:
+    signature = 'failing'
+
+    def __init__(self):
+        self.calls = 0
+
+    def geocode_batch(self, addresses):
+        self.calls += 1
+        raise OSError('service unavailable')
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    path = tmp_path / '주소좌표.csv'
+    ADDRESS_TABLE.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'geocode_cache.sqlite')
+
+
+def test_missing_coordinates_filled_from_address_table(table_path, cache_path):
+    df, summary = app.backfill_coordinates(make_frame(), app.AddressTableGeocoder(table_path), cache_path)
+    assert summary['targets'] == 6
+    assert summary['resolved'] == 3
+    assert (df.loc[0, '위도'], df.loc[0, '경도']) == (37.5, 127.0)
+    assert (df.loc[1, '위도'], df.loc[1, '경도']) == (37.5663, 126.9779)
+    assert (df.loc[2, '위도'], df.loc[2, '경도']) == (35.1799, 129.0750)
+    assert (df.loc[3, '위도'], df.loc[3, '경도']) == (37.2636, 127.0286)
+    assert df.loc[[4, 6], '위도'].isna().all()
+
+
+def test_second_run_uses_cache_without_geocoder(table_path, cache_path):
+    first = RecordingGeocoder(table_path)
+    df_first, summary = app.backfill_coordinates(make_frame(), first, cache_path)
+    assert summary['requested'] > 0 and first.batches
+
+    # 찾지 못한 주소도 캐시에 남으므로 두 번째 실행에서는 요청하지 않음
+    second = RecordingGeocoder(table_path)
+    df_second, summary = app.backfill_coordinates(make_frame(), second, cache_path)
+    assert second.batches == []
+    assert summary['requested'] == 0
+    assert summary['resolved'] == 3
+    pd.testing.assert_frame_equal(df_first, df_second)
+
+
+def test_failed_batches_are_retried_next_run(table_path, cache_path):
+    failing = FailingGeocoder()
+    df, summary = app.backfill_coordinates(make_frame(), failing, cache_path)
+    assert failing.calls > 0
+    assert summary['failed_batches'] == failing.calls
+    assert summary['resolved'] == 0
+
+    retry = FailingGeocoder()
+    _, summary = app.backfill_coordinates(make_frame(), retry, cache_path)
+    assert retry.calls == failing.calls
+
+
+# 주소로도 좌표를 찾지 못한 행은 전처리에서 제외되고 사유별로 집계
+def test_unresolved_rows_are_dropped_and_counted(table_path, cache_path):
+    df, _ = app.backfill_coordinates(make_frame(), app.AddressTableGeocoder(table_path), cache_path)
+    processed = app.process_data(df)
+    assert processed['한글업체명'].tolist() == ['가', '나', '다', '라']
+    assert processed.attrs['dropped_rows'] == {'missing_coords': 2, 'outside_korea': 1}
+
+
+def test_without_geocoder_nothing_is_filled():
+    df, summary = app.backfill_coordinates(make_frame(), None)
+    assert summary['resolved'] == 0
+    assert app.process_data(df).attrs['dropped_rows'] == {'missing_coords': 4, 'outside_korea': 2}
+
+
+def test_make_geocoder(table_path):
+    assert app.make_geocoder('') is None
+    geocoder = app.make_geocoder(f"address_table:{table_path}")
+    assert isinstance(geocoder, app.AddressTableGeocoder)
+    assert geocoder.geocode_batch(['해외 주소 1', '대전광역시 서구 둔산로 100']) == [None, (36.3504, 127.3845)]
+    with pytest.raises(ValueError):
+        app.make_geocoder('unknown:x')
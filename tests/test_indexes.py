@@ -0,0 +1,169 @@
+import importlib
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 앱 모듈 (파일명이 한글이므로 importlib로 로드, import 시 화면은 그리지 않음)
+app = importlib.import_module("company_map_app_최종")
+
+REGIONS = {'서울특별시': ['강남구', '중구', '종로구'], '부산광역시': ['해운대구', '중구'], '경기도': ['수원시', '성남시']}
+SIZES = ['대기업', '중견기업', '중소기업', None]
+RATINGS = ['AAA', 'BBB0', 'B+', 'NR', None]
+
+
+# 필터 컬럼마다 결측값이 섞인 테스트용 데이터 (같은 이름의 시군구가 여러 시도에 있음, 실제 로드처럼 타입 압축 후)
+def make_frame(n_rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    regions = list(REGIONS) + [None]
+    sido = [regions[i] for i in rng.integers(len(regions), size=n_rows)]
+    sigungu = [None if s is None or rng.random() < 0.05 else REGIONS[s][rng.integers(len(REGIONS[s]))] for s in sido]
+    df = pd.DataFrame({
+        '시도': sido,
+        '시군구': sigungu,
+        '기업규모구분': [SIZES[i] for i in rng.integers(len(SIZES), size=n_rows)],
+        '신용등급': [RATINGS[i] for i in rng.integers(len(RATINGS), size=n_rows)],
+    })
+    return app.compact_frame(df)
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return make_frame()
+
+
+@pytest.fixture(scope='module')
+def facet_index(frame):
+    return app.FacetIndex(frame)
+
+
+# 비교 기준: 컬럼별 불리언 마스크의 AND ('전체'/빈 값은 조건 없음)
+def brute_force_filter(df, selections):
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in selections.items():
+        if value not in (None, '', '전체') and col in df.columns:
+            mask &= (df[col] == value).fillna(False).to_numpy(dtype=bool)
+    return np.flatnonzero(mask)
+
+
+SELECTIONS = [
+    {'시도': sido, '시군구': sigungu, '기업규모구분': size, '신용등급': rating}
+    for sido, sigungu, size, rating in itertools.product(
+        ['전체', '서울특별시', '부산광역시'], ['전체', '중구', '수원시'], ['전체', '중소기업', ''], ['전체', 'AAA', 'NR']
+    )
+]
+
+
+@pytest.mark.parametrize('selections', SELECTIONS)
+def test_facet_filter_matches_masks(frame, facet_index, selections):
+    np.testing.assert_array_equal(facet_index.filter(selections), brute_force_filter(frame, selections))
+
+
+def test_facet_filter_without_conditions(frame, facet_index):
+    np.testing.assert_array_equal(facet_index.filter({}), np.arange(len(frame)))
+    np.testing.assert_array_equal(facet_index.filter({'시도': '전체', '신용등급': None}), np.arange(len(frame)))
+
+
+# 데이터에 없는 값은 빈 결과, 필터 컬럼이 아닌 조건은 무시
+def test_facet_filter_unknown_values(frame, facet_index):
+    assert len(facet_index.filter({'시도': '제주특별자치도'})) == 0
+    assert len(facet_index.filter({'시도': '서울특별시', '시군구': '해운대구'})) == 0
+    np.testing.assert_array_equal(facet_index.filter({'업종명': '제조업', '시도': '경기도'}),
+                                  brute_force_filter(frame, {'시도': '경기도'}))
+
+
+def test_facet_rows_are_sorted_positions(frame, facet_index):
+    for value in REGIONS:
+        rows = facet_index.rows('시도', value)
+        np.testing.assert_array_equal(rows, np.flatnonzero((frame['시도'] == value).to_numpy()))
+    assert len(facet_index.rows('시도', '없는 값')) == 0
+
+
+# 공간 인덱스용 좌표: 무작위 좌표 + 격자 칸 경계에 정확히 놓인 좌표 + 한국 범위 경계/바깥 좌표
+def make_points(n_rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(33.0, 38.5, n_rows)
+    lon = rng.uniform(124.0, 132.0, n_rows)
+    step = app.SPATIAL_CELL_DEGREES
+    edge_lat = app.KOREA_BOUNDS[0] + step * rng.integers(0, 110, 500)
+    edge_lon = app.KOREA_BOUNDS[1] + step * rng.integers(0, 160, 500)
+    extra_lat = np.array([33.0, 38.5, 32.9, 38.6, 37.5])
+    extra_lon = np.array([124.0, 132.0, 127.0, 127.0, 123.9])
+    return np.concatenate([lat, edge_lat, extra_lat]), np.concatenate([lon, edge_lon, extra_lon])
+
+
+@pytest.fixture(scope='module')
+def points():
+    return make_points()
+
+
+@pytest.fixture(scope='module')
+def spatial_index(points):
+    return app.SpatialGridIndex(*points)
+
+
+# 비교 기준: 모든 좌표를 사각형 경계(포함)와 비교
+def brute_force_bbox(lat, lon, bounds):
+    south, west, north, east = bounds
+    return np.flatnonzero((lat >= south) & (lat <= north) & (lon >= west) & (lon <= east))
+
+
+# 비교 기준: 모든 좌표까지의 haversine 거리
+def brute_force_distances(lat, lon, center_lat, center_lon):
+    lat1, lon1, lat2, lon2 = map(np.radians, (center_lat, center_lon, lat, lon))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * app.EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+STEP = app.SPATIAL_CELL_DEGREES
+BBOXES = [
+    (37.4, 126.8, 37.7, 127.2),
+    # 격자 칸 경계와 정확히 겹치는 사각형 (경계 위 좌표 포함 여부)
+    (33.0 + STEP * 90, 124.0 + STEP * 56, 33.0 + STEP * 92, 124.0 + STEP * 60),
+    # 격자 칸 하나보다 작은 사각형
+    (35.101, 129.001, 35.12, 129.03),
+    # 한국 범위를 넘는 사각형 (바깥 좌표는 가장자리 칸에 들어 있음)
+    (30.0, 120.0, 40.0, 135.0),
+    (32.0, 126.5, 33.02, 127.5),
+    # 빈 사각형 / 뒤집힌 사각형
+    (36.0, 127.0, 36.0, 127.0),
+    (37.0, 127.0, 36.0, 128.0),
+]
+
+
+@pytest.mark.parametrize('bounds', BBOXES)
+def test_query_bbox_matches_scan(points, spatial_index, bounds):
+    np.testing.assert_array_equal(spatial_index.query_bbox(bounds), brute_force_bbox(*points, bounds))
+
+
+@pytest.mark.parametrize('center,radius_km', [
+    ((37.5665, 126.9780), 5.0),
+    ((35.1796, 129.0756), 20.0),
+    ((33.0 + STEP * 80, 124.0 + STEP * 60), 3.0),   # 격자 칸 네 개가 만나는 꼭짓점
+    ((36.0, 128.0), 0.5),
+    ((33.2, 126.5), 50.0),                          # 한국 범위 가장자리
+    ((37.5, 127.0), 0.0),
+])
+def test_query_radius_matches_haversine(points, spatial_index, center, radius_km):
+    positions, distances = spatial_index.query_radius(center[0], center[1], radius_km)
+    all_distances = brute_force_distances(*points, *center)
+    expected = np.flatnonzero(all_distances <= radius_km)
+    np.testing.assert_array_equal(np.sort(positions), expected)
+    np.testing.assert_allclose(distances, all_distances[positions])
+    assert np.all(np.diff(distances) >= 0)
+
+
+# 격자 칸 경계에 놓인 좌표는 경계를 공유하는 어느 쪽 사각형으로 찾아도 나옴
+def test_cell_boundary_points():
+    lat, lon = 33.0 + STEP * 70, 124.0 + STEP * 70
+    index = app.SpatialGridIndex([lat], [lon])
+    for bounds in [(lat - 0.01, lon - 0.01, lat, lon), (lat, lon, lat + 0.01, lon + 0.01),
+                   (lat - 0.01, lon, lat, lon + 0.01), (lat, lon - 0.01, lat + 0.01, lon)]:
+        np.testing.assert_array_equal(index.query_bbox(bounds), [0])
+    positions, distances = index.query_radius(lat + 0.001, lon, 0.2)
+    np.testing.assert_array_equal(positions, [0])
@@ -0,0 +1,98 @@
+import importlib
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 앱 모듈 (파일명이 한글이므로 importlib로 로드, import 시 화면은 그리지 않음)
+app = importlib.import_module("company_map_app_최종")
+
+# 엑셀에서 읽힌 사업자등록번호 형태 (문자열 / 공백 / 숫자로 읽혀 붙은 소수점 / 정수 / 결측)
+BUSINESS_NUMBERS = ['1234567890', ' 1234567890 ', '1234567890.0', '  2208162517.0\t', '123-45-67890', '',
+                    '   ', '1.2.3', 1234567890.0, 2208162517, None, np.nan]
+# 좌표 형태 (숫자 / 숫자 문자열 / 숫자가 아닌 값 / 결측 / 한국 범위 경계와 바깥)
+LATITUDES = [37.5, 35.18, '36.35', 33.0, 38.5, 32.99, 38.51, 0.0, '없음', '', None, np.nan]
+LONGITUDES = [127.0, 129.07, '127.38', 124.0, 132.0, 123.99, 132.01, 0.0, 'x', None, np.nan]
+
+
+# 원본 엑셀처럼 위도/경도 컬럼 이름을 쓰고 값의 형태가 섞인 기업 목록
+def make_frame(n_rows=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        '한글업체명': [f"업체{i}" for i in range(n_rows)],
+        '사업자등록번호': [BUSINESS_NUMBERS[i] for i in rng.integers(len(BUSINESS_NUMBERS), size=n_rows)],
+        '위도': [LATITUDES[i] for i in rng.integers(len(LATITUDES), size=n_rows)],
+        '경도': [LONGITUDES[i] for i in rng.integers(len(LONGITUDES), size=n_rows)],
+    }, index=np.arange(n_rows) * 3)
+
+
+# 비교 기준: 행마다 파이썬 문자열 처리 (공백 제거 → 첫 '.' 앞부분, 결측은 그대로)
+def brute_force_business_number(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return str(value).strip().split('.', 1)[0]
+
+
+# 비교 기준: 행마다 숫자 변환 (변환할 수 없으면 결측)
+def brute_force_coordinate(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+# 비교 기준: 행마다 좌표 검증 → 남는 행 번호와 사유별 제외 행 수
+def brute_force_rows(df):
+    kept, missing, outside = [], 0, 0
+    south, west, north, east = app.KOREA_BOUNDS
+    for pos, (lat, lon) in enumerate(zip(df['위도'], df['경도'])):
+        lat, lon = brute_force_coordinate(lat), brute_force_coordinate(lon)
+        if math.isnan(lat) or math.isnan(lon):
+            missing += 1
+        elif south <= lat <= north and west <= lon <= east:
+            kept.append(pos)
+        else:
+            outside += 1
+    return kept, {'missing_coords': missing, 'outside_korea': outside}
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_process_data_matches_row_by_row(seed):
+    df = make_frame(seed=seed)
+    processed = app.process_data(df.copy())
+    kept, dropped = brute_force_rows(df)
+
+    assert processed.attrs['dropped_rows'] == dropped
+    assert isinstance(processed.index, pd.RangeIndex) and processed.index.start == 0
+    assert processed['한글업체명'].tolist() == df['한글업체명'].iloc[kept].tolist()
+
+    expected = [brute_force_business_number(v) for v in df['사업자등록번호'].iloc[kept]]
+    assert [None if pd.isna(v) else v for v in processed['사업자등록번호']] == expected
+
+    np.testing.assert_array_equal(processed['latitude'], [brute_force_coordinate(v) for v in df['위도'].iloc[kept]])
+    np.testing.assert_array_equal(processed['longitude'], [brute_force_coordinate(v) for v in df['경도'].iloc[kept]])
+    assert '위도' not in processed.columns and '경도' not in processed.columns
+
+
+# 숫자로만 읽힌 사업자등록번호 컬럼 (정수/실수)도 문자열로 정리
+@pytest.mark.parametrize('values,expected', [
+    ([1234567890, 2208162517], ['1234567890', '2208162517']),
+    ([1234567890.0, np.nan], ['1234567890', None]),
+])
+def test_numeric_business_numbers(values, expected):
+    df = pd.DataFrame({'사업자등록번호': values, 'latitude': [37.5, 37.5], 'longitude': [127.0, 127.0]})
+    processed = app.process_data(df)
+    assert [None if pd.isna(v) else v for v in processed['사업자등록번호']] == expected
+
+
+# 이미 latitude/longitude 컬럼이 있으면 위도/경도 컬럼으로 덮어쓰지 않음
+def test_existing_coordinate_columns_are_kept():
+    df = pd.DataFrame({'latitude': [37.5, 99.0], 'longitude': [127.0, 127.0], '위도': [99.0, 37.5], '경도': [0.0, 127.0]})
+    processed = app.process_data(df)
+    assert processed['latitude'].tolist() == [37.5]
+    assert processed.attrs['dropped_rows'] == {'missing_coords': 0, 'outside_korea': 1}
@@ -0,0 +1,84 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 앱 모듈 (파일명이 한글이므로 importlib로 로드, import 시 화면은 그리지 않음)
+app = importlib.import_module("company_map_app_최종")
+
+# 서울/경기 경계(서울 서쪽 끝) 근처 기준 위치
+CENTER = (37.55, 126.80)
+BORDER_LON = 126.80
+
+
+# 기준 위치 주변에 흩어진 기업 (경도로 서울/경기를 나눠서 반경 원이 시도 경계에 걸치도록)
+def make_frame(n_rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = CENTER[0] + rng.uniform(-0.15, 0.15, n_rows)
+    lon = CENTER[1] + rng.uniform(-0.15, 0.15, n_rows)
+    seoul = lon >= BORDER_LON
+    df = pd.DataFrame({
+        '시도': np.where(seoul, '서울특별시', '경기도'),
+        '시군구': np.where(seoul, '강서구', '부천시'),
+        '기업규모구분': rng.choice(['대기업', '중견기업', '중소기업'], n_rows),
+        '신용등급': rng.choice(['AAA', 'BBB0', 'B+'], n_rows),
+        '한글업체명': [f"업체{i}" for i in range(n_rows)],
+        '업종명': rng.choice(['제조업', '도매업', '소매업'], n_rows),
+        'latitude': lat,
+        'longitude': lon,
+    })
+    df = app.compact_frame(df)
+    df.attrs['dataset_version'] = f"radius-test-{seed}"
+    return df
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def snapshot(request, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'QUERY_BACKEND', request.param)
+    monkeypatch.setattr(app, 'CACHE_DIR', str(tmp_path))
+    return app.DatasetSnapshot(make_frame())
+
+
+# 비교 기준: 모든 행의 거리를 계산해서 반경 안 + 시도/시군구 외 조건 만족
+def brute_force_radius(df, radius_km, size=None, search=None):
+    lat1, lon1 = np.radians(CENTER[0]), np.radians(CENTER[1])
+    lat2, lon2 = np.radians(df['latitude'].to_numpy()), np.radians(df['longitude'].to_numpy())
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    mask = 2 * app.EARTH_RADIUS_KM * np.arcsin(np.sqrt(a)) <= radius_km
+    if size is not None:
+        mask &= (df['기업규모구분'] == size).to_numpy()
+    if search is not None:
+        mask &= df['업종명'].astype(str).str.contains(search, regex=False).to_numpy()
+    return np.flatnonzero(mask)
+
+
+# 다른 시도를 선택한 채로 반경 검색해도 경계 양쪽 기업이 모두 결과에 포함
+@pytest.mark.parametrize('region,district', [('서울특별시', '강서구'), ('경기도', '전체'), ('충청북도', '전체'), ('전체', '전체')])
+def test_radius_search_ignores_region(snapshot, region, district):
+    selections = {'시도': region, '시군구': district, '기업규모구분': '전체', '신용등급': '전체'}
+    positions, distances = app.query_positions(snapshot, selections, radius=(CENTER[0], CENTER[1], 5.0))
+    expected = brute_force_radius(snapshot.df, 5.0)
+    np.testing.assert_array_equal(np.sort(positions), expected)
+    assert np.all(np.diff(distances) >= 0)
+    assert set(snapshot.df['시도'].iloc[positions]) == {'서울특별시', '경기도'}
+
+
+# 기업규모/통합검색 조건은 반경 검색과 함께 적용
+def test_radius_search_keeps_other_filters(snapshot):
+    selections = {'시도': '서울특별시', '시군구': '강서구', '기업규모구분': '중소기업', '신용등급': '전체'}
+    positions, _ = app.query_positions(snapshot, selections, '도매', 'literal', ['업종명'],
+                                       radius=(CENTER[0], CENTER[1], 8.0))
+    np.testing.assert_array_equal(np.sort(positions), brute_force_radius(snapshot.df, 8.0, '중소기업', '도매'))
+
+
+# 반경 검색이 아니면 시도/시군구 조건 그대로 적용
+def test_region_filter_without_radius(snapshot):
+    selections = {'시도': '서울특별시', '시군구': '전체', '기업규모구분': '전체', '신용등급': '전체'}
+    positions, distances = app.query_positions(snapshot, selections)
+    assert distances is None
+    np.testing.assert_array_equal(positions, np.flatnonzero((snapshot.df['시도'] == '서울특별시').to_numpy()))
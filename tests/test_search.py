@@ -0,0 +1,147 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 앱 모듈 (파일명이 한글이므로 importlib로 로드, import 시 화면은 그리지 않음)
+app = importlib.import_module("company_map_app_최종")
+
+NAMES = ['삼성전자', '(주)삼성물산', '삼성 SDI', '상신브레이크', '삼양사', '새한ㅅ', '에이스삼성', 'LG전자', '전자랜드',
+         'ABC 상사', 'abc마트', '삼', '주식회사 한국전력', '한국 전자', None, np.nan]
+INDUSTRIES = ['전자부품 제조업', '도매 및 상품중개업', '소매업', '  음식점업 ', 'IT  서비스', None]
+BUSINESS_TYPES = ['제조', '도소매', '서비스', 'Software', None]
+PRODUCTS = ['반도체, 스마트폰', '자동차 부품', '브레이크 패드', '설탕', '전자제품 유통', 'SSD 1TB', None]
+INDUSTRY_CODES = ['C26', 'G46', 'G47', 'I56', 'J62', None]
+
+
+# 검색 대상 컬럼마다 결측값이 섞인 테스트용 데이터 (실제 로드처럼 타입 압축 후)
+def make_frame(n_rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        '한글업체명': [NAMES[i] for i in rng.integers(len(NAMES), size=n_rows)],
+        '업종명': [INDUSTRIES[i] for i in rng.integers(len(INDUSTRIES), size=n_rows)],
+        '업태명': [BUSINESS_TYPES[i] for i in rng.integers(len(BUSINESS_TYPES), size=n_rows)],
+        '주요상품내역': [PRODUCTS[i] for i in rng.integers(len(PRODUCTS), size=n_rows)],
+        '산업코드1': [INDUSTRY_CODES[i] for i in rng.integers(len(INDUSTRY_CODES), size=n_rows)],
+    })
+    return app.compact_frame(df)
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return make_frame()
+
+
+# 비교 기준: 정규화한 컬럼 값에 str.contains (결측은 항상 불일치)
+def brute_force_search(df, query, mode, fields):
+    query = app.normalize_search_text(query)
+    words = query.split(' ') if mode == 'all_words' else [query]
+    mask = np.ones(len(df), dtype=bool)
+    for word in words:
+        hit = np.zeros(len(df), dtype=bool)
+        for field in fields:
+            text = df[field].astype('string').str.lower().str.split().str.join(' ')
+            hit |= text.str.contains(word, regex=False).fillna(False).to_numpy(dtype=bool)
+        mask &= hit
+    return np.flatnonzero(mask)
+
+
+SEARCH_QUERIES = ['삼', '전', '자', 'a', '1', '전자', '삼성', 'ab', 'ABC', '반도체', '브레이크 패드', '  IT   서비스 ',
+                  '음식점업', 'C2', 'g4', '없는 검색어', '삼성 전자', 'ssd 1tb']
+
+
+@pytest.mark.parametrize('mode', ['literal', 'all_words'])
+@pytest.mark.parametrize('query', SEARCH_QUERIES)
+def test_search_index_matches_brute_force(frame, query, mode):
+    index = app.SearchIndex(frame)
+    fields = list(index.fields)
+    np.testing.assert_array_equal(index.search(query, mode=mode), brute_force_search(frame, query, mode, fields))
+
+
+@pytest.mark.parametrize('fields', [['한글업체명'], ['업종명', '주요상품내역'], ['산업코드1']])
+@pytest.mark.parametrize('query', ['삼', '전자', '업', 'c', 'G46'])
+def test_search_index_limits_fields(frame, query, fields):
+    index = app.SearchIndex(frame)
+    np.testing.assert_array_equal(index.search(query, fields=fields), brute_force_search(frame, query, 'literal', fields))
+
+
+def test_search_index_empty_query(frame):
+    index = app.SearchIndex(frame)
+    assert len(index.search('')) == 0
+    assert len(index.search('   ')) == 0
+
+
+# 이전 버전 인덱스의 n-gram을 재사용해 만든 인덱스도 새 데이터 기준으로 같은 결과
+@pytest.mark.parametrize('query', ['삼', '전자', '브레이크', 'abc', '새 값', 'zz'])
+def test_search_index_reuses_previous_version(query):
+    old = make_frame(seed=1)
+    new = make_frame(seed=2)
+    new.loc[new.index[:20], '주요상품내역'] = None
+    new['한글업체명'] = new['한글업체명'].astype(object)
+    new.loc[new.index[20:30], '한글업체명'] = '새 값 주식회사'
+    index = app.SearchIndex(new, app.SearchIndex(old))
+    fields = list(index.fields)
+    np.testing.assert_array_equal(index.search(query), brute_force_search(new, query, 'literal', fields))
+
+
+# 비교용 문자열 → 초성 문자열 (한글 음절이 아닌 글자는 그대로)
+def chosung_of(text):
+    return ''.join(app.CHOSUNG[(ord(c) - 0xAC00) // 588] if 0xAC00 <= ord(c) <= 0xD7A3 else c for c in text)
+
+
+# 비교 기준: 모든 업체명의 모든 위치를 초성으로 비교하고, 완성된 글자로 입력한 자리는 글자까지 비교
+# 순위는 처음 일치한 위치 → 이름 길이 → 처음 나온 순서
+def brute_force_names(names, query):
+    query = app.name_search_keys([query])[0]
+    key = chosung_of(query)
+    hits = []
+    for order, (name, text) in enumerate(zip(names, app.name_search_keys(names))):
+        for pos in range(len(text) - len(query) + 1):
+            part = text[pos:pos + len(query)]
+            if chosung_of(part) == key and all(q in app.CHOSUNG or q == c for q, c in zip(query, part)):
+                hits.append((pos, len(text), order, name))
+                break
+    return [name for *_, name in sorted(hits)]
+
+
+@pytest.fixture(scope='module')
+def name_index(frame):
+    return app.CompanyNameIndex(frame['한글업체명'])
+
+
+@pytest.fixture(scope='module')
+def unique_names(frame):
+    return list(pd.unique(frame['한글업체명'].dropna()))
+
+
+# 초성만 / 초성과 완성된 글자가 섞인 검색어 / 영문 한 글자
+@pytest.mark.parametrize('query', ['ㅅ', 'ㅅㅅ', 'ㅅㅅㅈㅈ', 'ㅈㅈ', 'ㅎㄱ', '삼ㅅ', 'ㅅ성', '삼ㅇ', '상ㅅ', '전ㅈ', 'ㅈ자',
+                                   '한ㄱ ㅈ', 'ㅇㅇㅅ', 'aㅂ', 'a', 'ㄲ', '새ㅎㅅ'])
+def test_chosung_search_matches_brute_force(name_index, unique_names, query):
+    assert name_index.suggest(query, limit=None) == brute_force_names(unique_names, query)
+
+
+def test_mixed_query_requires_typed_syllables(name_index):
+    names = name_index.suggest('삼ㅅ', limit=None)
+    assert '삼성전자' in names
+    assert '상신브레이크' not in names
+
+
+# 완성된 글자만 입력하면 유사 검색 (그대로 포함한 업체명은 모두 결과에 있어야 함)
+@pytest.mark.parametrize('query', ['삼', '전', '삼성', '전자', '삼성전자', '한국전력', '브레이크'])
+def test_fuzzy_search_includes_exact_matches(name_index, unique_names, query):
+    found = set(name_index.suggest(query, limit=None))
+    keys = app.name_search_keys(unique_names)
+    assert {name for name, key in zip(unique_names, keys) if query in key} <= found
+
+
+def test_name_search_skips_missing_names(frame, name_index):
+    rows = name_index.search('ㅅ')
+    assert frame['한글업체명'].iloc[rows].notna().all()
+    assert len(name_index.search('')) == 0
+    assert len(name_index.search('(주)')) == 0